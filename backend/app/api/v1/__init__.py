@@ -2,7 +2,7 @@
 
 from fastapi import APIRouter
 
-from .endpoints import auth, institutions, mdrm, report_series, submissions, validation, reports, forms
+from .endpoints import auth, institutions, mdrm, report_series, submissions, validation, reports, forms, analytics, data_quality
 
 api_router = APIRouter()
 
@@ -15,4 +15,6 @@ api_router.include_router(submissions.router, prefix="/submissions", tags=["Data
 api_router.include_router(validation.router, prefix="/validation", tags=["Validation"])
 api_router.include_router(reports.router, prefix="/reports", tags=["Reports"])
 api_router.include_router(forms.router, prefix="/forms", tags=["Forms"])
+api_router.include_router(analytics.router, prefix="/analytics", tags=["Analytics"])
+api_router.include_router(data_quality.router, prefix="/data-quality", tags=["Data Quality"])
 
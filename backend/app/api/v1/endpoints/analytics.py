@@ -0,0 +1,125 @@
+from typing import Any, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.orm import Session
+from datetime import date
+
+from ....core.database import get_db
+from ....core.security import get_current_active_user, check_permissions
+from ....models.institution import Institution
+from ....models.user import User
+from ....schemas.peer_analytics import PeerGroupStatisticResponse, PeriodAggregateResponse
+from ....services.peer_analytics import get_peer_statistics, institution_values, rebuild_peer_statistics
+from ....services.period_rollups import period_aggregates, rebuild_period_rollups
+
+router = APIRouter()
+
+@router.get("/peers", response_model=List[PeerGroupStatisticResponse])
+def get_peer_analytics(
+    report_series_id: int = Query(..., description="Report series ID"),
+    reporting_date: date = Query(..., description="Reporting date (YYYY-MM-DD)"),
+    mdrm: List[str] = Query([], description="MDRM identifiers; all items when omitted"),
+    institution_type: Optional[str] = Query(None, description="Peer group; all institution types when omitted"),
+    institution_id: Optional[int] = Query(None, description="Compare an institution with its peer group"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+) -> Any:
+    """
+    Get the distribution of MDRM items across institutions of the same type.
+    
+    - Statistics cover the latest accepted filing of each institution and are served from a precomputed table
+    - A period with no statistics yet returns none while they are computed in the background
+    - With institution_id, the peer group is the institution's type and its own values are included
+    - External users can only compare their own institution with its peers
+    """
+    # Check permissions
+    if current_user.role == "external" and (institution_id is None or current_user.institution_id != institution_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    
+    values = {}
+    if institution_id is not None:
+        institution = db.query(Institution).filter(Institution.id == institution_id).first()
+        if not institution:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Institution with ID {institution_id} not found"
+            )
+        
+        institution_type = institution.institution_type
+        values = institution_values(db, institution_id, report_series_id, reporting_date, mdrm)
+    
+    statistics = []
+    for statistic in get_peer_statistics(db, report_series_id, reporting_date, mdrm, institution_type):
+        response = PeerGroupStatisticResponse.model_validate(statistic)
+        response.institution_value = values.get(statistic.mdrm_identifier)
+        statistics.append(response)
+    
+    return statistics
+
+@router.post("/peers/refresh")
+def refresh_peer_analytics(
+    report_series_id: Optional[int] = Query(None, description="Limit to a report series"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+) -> Any:
+    """
+    Recompute the peer statistics of every period with accepted filings.
+    
+    - Only analysts and admins can refresh peer statistics
+    - Statistics are otherwise recomputed in the background when a filing is accepted or withdrawn
+    """
+    # Check permissions
+    if not check_permissions("analyst", current_user):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    
+    return rebuild_peer_statistics(db, report_series_id)
+
+@router.get("/aggregates", response_model=List[PeriodAggregateResponse])
+def get_period_aggregates(
+    report_series_id: int = Query(..., description="Report series ID"),
+    reporting_date: date = Query(..., description="Reporting date (YYYY-MM-DD)"),
+    mdrm: List[str] = Query([], description="MDRM identifiers; all items when omitted"),
+    by_institution_type: bool = Query(False, description="Break totals down by institution type"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+) -> Any:
+    """
+    Get the totals of MDRM items across all filers for a period.
+    
+    - Only analysts and admins can view aggregates across institutions
+    - Totals cover the latest accepted filing of each institution and are served from rollup tables
+    """
+    # Check permissions
+    if not check_permissions("analyst", current_user):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    
+    return period_aggregates(db, report_series_id, reporting_date, mdrm, by_institution_type)
+
+@router.post("/aggregates/refresh")
+def refresh_period_aggregates(
+    report_series_id: Optional[int] = Query(None, description="Limit to a report series"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+) -> Any:
+    """
+    Rebuild the period rollups of every period with accepted filings.
+    
+    - Only analysts and admins can rebuild rollups
+    - Rollups are otherwise updated in place when a filing is accepted, and recomputed when one is withdrawn
+    """
+    # Check permissions
+    if not check_permissions("analyst", current_user):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    
+    return rebuild_period_rollups(db, report_series_id)
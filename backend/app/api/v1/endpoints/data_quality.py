@@ -0,0 +1,68 @@
+from typing import Any, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from sqlalchemy.orm import Session
+from datetime import date
+
+from ....core.database import get_db
+from ....core.security import get_current_active_user, check_permissions
+from ....models.user import User
+from ....schemas.data_quality import DataQualityBreakdownResponse
+from ....services.data_quality import QUALITY_DIMENSIONS, quality_breakdown, rebuild_quality_cube
+
+router = APIRouter()
+
+@router.get("/{dimension}", response_model=List[DataQualityBreakdownResponse])
+def get_data_quality(
+    dimension: str,
+    rule_id: Optional[int] = Query(None, description="Filter by rule"),
+    institution_id: Optional[int] = Query(None, description="Filter by institution"),
+    report_series_id: Optional[int] = Query(None, description="Filter by report series"),
+    start_date: Optional[date] = Query(None, description="Earliest reporting date (YYYY-MM-DD)"),
+    end_date: Optional[date] = Query(None, description="Latest reporting date (YYYY-MM-DD)"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+) -> Any:
+    """
+    Get validation result counts and error rates broken down by rule, institution, series or period.
+    
+    - Drill down by filtering on one dimension and breaking down by another
+    - Counts are served from the precomputed data quality cube
+    - External users only see their own institution's results
+    """
+    # Check if dimension is valid
+    if dimension not in QUALITY_DIMENSIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid dimension. Valid dimensions: {', '.join(QUALITY_DIMENSIONS)}"
+        )
+    
+    # Check permissions
+    if current_user.role == "external":
+        if institution_id is not None and current_user.institution_id != institution_id:
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Not enough permissions"
+            )
+        institution_id = current_user.institution_id
+    
+    return quality_breakdown(db, dimension, rule_id, institution_id, report_series_id, start_date, end_date)
+
+@router.post("/rebuild")
+def rebuild_data_quality(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+) -> Any:
+    """
+    Rebuild the data quality cube from the stored validation results.
+    
+    - Only analysts and admins can rebuild the cube
+    - The cube is otherwise kept current as results are written and resolved
+    """
+    # Check permissions
+    if not check_permissions("analyst", current_user):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    
+    return rebuild_quality_cube(db)
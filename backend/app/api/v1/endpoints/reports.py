@@ -26,27 +26,81 @@
 
 
 
-from typing import Any, List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from typing import Any, Optional
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
+from starlette.background import BackgroundTask
 from sqlalchemy.orm import Session
 from datetime import datetime, date
-import pandas as pd
-import io
+import os
 
 from ....core.database import get_db
 from ....core.security import get_current_active_user, check_permissions
 from ....models.data_submission import DataSubmission
-from ....models.submitted_data import SubmittedData
-from ....models.validation_result import ValidationResult
 from ....models.institution import Institution
+from ....models.report_series import ReportSeries
 from ....models.user import User
+from ....models.report_export import ReportExport
+from ....schemas.report_export import ReportExportRequest, ReportExportResponse
+from ....services.parquet_writer import write_parquet
+from ....services.report_exports import cancel_export, export_path, export_queue, start_report_export, stream_export_events
+from ....services.report_cache import report_cache
+from ....services.report_archive import stream_period_archive
+from ....services.reports import (
+    HISTORICAL_LAYOUTS,
+    HISTORICAL_REPORT_COLUMNS,
+    SUBMISSION_REPORT_COLUMNS,
+    VALIDATION_REPORT_COLUMNS,
+    historical_report_dates,
+    historical_report_rows,
+    historical_wide_rows,
+    read_rows,
+    spool_report,
+    stream_csv,
+    submission_report_rows,
+    validation_report_rows,
+    wide_historical_columns,
+    write_excel,
+)
 
 router = APIRouter()
 
+# Media type and file extension of the formats whose artifacts are cached
+CACHED_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "excel": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+def cached_report(request: Request, key: str, format: str, filename: str) -> Optional[Response]:
+    """
+    Answer a report request from the artifact cache, if possible.
+    
+    Returns 304 Not Modified when the client's If-None-Match names the
+    current artifact, the cached file when there is one, or None when the
+    report has to be generated.
+    """
+    etag = report_cache.etag(key)
+    if_none_match = [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]
+    if "*" in if_none_match or etag in if_none_match or f"W/{etag}" in if_none_match:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    
+    path = report_cache.get(key)
+    if path:
+        media_type, extension = CACHED_FORMATS[format]
+        return FileResponse(
+            path,
+            media_type=media_type,
+            headers={"Content-Disposition": f"attachment; filename={filename}.{extension}", "ETag": etag}
+        )
+    
+    return None
+
 @router.get("/submissions/{submission_id}")
 def generate_submission_report(
     submission_id: int,
-    format: str = Query("csv", description="Report format (csv, excel, pdf)"),
+    request: Request,
+    format: str = Query("csv", description="Report format (csv, excel, parquet, pdf)"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ) -> Any:
@@ -55,6 +109,8 @@ def generate_submission_report(
     
     - External users can only generate reports for their own institution's submissions
     - Analysts and admins can generate reports for any submission
+    - Reports are cached until the submission's data change; send the ETag back
+      in If-None-Match to get 304 Not Modified for an unchanged report
     """
     # Get submission
     submission = db.query(DataSubmission).filter(DataSubmission.id == submission_id).first()
@@ -72,60 +128,71 @@ def generate_submission_report(
             detail="Not enough permissions"
         )
     
-    # Get submitted data
-    data_points = db.query(SubmittedData).filter(SubmittedData.submission_id == submission_id).all()
+    # Serve the cached artifact of the current data version
+    key = report_cache.key("submission", submission_id, format, submission.data_version)
+    if format in CACHED_FORMATS:
+        cached = cached_report(request, key, format, f"submission_{submission_id}_report")
+        if cached:
+            return cached
     
-    # Create DataFrame
-    df = pd.DataFrame([
-        {
-            "mdrm_identifier": data.mdrm_identifier,
-            "reported_value": data.reported_value,
-            "calculated_value": data.calculated_value
-        }
-        for data in data_points
-    ])
+    rows = submission_report_rows(submission_id)
     
     # Generate report based on format
     if format == "csv":
-        # Generate CSV
-        output = io.StringIO()
-        df.to_csv(output, index=False)
-        
-        return Response(
-            content=output.getvalue(),
+        # Stream CSV, reading the data in batches and caching it as it is sent
+        return StreamingResponse(
+            report_cache.stream_through(key, stream_csv(SUBMISSION_REPORT_COLUMNS, rows)),
             media_type="text/csv",
-            headers={"Content-Disposition": f"attachment; filename=submission_{submission_id}_report.csv"}
+            headers={
+                "Content-Disposition": f"attachment; filename=submission_{submission_id}_report.csv",
+                "ETag": report_cache.etag(key)
+            }
         )
     
     elif format == "excel":
-        # Generate Excel
-        output = io.BytesIO()
-        df.to_excel(output, index=False)
+        # Write the workbook row by row into the cache, then stream the file
+        path = report_cache.write(key, lambda output: write_excel(SUBMISSION_REPORT_COLUMNS, read_rows(rows), output))
         
-        return Response(
-            content=output.getvalue(),
+        return FileResponse(
+            path,
             media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            headers={"Content-Disposition": f"attachment; filename=submission_{submission_id}_report.xlsx"}
+            headers={
+                "Content-Disposition": f"attachment; filename=submission_{submission_id}_report.xlsx",
+                "ETag": report_cache.etag(key)
+            }
+        )
+    
+    elif format == "parquet":
+        # Write typed columns into the cache one row group at a time, then stream the file
+        path = report_cache.write(key, lambda output: write_parquet(SUBMISSION_REPORT_COLUMNS, read_rows(rows), output))
+        
+        return FileResponse(
+            path,
+            media_type="application/vnd.apache.parquet",
+            headers={
+                "Content-Disposition": f"attachment; filename=submission_{submission_id}_report.parquet",
+                "ETag": report_cache.etag(key)
+            }
         )
     
     elif format == "pdf":
-        # In a real implementation, this would generate a PDF
-        # For now, we'll just return an error
+        # PDF rendering runs as an export job rather than on the request thread
         raise HTTPException(
-            status_code=status.HTTP_501_NOT_IMPLEMENTED,
-            detail="PDF generation not implemented"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="PDF reports are generated by export jobs. Use POST /reports/exports"
         )
     
     else:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid format. Supported formats: csv, excel, pdf"
+            detail="Invalid format. Supported formats: csv, excel, parquet, pdf"
         )
 
 @router.get("/validation/{submission_id}")
 def generate_validation_report(
     submission_id: int,
-    format: str = Query("csv", description="Report format (csv, excel, pdf)"),
+    request: Request,
+    format: str = Query("csv", description="Report format (csv, excel, parquet, pdf)"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ) -> Any:
@@ -134,6 +201,8 @@ def generate_validation_report(
     
     - External users can only generate reports for their own institution's submissions
     - Analysts and admins can generate reports for any submission
+    - Reports are cached until the submission's results change; send the ETag back
+      in If-None-Match to get 304 Not Modified for an unchanged report
     """
     # Get submission
     submission = db.query(DataSubmission).filter(DataSubmission.id == submission_id).first()
@@ -151,55 +220,64 @@ def generate_validation_report(
             detail="Not enough permissions"
         )
     
-    # Get validation results
-    validation_results = db.query(ValidationResult).filter(ValidationResult.submission_id == submission_id).all()
+    # Serve the cached artifact of the current data version
+    key = report_cache.key("validation", submission_id, format, submission.data_version)
+    if format in CACHED_FORMATS:
+        cached = cached_report(request, key, format, f"validation_{submission_id}_report")
+        if cached:
+            return cached
     
-    # Create DataFrame
-    df = pd.DataFrame([
-        {
-            "field_identifier": result.field_identifier,
-            "error_message": result.error_message,
-            "severity": result.severity,
-            "status": result.status
-        }
-        for result in validation_results
-    ])
+    rows = validation_report_rows(submission_id)
     
     # Generate report based on format
     if format == "csv":
-        # Generate CSV
-        output = io.StringIO()
-        df.to_csv(output, index=False)
-        
-        return Response(
-            content=output.getvalue(),
+        # Stream CSV, reading the results in batches and caching it as it is sent
+        return StreamingResponse(
+            report_cache.stream_through(key, stream_csv(VALIDATION_REPORT_COLUMNS, rows)),
             media_type="text/csv",
-            headers={"Content-Disposition": f"attachment; filename=validation_{submission_id}_report.csv"}
+            headers={
+                "Content-Disposition": f"attachment; filename=validation_{submission_id}_report.csv",
+                "ETag": report_cache.etag(key)
+            }
         )
     
     elif format == "excel":
-        # Generate Excel
-        output = io.BytesIO()
-        df.to_excel(output, index=False)
+        # Write the workbook row by row into the cache, then stream the file
+        path = report_cache.write(key, lambda output: write_excel(VALIDATION_REPORT_COLUMNS, read_rows(rows), output))
         
-        return Response(
-            content=output.getvalue(),
+        return FileResponse(
+            path,
             media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            headers={"Content-Disposition": f"attachment; filename=validation_{submission_id}_report.xlsx"}
+            headers={
+                "Content-Disposition": f"attachment; filename=validation_{submission_id}_report.xlsx",
+                "ETag": report_cache.etag(key)
+            }
+        )
+    
+    elif format == "parquet":
+        # Write typed columns into the cache one row group at a time, then stream the file
+        path = report_cache.write(key, lambda output: write_parquet(VALIDATION_REPORT_COLUMNS, read_rows(rows), output))
+        
+        return FileResponse(
+            path,
+            media_type="application/vnd.apache.parquet",
+            headers={
+                "Content-Disposition": f"attachment; filename=validation_{submission_id}_report.parquet",
+                "ETag": report_cache.etag(key)
+            }
         )
     
     elif format == "pdf":
-        # In a real implementation, this would generate a PDF
-        # For now, we'll just return an error
+        # PDF rendering runs as an export job rather than on the request thread
         raise HTTPException(
-            status_code=status.HTTP_501_NOT_IMPLEMENTED,
-            detail="PDF generation not implemented"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="PDF reports are generated by export jobs. Use POST /reports/exports"
         )
     
     else:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid format. Supported formats: csv, excel, pdf"
+            detail="Invalid format. Supported formats: csv, excel, parquet, pdf"
         )
 
 @router.get("/historical/{institution_id}")
@@ -208,7 +286,8 @@ def generate_historical_report(
     report_series_id: int = Query(..., description="Report series ID"),
     start_date: str = Query(..., description="Start date (YYYY-MM-DD)"),
     end_date: str = Query(..., description="End date (YYYY-MM-DD)"),
-    format: str = Query("csv", description="Report format (csv, excel, pdf)"),
+    format: str = Query("csv", description="Report format (csv, excel, parquet, pdf)"),
+    layout: str = Query("long", description="Row layout (long, wide)"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ) -> Any:
@@ -217,6 +296,8 @@ def generate_historical_report(
     
     - External users can only generate reports for their own institution
     - Analysts and admins can generate reports for any institution
+    - The long layout has one row per reported value; the wide layout has one row
+      per MDRM item and one column per reporting date
     """
     # Check permissions
     if current_user.role == "external" and current_user.institution_id != institution_id:
@@ -243,90 +324,272 @@ def generate_historical_report(
             detail="Invalid date format. Use YYYY-MM-DD"
         )
     
-    # Get submissions
-    submissions = db.query(DataSubmission).filter(
-        DataSubmission.institution_id == institution_id,
-        DataSubmission.report_series_id == report_series_id,
-        DataSubmission.reporting_date >= start_date_obj,
-        DataSubmission.reporting_date <= end_date_obj
-    ).all()
-    
-    # Create DataFrame
-    data = []
-    
-    for submission in submissions:
-        # Get submitted data
-        data_points = db.query(SubmittedData).filter(SubmittedData.submission_id == submission.id).all()
-        
-        for data_point in data_points:
-            data.append({
-                "reporting_date": submission.reporting_date,
-                "mdrm_identifier": data_point.mdrm_identifier,
-                "reported_value": data_point.reported_value
-            })
+    if layout not in HISTORICAL_LAYOUTS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid layout. Supported layouts: long, wide"
+        )
     
-    df = pd.DataFrame(data)
+    if layout == "long":
+        columns = HISTORICAL_REPORT_COLUMNS
+        rows = historical_report_rows(institution_id, report_series_id, start_date_obj, end_date_obj)
+    else:
+        # One column per reporting date, then one row per MDRM item
+        reporting_dates = historical_report_dates(db, institution_id, report_series_id, start_date_obj, end_date_obj)
+        columns = wide_historical_columns(reporting_dates)
+        rows = historical_wide_rows(institution_id, report_series_id, start_date_obj, end_date_obj, reporting_dates)
     
     # Generate report based on format
     if format == "csv":
-        # Generate CSV
-        output = io.StringIO()
-        df.to_csv(output, index=False)
-        
-        return Response(
-            content=output.getvalue(),
+        # Stream CSV, reading the data in batches
+        return StreamingResponse(
+            stream_csv(columns, rows),
             media_type="text/csv",
             headers={"Content-Disposition": f"attachment; filename=historical_{institution_id}_report.csv"}
         )
     
-    elif format == "excel":
-        # Generate Excel
-        output = io.BytesIO()
-        df.to_excel(output, index=False)
+    elif format in ("excel", "parquet"):
+        table = read_rows(rows)
         
-        return Response(
-            content=output.getvalue(),
-            media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            headers={"Content-Disposition": f"attachment; filename=historical_{institution_id}_report.xlsx"}
+        if format == "excel":
+            # Write the workbook row by row to a temporary file, streamed and then removed
+            path = spool_report(lambda output: write_excel(columns, table, output), ".xlsx")
+            media_type, extension = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx"
+        else:
+            # Write typed columns one row group at a time to a temporary file, streamed and then removed
+            path = spool_report(lambda output: write_parquet(columns, table, output), ".parquet")
+            media_type, extension = "application/vnd.apache.parquet", "parquet"
+        
+        return FileResponse(
+            path,
+            media_type=media_type,
+            headers={"Content-Disposition": f"attachment; filename=historical_{institution_id}_report.{extension}"},
+            background=BackgroundTask(os.remove, path)
         )
     
     elif format == "pdf":
-        # In a real implementation, this would generate a PDF
-        # For now, we'll just return an error
+        # PDF rendering runs as an export job rather than on the request thread
         raise HTTPException(
-            status_code=status.HTTP_501_NOT_IMPLEMENTED,
-            detail="PDF generation not implemented"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="PDF reports are generated by export jobs. Use POST /reports/exports"
         )
     
     else:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid format. Supported formats: csv, excel, pdf"
+            detail="Invalid format. Supported formats: csv, excel, parquet, pdf"
         )
 
+@router.get("/periods/{report_series_id}")
+def generate_period_archive(
+    report_series_id: int,
+    reporting_date: date = Query(..., description="Reporting date (YYYY-MM-DD)"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+) -> Any:
+    """
+    Download every accepted submission for a series and reporting date as a zip archive.
+    
+    - Only analysts and admins can download a full period
+    - The archive holds one CSV file per institution and a combined file, and is
+      streamed as it is compressed
+    - Where an institution has several accepted filings, only the latest is included
+    """
+    # Check permissions
+    if not check_permissions("analyst", current_user):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    
+    # Check if report series exists
+    report_series = db.query(ReportSeries).filter(ReportSeries.id == report_series_id).first()
+    if not report_series:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Report series with ID {report_series_id} not found"
+        )
+    
+    return StreamingResponse(
+        stream_period_archive(report_series_id, reporting_date),
+        media_type="application/zip",
+        headers={
+            "Content-Disposition": f"attachment; filename=series_{report_series_id}_{reporting_date.isoformat()}.zip"
+        }
+    )
 
+def get_export_or_404(db: Session, export_id: int, current_user: User) -> ReportExport:
+    """Get a report export, checking the user may see it."""
+    export = db.query(ReportExport).filter(ReportExport.id == export_id).first()
+    
+    if not export:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Report export with ID {export_id} not found"
+        )
+    
+    # Check permissions
+    if export.owner_id != current_user.id and not check_permissions("analyst", current_user):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    
+    return export
 
+@router.post("/exports", response_model=ReportExportResponse, status_code=status.HTTP_202_ACCEPTED)
+def create_report_export(
+    export_in: ReportExportRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+) -> Any:
+    """
+    Export a report in a background job.
+    
+    - Supports every report and format, including PDF
+    - External users can only export reports for their own institution
+    - Poll GET /reports/exports/{export_id} or stream its events, then download the file
+    """
+    if export_in.report_type in ("submission", "validation"):
+        if export_in.submission_id is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="submission_id is required for submission and validation reports"
+            )
+        
+        # Get submission
+        submission = db.query(DataSubmission).filter(DataSubmission.id == export_in.submission_id).first()
+        
+        if not submission:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Submission with ID {export_in.submission_id} not found"
+            )
+        
+        institution_id = submission.institution_id
+        params = {"submission_id": export_in.submission_id}
+    
+    else:
+        if None in (export_in.institution_id, export_in.report_series_id, export_in.start_date, export_in.end_date):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="institution_id, report_series_id, start_date and end_date are required for historical reports"
+            )
+        
+        # Check if institution exists
+        institution = db.query(Institution).filter(Institution.id == export_in.institution_id).first()
+        if not institution:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Institution with ID {export_in.institution_id} not found"
+            )
+        
+        institution_id = export_in.institution_id
+        params = {
+            "institution_id": export_in.institution_id,
+            "report_series_id": export_in.report_series_id,
+            "start_date": export_in.start_date,
+            "end_date": export_in.end_date,
+            "layout": export_in.layout,
+        }
+    
+    # Check permissions
+    if current_user.role == "external" and current_user.institution_id != institution_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    
+    return start_report_export(db, export_in.report_type, export_in.format, params, current_user)
 
+@router.get("/exports/metrics")
+def get_export_queue_metrics(
+    current_user: User = Depends(get_current_active_user)
+) -> Any:
+    """
+    Get the export queue's depth and job counters.
+    
+    - Only analysts and admins can see queue metrics
+    """
+    # Check permissions
+    if not check_permissions("analyst", current_user):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    
+    return export_queue.metrics()
 
+@router.get("/exports/{export_id}", response_model=ReportExportResponse)
+def get_report_export(
+    export_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+) -> Any:
+    """
+    Get the progress of a report export.
+    """
+    return get_export_or_404(db, export_id, current_user)
 
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
+@router.get("/exports/{export_id}/events")
+def stream_report_export_events(
+    export_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+) -> Any:
+    """
+    Stream the progress of a report export as Server-Sent Events.
+    
+    - A `progress` event is sent whenever the rows written change
+    - A final `done` event is sent when the export completes, fails or is cancelled
+    """
+    get_export_or_404(db, export_id, current_user)
+    
+    return StreamingResponse(
+        stream_export_events(export_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.get("/exports/{export_id}/download")
+def download_report_export(
+    export_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+) -> Any:
+    """
+    Download the file of a completed report export.
+    """
+    export = get_export_or_404(db, export_id, current_user)
+    
+    if export.status != "completed":
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Report export with ID {export_id} is {export.status}"
+        )
+    
+    path = export_path(export)
+    if not os.path.exists(path):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"The file of report export {export_id} has expired"
+        )
+    
+    return FileResponse(
+        path,
+        media_type=export.media_type,
+        headers={"Content-Disposition": f"attachment; filename={export.filename}"}
+    )
+
+@router.delete("/exports/{export_id}", response_model=ReportExportResponse)
+def cancel_report_export(
+    export_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+) -> Any:
+    """
+    Cancel a queued or running report export.
+    """
+    export = get_export_or_404(db, export_id, current_user)
+    
+    return cancel_export(db, export)
@@ -19,7 +19,7 @@
 
 from typing import Any, List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 import os
 import pandas as pd
 import json
@@ -35,6 +35,11 @@ from ....models.institution import Institution
 from ....models.report_series import ReportSeries
 from ....models.user import User
 from ....schemas.data_submission import DataSubmissionCreate, DataSubmissionUpdate, DataSubmissionResponse
+from ....services.validation_engine import RunOptions
+from ....services.validation_runs import start_validation_run
+from ....services.report_cache import invalidate_reports
+from ....services.peer_analytics import PEER_SUBMISSION_STATUSES, refresh_peer_statistics, schedule_period_refresh
+from ....services.period_rollups import update_period_rollups
 
 router = APIRouter()
 
@@ -53,9 +58,10 @@ def get_submissions(
     
     - External users can only see their own institution's submissions
     - Analysts and admins can see all submissions
+    - Validation result counts are loaded in the same query
     """
     # Build query
-    query = db.query(DataSubmission)
+    query = db.query(DataSubmission).options(joinedload(DataSubmission.validation_summary))
     
     # Apply filters
     if institution_id:
@@ -213,6 +219,9 @@ def get_submission(
 @router.post("/{submission_id}/validate", status_code=status.HTTP_202_ACCEPTED)
 def validate_submission(
     submission_id: int,
+    fail_fast: bool = Query(False, description="Stop at the first error-severity finding"),
+    max_errors: Optional[int] = Query(None, ge=1, description="Stop after this many findings"),
+    errors_only: bool = Query(False, description="Skip warning-severity rules"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ) -> Any:
@@ -221,6 +230,7 @@ def validate_submission(
     
     - External users can only validate their own institution's submissions
     - Analysts and admins can validate any submission
+    - fail_fast, max_errors and errors_only run a quicker preview validation
     """
     # Get submission
     submission = db.query(DataSubmission).filter(DataSubmission.id == submission_id).first()
@@ -238,17 +248,13 @@ def validate_submission(
             detail="Not enough permissions"
         )
     
-    # Update submission status
-    submission.validation_status = "in_progress"
-    db.commit()
-    
-    # In a real implementation, this would trigger an asynchronous validation process
-    # For now, we'll just update the status
-    submission.validation_status = "passed"  # This would be determined by the validation process
-    db.commit()
+    # Queue a background validation run
+    options = RunOptions(fail_fast=fail_fast, max_errors=max_errors, errors_only=errors_only)
+    run = start_validation_run(db, submission, current_user, options)
     
     return {
         "detail": "Validation triggered successfully",
+        "run_id": run.id,
         "status": submission.status,
         "validation_status": submission.validation_status
     }
@@ -300,10 +306,23 @@ def update_submission_status(
             )
     
     # Update submission status
+    previous_status = submission.status
     submission.status = status
+    
+    # Accepting a filing, or withdrawing an accepted one, changes its period's peer statistics and rollups;
+    # rollups are updated in place and peer statistics are recomputed in the background once committed
+    peers_changed = previous_status != status and (
+        previous_status in PEER_SUBMISSION_STATUSES or status in PEER_SUBMISSION_STATUSES
+    )
+    if peers_changed:
+        update_period_rollups(db, submission, previous_status)
+    
     db.commit()
     db.refresh(submission)
     
+    if peers_changed:
+        schedule_period_refresh(refresh_peer_statistics, submission.report_series_id, submission.reporting_date)
+    
     return submission
 
 async def process_submission_file(submission_id: int, file_path: str, file_ext: str, db: Session) -> None:
@@ -385,6 +404,7 @@ async def process_submission_file(submission_id: int, file_path: str, file_ext:
         
         db.add(submitted_data)
     
+    invalidate_reports(db, [submission_id])
     db.commit()
 
 
@@ -25,6 +25,7 @@
 
 from typing import Any, List, Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from datetime import datetime, date
 
@@ -33,22 +34,84 @@ from ....core.security import get_current_active_user, check_permissions
 from ....models.validation_rule import ValidationRule
 from ....models.validation_result import ValidationResult
 from ....models.data_submission import DataSubmission
+from ....models.validation_run import ValidationRun
 from ....models.user import User
-from ....schemas.validation_rule import ValidationRuleCreate, ValidationRuleUpdate, ValidationRuleResponse
-from ....schemas.validation_result import ValidationResultResponse
+from ....schemas.validation_rule import ValidationRuleCreate, ValidationRuleUpdate, ValidationRuleResponse, RuleImpactRequest
+from ....schemas.job import JobResponse
+from ....schemas.validation_result import ValidationResultResponse, ValidationResultStatusUpdate, ValidationBatchRequest
+from ....schemas.validation_run import ValidationRunResponse
+from ....services.validation_engine import CompiledRule, RuleCompilationError, RunOptions
+from ....services.validation_runs import start_batch_validation_run, start_validation_run, stream_run_events
+from ....services.jobs import Job
+from ....services.rule_impact import analysis_queue, start_rule_impact_analysis
+from ....services.result_memo import prune_memo
+from ....services.rule_profiler import rule_stats_report
+from ....services.validation_summaries import refresh_summaries
+from ....services.data_quality import refresh_quality_cube
+from ....services.report_cache import invalidate_reports
 
 router = APIRouter()
 
+def get_run_or_404(db: Session, run_id: int, current_user: User) -> ValidationRun:
+    """Get a validation run, checking the user may see its submission."""
+    run = db.query(ValidationRun).filter(ValidationRun.id == run_id).first()
+    
+    if not run:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Validation run with ID {run_id} not found"
+        )
+    
+    # Check permissions
+    if current_user.role == "external" and current_user.institution_id != run.submission.institution_id:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    
+    return run
+
+def get_impact_job_or_404(job_id: str, current_user: User) -> Job:
+    """Get a rule impact job, checking the user may see it."""
+    if not check_permissions("analyst", current_user):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    
+    job = analysis_queue.get_job(job_id)
+    
+    if not job or job.kind != "rule_impact":
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Rule impact job with ID {job_id} not found"
+        )
+    
+    return job
+
+def check_rule_definition(rule_definition: str) -> None:
+    """Reject rule definitions the validation engine cannot compile."""
+    try:
+        CompiledRule(0, "", "", rule_definition)
+    except RuleCompilationError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
 @router.get("/rules", response_model=List[ValidationRuleResponse])
 def get_validation_rules(
     rule_type: Optional[str] = Query(None, description="Filter by rule type"),
+    rule_group: Optional[str] = Query(None, description="Filter by rule group"),
     skip: int = 0,
     limit: int = 100,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ) -> Any:
     """
-    Retrieve validation rules.
+    Retrieve validation rules in execution order.
+    
+    - rule_group is a reporting label for filtering; the engine batches rules by priority only
     """
     # Build query
     query = db.query(ValidationRule)
@@ -56,9 +119,11 @@ def get_validation_rules(
     # Apply filters
     if rule_type:
         query = query.filter(ValidationRule.rule_type == rule_type)
+    if rule_group:
+        query = query.filter(ValidationRule.rule_group == rule_group)
     
     # Execute query
-    rules = query.offset(skip).limit(limit).all()
+    rules = query.order_by(ValidationRule.priority, ValidationRule.id).offset(skip).limit(limit).all()
     
     return rules
 
@@ -80,6 +145,9 @@ def create_validation_rule(
             detail="Not enough permissions"
         )
     
+    # Check rule definition
+    check_rule_definition(rule_in.rule_definition)
+    
     # Create new validation rule
     rule = ValidationRule(
         rule_name=rule_in.rule_name,
@@ -88,7 +156,9 @@ def create_validation_rule(
         rule_definition=rule_in.rule_definition,
         severity=rule_in.severity,
         effective_date=rule_in.effective_date,
-        end_date=rule_in.end_date
+        end_date=rule_in.end_date,
+        priority=rule_in.priority,
+        rule_group=rule_in.rule_group
     )
     
     db.add(rule)
@@ -97,6 +167,99 @@ def create_validation_rule(
     
     return rule
 
+@router.get("/rules/stats")
+def get_validation_rule_stats(
+    sort: str = Query("total_seconds", description="Sort by total_seconds, p95_seconds, evaluation_count or fire_rate"),
+    limit: int = 100,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+) -> Any:
+    """
+    Get per-rule execution statistics.
+    
+    - Only analysts and admins can see rule statistics
+    - Sorting by fire_rate lists never-firing rules first; other sorts list the most expensive rules first
+    """
+    # Check permissions
+    if not check_permissions("analyst", current_user):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    
+    valid_sorts = ["total_seconds", "p95_seconds", "evaluation_count", "fire_rate"]
+    if sort not in valid_sorts:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid sort. Valid values: {', '.join(valid_sorts)}"
+        )
+    
+    return rule_stats_report(db, sort=sort, limit=limit)
+
+@router.post("/rules/impact", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
+def analyze_rule_impact(
+    impact_in: RuleImpactRequest,
+    current_user: User = Depends(get_current_active_user)
+) -> Any:
+    """
+    Dry-run a candidate rule against historical submissions.
+    
+    - Only analysts and admins can analyze rule impact
+    - The rule is evaluated in a background job and no results are stored
+    - Poll GET /validation/rules/impact/{job_id} for hit counts per institution and period
+    """
+    # Check permissions
+    if not check_permissions("analyst", current_user):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    
+    # Check rule definition
+    check_rule_definition(impact_in.rule_definition)
+    
+    if impact_in.start_date > impact_in.end_date:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="start_date must not be after end_date"
+        )
+    
+    job = start_rule_impact_analysis(
+        impact_in.rule_definition,
+        impact_in.rule_type,
+        impact_in.severity,
+        impact_in.start_date,
+        impact_in.end_date,
+        report_series_id=impact_in.report_series_id,
+        institution_id=impact_in.institution_id,
+        owner_id=current_user.id
+    )
+    
+    return job.to_dict()
+
+@router.get("/rules/impact/{job_id}", response_model=JobResponse)
+def get_rule_impact(
+    job_id: str,
+    current_user: User = Depends(get_current_active_user)
+) -> Any:
+    """
+    Get the status and results of a rule impact analysis.
+    """
+    return get_impact_job_or_404(job_id, current_user).to_dict()
+
+@router.delete("/rules/impact/{job_id}", response_model=JobResponse)
+def cancel_rule_impact(
+    job_id: str,
+    current_user: User = Depends(get_current_active_user)
+) -> Any:
+    """
+    Cancel a queued or running rule impact analysis.
+    """
+    job = get_impact_job_or_404(job_id, current_user)
+    job.cancel()
+    
+    return job.to_dict()
+
 @router.put("/rules/{rule_id}", response_model=ValidationRuleResponse)
 def update_validation_rule(
     rule_id: int,
@@ -108,6 +271,7 @@ def update_validation_rule(
     Update validation rule.
     
     - Only analysts and admins can update validation rules
+    - Every update increments the rule version
     """
     # Check permissions
     if not check_permissions("analyst", current_user):
@@ -128,9 +292,18 @@ def update_validation_rule(
     # Update validation rule
     update_data = rule_in.dict(exclude_unset=True)
     
+    if update_data.get("rule_definition"):
+        check_rule_definition(update_data["rule_definition"])
+    
     for field, value in update_data.items():
         setattr(rule, field, value)
     
+    # New version, so memoized outcomes of the old definition are no longer used
+    if update_data:
+        rule.version = (rule.version or 1) + 1
+        db.flush()
+        prune_memo(db, [rule.id])
+    
     db.commit()
     db.refresh(rule)
     
@@ -181,9 +354,53 @@ def get_validation_results(
     
     return results
 
+@router.put("/results/{result_id}/status", response_model=ValidationResultResponse)
+def update_validation_result_status(
+    result_id: int,
+    status_in: ValidationResultStatusUpdate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+) -> Any:
+    """
+    Resolve, waive or reopen a validation result.
+    
+    - Only analysts and admins can change result status
+    - The submission's validation summary and data quality cube cells are updated in the same transaction
+    """
+    # Check permissions
+    if not check_permissions("analyst", current_user):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    
+    # Get result
+    result = db.query(ValidationResult).filter(ValidationResult.id == result_id).first()
+    
+    if not result:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Validation result with ID {result_id} not found"
+        )
+    
+    # Update status
+    result.status = status_in.status
+    result.resolved_at = datetime.now() if status_in.status == "resolved" else None
+    
+    refresh_summaries(db, [result.submission_id])
+    refresh_quality_cube(db, [result.submission_id])
+    invalidate_reports(db, [result.submission_id])
+    db.commit()
+    db.refresh(result)
+    
+    return result
+
 @router.post("/execute/{submission_id}", status_code=status.HTTP_202_ACCEPTED)
 def execute_validation(
     submission_id: int,
+    fail_fast: bool = Query(False, description="Stop at the first error-severity finding"),
+    max_errors: Optional[int] = Query(None, ge=1, description="Stop after this many findings"),
+    errors_only: bool = Query(False, description="Skip warning-severity rules"),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ) -> Any:
@@ -192,6 +409,7 @@ def execute_validation(
     
     - External users can only validate their own institution's submissions
     - Analysts and admins can validate any submission
+    - fail_fast, max_errors and errors_only run a quicker preview validation
     """
     # Get submission
     submission = db.query(DataSubmission).filter(DataSubmission.id == submission_id).first()
@@ -209,21 +427,94 @@ def execute_validation(
             detail="Not enough permissions"
         )
     
-    # Update submission status
-    submission.validation_status = "in_progress"
-    db.commit()
-    
-    # In a real implementation, this would trigger an asynchronous validation process
-    # For now, we'll just update the status
-    submission.validation_status = "passed"  # This would be determined by the validation process
-    db.commit()
+    # Queue a background validation run
+    options = RunOptions(fail_fast=fail_fast, max_errors=max_errors, errors_only=errors_only)
+    run = start_validation_run(db, submission, current_user, options)
     
     return {
         "detail": "Validation execution triggered successfully",
+        "run_id": run.id,
         "status": submission.status,
         "validation_status": submission.validation_status
     }
 
+@router.get("/runs/{run_id}", response_model=ValidationRunResponse)
+def get_validation_run(
+    run_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+) -> Any:
+    """
+    Get the progress of a validation run.
+    
+    - External users can only see runs for their own institution's submissions
+    - Analysts and admins can see any run
+    """
+    return get_run_or_404(db, run_id, current_user)
+
+@router.get("/runs/{run_id}/events")
+def stream_validation_run_events(
+    run_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+) -> Any:
+    """
+    Stream the progress of a validation run as Server-Sent Events.
+    
+    - A `progress` event is sent whenever rules evaluated or findings change
+    - A final `done` event is sent when the run completes or fails
+    """
+    get_run_or_404(db, run_id, current_user)
+    
+    return StreamingResponse(
+        stream_run_events(run_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.post("/execute-batch", status_code=status.HTTP_202_ACCEPTED)
+def execute_batch_validation(
+    batch_in: ValidationBatchRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+) -> Any:
+    """
+    Execute validation rules for many submissions in parallel.
+    
+    - Only analysts and admins can run batch validation
+    - Each submission gets a validation run whose progress can be polled or streamed
+    """
+    # Check permissions
+    if not check_permissions("analyst", current_user):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not enough permissions"
+        )
+    
+    # Get submissions
+    submission_ids = list(dict.fromkeys(batch_in.submission_ids))
+    submissions = db.query(DataSubmission).filter(DataSubmission.id.in_(submission_ids)).all()
+    
+    missing = set(submission_ids) - {submission.id for submission in submissions}
+    if missing:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Submissions with IDs {sorted(missing)} not found"
+        )
+    
+    # Queue the submissions as one background batch across the process pool
+    options = RunOptions(
+        fail_fast=batch_in.fail_fast,
+        max_errors=batch_in.max_errors,
+        errors_only=batch_in.errors_only
+    )
+    runs = start_batch_validation_run(db, submissions, current_user, options, batch_in.max_workers)
+    
+    return {
+        "detail": "Batch validation triggered successfully",
+        "run_ids": [run.id for run in runs]
+    }
+
 
 
 
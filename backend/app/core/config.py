@@ -27,6 +27,29 @@ class Settings(BaseModel):
     MAX_UPLOAD_SIZE: int = 100 * 1024 * 1024  # 100 MB
     ALLOWED_EXTENSIONS: List[str] = ["csv", "xlsx", "xls", "xml", "json"]
     
+    # Validation settings
+    VALIDATION_WORKERS: int = int(os.getenv("VALIDATION_WORKERS", os.cpu_count() or 1))
+    VALIDATION_MAX_WORKERS: int = int(os.getenv("VALIDATION_MAX_WORKERS", os.cpu_count() or 1))  # Most a batch may request
+    VALIDATION_SHARD_SIZE: int = int(os.getenv("VALIDATION_SHARD_SIZE", 50))
+    VALIDATION_JOB_WORKERS: int = int(os.getenv("VALIDATION_JOB_WORKERS", 4))
+    VALIDATION_PROGRESS_INTERVAL: float = float(os.getenv("VALIDATION_PROGRESS_INTERVAL", 0.5))
+    ANALYSIS_JOB_WORKERS: int = int(os.getenv("ANALYSIS_JOB_WORKERS", 1))
+    RULE_STATS_FLUSH_INTERVAL: float = float(os.getenv("RULE_STATS_FLUSH_INTERVAL", 60))
+    
+    # Report settings
+    REPORT_BATCH_SIZE: int = int(os.getenv("REPORT_BATCH_SIZE", 1000))  # Rows fetched per round trip
+    REPORT_CHUNK_SIZE: int = int(os.getenv("REPORT_CHUNK_SIZE", 64 * 1024))  # Characters per streamed chunk
+    REPORT_CACHE_DIR: str = os.getenv("REPORT_CACHE_DIR", "./report_cache")
+    REPORT_CACHE_MAX_BYTES: int = int(os.getenv("REPORT_CACHE_MAX_BYTES", 1024 * 1024 * 1024))  # 1 GB
+    EXPORT_JOB_WORKERS: int = int(os.getenv("EXPORT_JOB_WORKERS", 2))
+    EXPORT_DIR: str = os.getenv("EXPORT_DIR", "./exports")
+    EXPORT_RETENTION_HOURS: float = float(os.getenv("EXPORT_RETENTION_HOURS", 24))
+    EXPORT_PROGRESS_INTERVAL: float = float(os.getenv("EXPORT_PROGRESS_INTERVAL", 1.0))  # Seconds between progress updates
+    PARQUET_ROW_GROUP_SIZE: int = int(os.getenv("PARQUET_ROW_GROUP_SIZE", 64 * 1024))  # Rows per Parquet row group
+    
+    # Analytics settings
+    ANALYTICS_JOB_WORKERS: int = int(os.getenv("ANALYTICS_JOB_WORKERS", 1))  # Background peer statistic and rollup refreshes
+    
     # CORS settings
     CORS_ORIGINS: List[str] = ["*"]  # In production, restrict to specific origins
     
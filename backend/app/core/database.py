@@ -1,6 +1,11 @@
 
 
-from sqlalchemy import create_engine
+import os
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, event, inspect
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, Session
 
@@ -9,12 +14,24 @@ from ..models.base import Base
 # SQLite database URL
 SQLALCHEMY_DATABASE_URL = "sqlite:///./frb_data_collection.db"
 
+# Alembic migrations, which alter tables that already exist
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "migrations")
+
+# Revision of databases created before migrations were introduced
+BASELINE_REVISION = "0001"
+
 # Create SQLite engine
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL, 
     connect_args={"check_same_thread": False}  # Needed for SQLite
 )
 
+@event.listens_for(engine, "connect")
+def _enable_wal(dbapi_connection, connection_record):
+    # Readers don't block writers in WAL mode, so background jobs can record
+    # their progress while a report streams rows from another connection
+    dbapi_connection.execute("PRAGMA journal_mode=WAL")
+
 # Create SessionLocal class
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
@@ -29,7 +46,29 @@ def get_db():
     finally:
         db.close()
 
-def init_db():
-    """Initialize the database by creating all tables."""
-    Base.metadata.create_all(bind=engine)
+def init_db(bind: Engine = engine):
+    """
+    Initialize the database, bringing an existing one up to date.
+
+    A new database gets every table from the models and is stamped with the
+    latest migration. An existing database is upgraded by the migrations,
+    which add columns and indexes to tables it already has, and then gets
+    any tables it is missing. Databases created before migrations were
+    introduced are stamped with the baseline revision first.
+    """
+    with bind.begin() as connection:
+        config = Config()
+        config.set_main_option("script_location", MIGRATIONS_DIR)
+        config.attributes["connection"] = connection
+        
+        inspector = inspect(connection)
+        if not inspector.get_table_names():
+            Base.metadata.create_all(bind=connection)
+            command.stamp(config, "head")
+            return
+        
+        if not inspector.has_table("alembic_version"):
+            command.stamp(config, BASELINE_REVISION)
+        command.upgrade(config, "head")
+        Base.metadata.create_all(bind=connection)
 
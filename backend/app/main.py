@@ -8,7 +8,11 @@ from fastapi.staticfiles import StaticFiles
 
 from .api.v1 import api_router
 from .core.config import settings
-from .core.database import init_db
+from .core.database import SessionLocal, init_db
+from .services.validation_runs import fail_interrupted_runs, validation_queue
+from .services.rule_impact import analysis_queue
+from .services.report_exports import export_queue, fail_interrupted_exports
+from .services.peer_analytics import analytics_queue
 
 # Create FastAPI app
 app = FastAPI(
@@ -34,10 +38,25 @@ os.makedirs(settings.UPLOAD_DIR, exist_ok=True)
 # Mount static files
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
-# Initialize database on startup
+# Initialize database on startup and fail the runs and exports a previous server left unfinished
 @app.on_event("startup")
 def startup_event():
     init_db()
+    
+    db = SessionLocal()
+    try:
+        fail_interrupted_runs(db)
+        fail_interrupted_exports(db)
+    finally:
+        db.close()
+
+# Stop background job workers on shutdown
+@app.on_event("shutdown")
+def shutdown_event():
+    validation_queue.shutdown()
+    analysis_queue.shutdown()
+    export_queue.shutdown()
+    analytics_queue.shutdown()
 
 # Root endpoint
 @app.get("/")
@@ -6,7 +6,16 @@ from .report_series import ReportSeries
 from .data_submission import DataSubmission
 from .submitted_data import SubmittedData
 from .validation_rule import ValidationRule
+from .validation_message_template import ValidationMessageTemplate
 from .validation_result import ValidationResult
+from .validation_run import ValidationRun
+from .report_export import ReportExport
+from .validation_rule_stats import ValidationRuleStats
+from .validation_summary import ValidationSummary
+from .validation_result_memo import ValidationResultMemo
+from .peer_group_statistic import PeerGroupStatistic
+from .period_rollup import PeriodRollup
+from .data_quality_cell import DataQualityCell
 from .user import User
 
 __all__ = [
@@ -19,6 +28,15 @@ __all__ = [
     'DataSubmission',
     'SubmittedData',
     'ValidationRule',
+    'ValidationMessageTemplate',
     'ValidationResult',
+    'ValidationRun',
+    'ReportExport',
+    'ValidationRuleStats',
+    'ValidationSummary',
+    'ValidationResultMemo',
+    'PeerGroupStatistic',
+    'PeriodRollup',
+    'DataQualityCell',
     'User',
 ]
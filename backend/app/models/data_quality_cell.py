@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, Date, ForeignKey, UniqueConstraint
+from .base import BaseModel
+
+class DataQualityCell(BaseModel):
+    """Model for the materialized validation result counts of a rule for one institution's period."""
+    __tablename__ = "data_quality_cube"
+    __table_args__ = (
+        UniqueConstraint("institution_id", "report_series_id", "reporting_date", "rule_id",
+                         name="uq_data_quality_cube_period_rule"),
+    )
+    
+    rule_id = Column(Integer, ForeignKey("validation_rules.id"), nullable=False, index=True)
+    institution_id = Column(Integer, ForeignKey("institutions.id"), nullable=False)
+    report_series_id = Column(Integer, ForeignKey("report_series.id"), nullable=False)
+    reporting_date = Column(Date, nullable=False, index=True)
+    open_errors = Column(Integer, default=0, nullable=False)
+    open_warnings = Column(Integer, default=0, nullable=False)
+    resolved_errors = Column(Integer, default=0, nullable=False)
+    resolved_warnings = Column(Integer, default=0, nullable=False)
+    waived_errors = Column(Integer, default=0, nullable=False)
+    waived_warnings = Column(Integer, default=0, nullable=False)
+    
+    def __repr__(self):
+        return f"<DataQualityCell(rule_id={self.rule_id}, institution_id={self.institution_id}, reporting_date='{self.reporting_date}')>"
@@ -1,12 +1,16 @@
 
 
-from sqlalchemy import Column, String, Integer, Date, DateTime, ForeignKey, Enum
+from sqlalchemy import Column, String, Integer, Date, DateTime, ForeignKey, Enum, Index
 from sqlalchemy.orm import relationship
 from .base import BaseModel
 
 class DataSubmission(BaseModel):
     """Model for tracking data submissions from financial institutions."""
     __tablename__ = "data_submissions"
+    __table_args__ = (
+        # Resolves an institution's filings for a series by period (prior-period and cross-series counterpart lookups)
+        Index("ix_data_submissions_institution_series_date", "institution_id", "report_series_id", "reporting_date"),
+    )
     
     institution_id = Column(Integer, ForeignKey("institutions.id"), nullable=False, index=True)
     report_series_id = Column(Integer, ForeignKey("report_series.id"), nullable=False, index=True)
@@ -15,6 +19,7 @@ class DataSubmission(BaseModel):
     file_path = Column(String(255), nullable=False)
     status = Column(Enum('draft', 'submitted', 'validated', 'accepted', 'rejected', name='submission_status'), default='draft')
     validation_status = Column(Enum('pending', 'in_progress', 'passed', 'failed', 'warning', name='validation_status'), default='pending')
+    data_version = Column(Integer, default=1, nullable=False)  # Incremented when values or validation results change
     
     # Relationships
     institution = relationship("Institution", backref="submissions")
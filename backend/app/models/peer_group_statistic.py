@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey, UniqueConstraint
+from .base import BaseModel
+
+class PeerGroupStatistic(BaseModel):
+    """Model for the precomputed distribution of an MDRM item across a peer group of institutions."""
+    __tablename__ = "peer_group_statistics"
+    __table_args__ = (
+        # Also serves lookups of a period's statistics
+        UniqueConstraint("report_series_id", "reporting_date", "institution_type", "mdrm_identifier",
+                         name="uq_peer_group_statistics_period_type_item"),
+    )
+    
+    report_series_id = Column(Integer, ForeignKey("report_series.id"), nullable=False)
+    reporting_date = Column(Date, nullable=False)
+    institution_type = Column(String(50), nullable=False)
+    mdrm_identifier = Column(String(20), nullable=False)
+    institution_count = Column(Integer, nullable=False)
+    mean = Column(Float, nullable=False)
+    std = Column(Float)  # Sample standard deviation; null for a single institution
+    min_value = Column(Float, nullable=False)
+    p10 = Column(Float, nullable=False)
+    p25 = Column(Float, nullable=False)
+    median = Column(Float, nullable=False)
+    p75 = Column(Float, nullable=False)
+    p90 = Column(Float, nullable=False)
+    max_value = Column(Float, nullable=False)
+    
+    def __repr__(self):
+        return f"<PeerGroupStatistic(reporting_date='{self.reporting_date}', institution_type='{self.institution_type}', mdrm_identifier='{self.mdrm_identifier}')>"
@@ -0,0 +1,23 @@
+from sqlalchemy import Column, Integer, String, Float, Date, ForeignKey, UniqueConstraint
+from .base import BaseModel
+
+class PeriodRollup(BaseModel):
+    """Model for the materialized totals of an MDRM item across the accepted filings of a period."""
+    __tablename__ = "period_rollups"
+    __table_args__ = (
+        # Also serves lookups of a period's rollups
+        UniqueConstraint("report_series_id", "reporting_date", "mdrm_identifier", "institution_type",
+                         name="uq_period_rollups_period_item_type"),
+    )
+    
+    report_series_id = Column(Integer, ForeignKey("report_series.id"), nullable=False)
+    reporting_date = Column(Date, nullable=False)
+    mdrm_identifier = Column(String(20), nullable=False)
+    institution_type = Column(String(50), nullable=False)
+    total = Column(Float, nullable=False)
+    value_count = Column(Integer, nullable=False)
+    min_value = Column(Float, nullable=False)
+    max_value = Column(Float, nullable=False)
+    
+    def __repr__(self):
+        return f"<PeriodRollup(reporting_date='{self.reporting_date}', mdrm_identifier='{self.mdrm_identifier}', institution_type='{self.institution_type}')>"
@@ -0,0 +1,37 @@
+from datetime import datetime
+
+from sqlalchemy import Column, Integer, Boolean, String, Text, ForeignKey, DateTime, Enum
+from .base import BaseModel
+
+class ReportExport(BaseModel):
+    """Model for tracking background report exports and their progress."""
+    __tablename__ = "report_exports"
+    
+    owner_id = Column(Integer, ForeignKey("users.id"), index=True)
+    report_type = Column(String(20), nullable=False)
+    format = Column(String(20), nullable=False)
+    parameters = Column(Text, nullable=False)  # JSON parameters of the report
+    status = Column(Enum('queued', 'running', 'completed', 'failed', 'cancelled', name='report_export_status'), default='queued')
+    cancel_requested = Column(Boolean, default=False, nullable=False)
+    rows_written = Column(Integer, default=0, nullable=False)
+    filename = Column(String(255))
+    media_type = Column(String(100))
+    size_bytes = Column(Integer)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+    error_detail = Column(Text)
+    
+    @property
+    def finished(self) -> bool:
+        return self.status in ("completed", "failed", "cancelled")
+    
+    @property
+    def elapsed_seconds(self) -> float:
+        """Seconds since the export started, or its total duration once finished."""
+        if not self.started_at:
+            return 0.0
+        end = self.finished_at or datetime.now()
+        return round((end - self.started_at).total_seconds(), 3)
+    
+    def __repr__(self):
+        return f"<ReportExport(id={self.id}, report_type='{self.report_type}', status='{self.status}')>"
@@ -0,0 +1,20 @@
+import json
+from typing import Any, Dict, Optional, Union
+
+from sqlalchemy import Column, Text
+from .base import BaseModel
+
+class ValidationMessageTemplate(BaseModel):
+    """Model for validation error message templates shared by many validation results."""
+    __tablename__ = "validation_message_templates"
+    
+    template = Column(Text, unique=True, nullable=False)  # str.format() template, e.g. "Rule: X > 0 ({values})"
+    
+    def render(self, params: Optional[Union[str, Dict[str, Any]]]) -> str:
+        """Render the message with a result's parameters (a dict or its JSON encoding)."""
+        if isinstance(params, str):
+            params = json.loads(params)
+        return self.template.format(**(params or {}))
+    
+    def __repr__(self):
+        return f"<ValidationMessageTemplate(id={self.id}, template='{self.template}')>"
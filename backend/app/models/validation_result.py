@@ -14,7 +14,10 @@ class ValidationResult(BaseModel):
     submission_id = Column(Integer, ForeignKey("data_submissions.id"), nullable=False, index=True)
     rule_id = Column(Integer, ForeignKey("validation_rules.id"), nullable=False)
     field_identifier = Column(String(20), nullable=False)  # MDRM identifier
-    error_message = Column(Text, nullable=False)
+    # Full message text of results written before message templates; empty for templated results
+    stored_message = Column("error_message", Text, nullable=False, default="")
+    message_template_id = Column(Integer, ForeignKey("validation_message_templates.id"), index=True)
+    message_params = Column(Text)  # JSON parameters for the message template
     severity = Column(Enum('warning', 'error', name='result_severity'), default='error')
     status = Column(Enum('open', 'resolved', 'waived', name='result_status'), default='open')
     resolved_at = Column(DateTime)
@@ -22,6 +25,14 @@ class ValidationResult(BaseModel):
     # Relationships
     submission = relationship("DataSubmission", backref="validation_results")
     rule = relationship("ValidationRule")
+    message_template = relationship("ValidationMessageTemplate", lazy="selectin")
+    
+    @property
+    def error_message(self) -> str:
+        """Error message, rendered from the message template when the result has one."""
+        if self.message_template is None:
+            return self.stored_message
+        return self.message_template.render(self.message_params)
     
     def __repr__(self):
         return f"<ValidationResult(id={self.id}, submission_id={self.submission_id}, field_identifier='{self.field_identifier}', severity='{self.severity}')>"
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, UniqueConstraint
+from .base import BaseModel
+
+class ValidationResultMemo(BaseModel):
+    """Model for memoized rule outcomes keyed by rule version and a hash of the rule's inputs."""
+    __tablename__ = "validation_result_memos"
+    __table_args__ = (
+        UniqueConstraint("rule_id", "rule_version", "input_hash", name="uq_validation_result_memos_key"),
+    )
+    
+    rule_id = Column(Integer, ForeignKey("validation_rules.id"), nullable=False)
+    rule_version = Column(Integer, nullable=False)
+    input_hash = Column(String(64), nullable=False)
+    finding = Column(Text)  # JSON-encoded finding, or NULL when the rule passed
+    
+    def __repr__(self):
+        return f"<ValidationResultMemo(rule_id={self.rule_id}, rule_version={self.rule_version}, input_hash='{self.input_hash}')>"
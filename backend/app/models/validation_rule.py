@@ -2,7 +2,7 @@
 
 
 
-from sqlalchemy import Column, String, Text, Date, Enum
+from sqlalchemy import Column, Integer, String, Text, Date, Enum
 from .base import BaseModel
 
 class ValidationRule(BaseModel):
@@ -24,6 +24,9 @@ class ValidationRule(BaseModel):
     severity = Column(Enum('warning', 'error', name='rule_severity'), default='error')
     effective_date = Column(Date, nullable=False)
     end_date = Column(Date)
+    version = Column(Integer, default=1, nullable=False)  # Incremented on every update
+    priority = Column(Integer, default=100, nullable=False)  # Lower priorities run first
+    rule_group = Column(String(50), index=True)  # Reporting label only; execution order comes from priority
     
     def __repr__(self):
         return f"<ValidationRule(id={self.id}, rule_name='{self.rule_name}', rule_type='{self.rule_type}')>"
@@ -0,0 +1,21 @@
+from sqlalchemy import Column, Integer, Float, ForeignKey, DateTime, Text
+from sqlalchemy.orm import relationship
+from .base import BaseModel
+
+class ValidationRuleStats(BaseModel):
+    """Model for per-rule execution statistics collected by the validation engine."""
+    __tablename__ = "validation_rule_stats"
+    
+    rule_id = Column(Integer, ForeignKey("validation_rules.id"), unique=True, nullable=False, index=True)
+    evaluation_count = Column(Integer, default=0, nullable=False)
+    fire_count = Column(Integer, default=0, nullable=False)
+    total_seconds = Column(Float, default=0.0, nullable=False)
+    p95_seconds = Column(Float, default=0.0, nullable=False)  # Over the most recent evaluations
+    recent_seconds = Column(Text)  # JSON list of the most recent evaluation timings
+    last_flushed_at = Column(DateTime)
+    
+    # Relationships
+    rule = relationship("ValidationRule")
+    
+    def __repr__(self):
+        return f"<ValidationRuleStats(rule_id={self.rule_id}, evaluation_count={self.evaluation_count})>"
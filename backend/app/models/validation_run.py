@@ -0,0 +1,46 @@
+import json
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import Column, Integer, Boolean, Text, ForeignKey, DateTime, Enum
+from sqlalchemy.orm import relationship
+from .base import BaseModel
+
+class ValidationRun(BaseModel):
+    """Model for tracking background validation runs and their progress."""
+    __tablename__ = "validation_runs"
+    
+    submission_id = Column(Integer, ForeignKey("data_submissions.id"), nullable=False, index=True)
+    triggered_by = Column(Integer, ForeignKey("users.id"))
+    status = Column(Enum('queued', 'running', 'completed', 'failed', name='validation_run_status'), default='queued')
+    fail_fast = Column(Boolean, default=False, nullable=False)
+    max_errors = Column(Integer)
+    errors_only = Column(Boolean, default=False, nullable=False)
+    stopped_early = Column(Boolean, default=False, nullable=False)
+    rules_total = Column(Integer, default=0, nullable=False)
+    rules_evaluated = Column(Integer, default=0, nullable=False)
+    errors_found = Column(Integer, default=0, nullable=False)
+    warnings_found = Column(Integer, default=0, nullable=False)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+    error_detail = Column(Text)
+    preview = Column(Text)  # JSON findings of a limited run, which are not stored as results
+    
+    # Relationships
+    submission = relationship("DataSubmission", backref="validation_runs")
+    
+    @property
+    def elapsed_seconds(self) -> float:
+        """Seconds since the run started, or its total duration once finished."""
+        if not self.started_at:
+            return 0.0
+        end = self.finished_at or datetime.now()
+        return round((end - self.started_at).total_seconds(), 3)
+    
+    @property
+    def preview_findings(self) -> Optional[List[Dict[str, Any]]]:
+        """Findings of a limited run; full runs store theirs as validation results."""
+        return json.loads(self.preview) if self.preview else None
+    
+    def __repr__(self):
+        return f"<ValidationRun(id={self.id}, submission_id={self.submission_id}, status='{self.status}')>"
@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Integer, ForeignKey
+from sqlalchemy.orm import relationship, backref
+from .base import BaseModel
+
+class ValidationSummary(BaseModel):
+    """Model for the materialized validation result counts of a data submission."""
+    __tablename__ = "validation_summaries"
+    
+    submission_id = Column(Integer, ForeignKey("data_submissions.id"), unique=True, nullable=False, index=True)
+    open_errors = Column(Integer, default=0, nullable=False)
+    open_warnings = Column(Integer, default=0, nullable=False)
+    resolved_errors = Column(Integer, default=0, nullable=False)
+    resolved_warnings = Column(Integer, default=0, nullable=False)
+    waived_errors = Column(Integer, default=0, nullable=False)
+    waived_warnings = Column(Integer, default=0, nullable=False)
+    
+    # Relationships
+    submission = relationship("DataSubmission", backref=backref("validation_summary", uselist=False))
+    
+    @property
+    def total_errors(self) -> int:
+        return self.open_errors + self.resolved_errors + self.waived_errors
+    
+    @property
+    def total_warnings(self) -> int:
+        return self.open_warnings + self.resolved_warnings + self.waived_warnings
+    
+    def __repr__(self):
+        return f"<ValidationSummary(submission_id={self.submission_id}, open_errors={self.open_errors}, open_warnings={self.open_warnings})>"
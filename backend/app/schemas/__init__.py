@@ -9,6 +9,12 @@ from .data_submission import DataSubmissionCreate, DataSubmissionUpdate, DataSub
 from .submitted_data import SubmittedDataCreate, SubmittedDataUpdate, SubmittedDataResponse
 from .validation_rule import ValidationRuleCreate, ValidationRuleUpdate, ValidationRuleResponse
 from .validation_result import ValidationResultCreate, ValidationResultUpdate, ValidationResultResponse
+from .validation_run import ValidationRunResponse
+from .validation_summary import ValidationSummaryResponse
+from .job import JobResponse
+from .report_export import ReportExportRequest, ReportExportResponse
+from .peer_analytics import PeerGroupStatisticResponse, PeriodAggregateResponse
+from .data_quality import DataQualityBreakdownResponse
 from .user import UserCreate, UserUpdate, UserResponse, Token, TokenData
 
 
@@ -0,0 +1,14 @@
+from pydantic import Field
+from typing import Optional
+from datetime import date
+
+from .validation_summary import ValidationSummaryResponse
+
+# Schema for the result counts and error rate of one slice of the data quality cube
+class DataQualityBreakdownResponse(ValidationSummaryResponse):
+    rule_id: Optional[int] = Field(None, description="Rule, when broken down by rule")
+    institution_id: Optional[int] = Field(None, description="Institution, when broken down by institution")
+    report_series_id: Optional[int] = Field(None, description="Report series, when broken down by series")
+    reporting_date: Optional[date] = Field(None, description="Reporting date, when broken down by period")
+    validated_submissions: int = Field(0, description="Validated submissions in the slice")
+    error_rate: Optional[float] = Field(None, description="Error findings per validated submission")
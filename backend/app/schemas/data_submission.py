@@ -14,6 +14,8 @@ from pydantic import BaseModel, Field
 from typing import Optional
 from datetime import datetime, date
 
+from .validation_summary import ValidationSummaryResponse
+
 # Base DataSubmission schema with common attributes
 class DataSubmissionBase(BaseModel):
     institution_id: int = Field(..., description="Institution ID")
@@ -41,6 +43,7 @@ class DataSubmissionUpdate(BaseModel):
 # Schema for data submission response
 class DataSubmissionResponse(DataSubmissionBase):
     id: int
+    validation_summary: Optional[ValidationSummaryResponse] = Field(None, description="Validation result counts")
     created_at: datetime
     updated_at: datetime
     
@@ -0,0 +1,15 @@
+from pydantic import BaseModel, Field
+from typing import Any, Dict, Optional
+from datetime import datetime
+
+# Schema for background job response
+class JobResponse(BaseModel):
+    job_id: str = Field(..., description="Job ID")
+    kind: str = Field(..., description="Job kind")
+    status: str = Field(..., description="Job status (queued, running, completed, failed, cancelled)")
+    progress: Dict[str, Any] = Field(default_factory=dict, description="Job progress")
+    result: Optional[Any] = Field(None, description="Job result, once completed")
+    error: Optional[str] = Field(None, description="Error message, if the job failed")
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
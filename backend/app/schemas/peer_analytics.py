@@ -0,0 +1,31 @@
+from pydantic import BaseModel, Field
+from typing import Optional
+
+# Schema for the distribution of an MDRM item across a peer group
+class PeerGroupStatisticResponse(BaseModel):
+    institution_type: str = Field(..., description="Peer group (institution type)")
+    mdrm_identifier: str = Field(..., description="MDRM identifier")
+    institution_count: int = Field(..., description="Institutions reporting a numeric value")
+    mean: float = Field(..., description="Mean value")
+    std: Optional[float] = Field(None, description="Sample standard deviation")
+    min_value: float = Field(..., description="Minimum value")
+    p10: float = Field(..., description="10th percentile")
+    p25: float = Field(..., description="25th percentile")
+    median: float = Field(..., description="Median value")
+    p75: float = Field(..., description="75th percentile")
+    p90: float = Field(..., description="90th percentile")
+    max_value: float = Field(..., description="Maximum value")
+    institution_value: Optional[float] = Field(None, description="Value of the institution being compared, if any")
+    
+    class Config:
+        from_attributes = True
+
+# Schema for the totals of an MDRM item across the accepted filings of a period
+class PeriodAggregateResponse(BaseModel):
+    mdrm_identifier: str = Field(..., description="MDRM identifier")
+    institution_type: Optional[str] = Field(None, description="Institution type, when totals are broken down by type")
+    total: float = Field(..., description="Sum of the reported values")
+    value_count: int = Field(..., description="Filings reporting a numeric value")
+    min_value: float = Field(..., description="Minimum value")
+    max_value: float = Field(..., description="Maximum value")
+    mean: float = Field(..., description="Mean value")
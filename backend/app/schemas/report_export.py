@@ -0,0 +1,35 @@
+from pydantic import BaseModel, Field
+from typing import Literal, Optional
+from datetime import date, datetime
+
+# Schema for requesting the export of a report as a background job
+class ReportExportRequest(BaseModel):
+    report_type: Literal["submission", "validation", "historical"] = Field(..., description="Report type")
+    format: Literal["csv", "excel", "pdf", "parquet"] = Field("csv", description="Export format")
+    submission_id: Optional[int] = Field(None, description="Submission ID, for submission and validation reports")
+    institution_id: Optional[int] = Field(None, description="Institution ID, for historical reports")
+    report_series_id: Optional[int] = Field(None, description="Report series ID, for historical reports")
+    start_date: Optional[date] = Field(None, description="Start date, for historical reports")
+    end_date: Optional[date] = Field(None, description="End date, for historical reports")
+    layout: Literal["long", "wide"] = Field("long", description="Row layout, for historical reports")
+
+# Schema for report export response
+class ReportExportResponse(BaseModel):
+    id: int
+    owner_id: Optional[int] = Field(None, description="ID of the user who requested the export")
+    report_type: str = Field(..., description="Report type")
+    format: str = Field(..., description="Export format")
+    status: str = Field(..., description="Export status (queued, running, completed, failed, cancelled)")
+    rows_written: int = Field(0, description="Number of rows written so far")
+    filename: Optional[str] = Field(None, description="Download name of the file, once completed")
+    media_type: Optional[str] = Field(None, description="Media type of the file, once completed")
+    size_bytes: Optional[int] = Field(None, description="Size of the file, once completed")
+    elapsed_seconds: float = Field(0.0, description="Elapsed export time in seconds")
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    error_detail: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+    
+    class Config:
+        from_attributes = True
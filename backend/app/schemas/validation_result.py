@@ -21,9 +21,11 @@
 
 
 from pydantic import BaseModel, Field
-from typing import Optional
+from typing import List, Literal, Optional
 from datetime import datetime
 
+from ..core.config import settings
+
 # Base ValidationResult schema with common attributes
 class ValidationResultBase(BaseModel):
     submission_id: int = Field(..., description="Data submission ID")
@@ -57,23 +59,17 @@ class ValidationResultResponse(ValidationResultBase):
     class Config:
         from_attributes = True
 
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
+# Schema for changing the status of a validation result
+class ValidationResultStatusUpdate(BaseModel):
+    status: Literal["open", "resolved", "waived"] = Field(..., description="New result status")
+
+# Schema for requesting validation of many submissions
+class ValidationBatchRequest(BaseModel):
+    submission_ids: List[int] = Field(..., description="Data submission IDs to validate")
+    max_workers: Optional[int] = Field(
+        None, ge=1, le=settings.VALIDATION_MAX_WORKERS,
+        description="Number of worker processes (defaults to server setting)"
+    )
+    fail_fast: bool = Field(False, description="Stop each submission at its first error-severity finding")
+    max_errors: Optional[int] = Field(None, ge=1, description="Stop each submission after this many findings")
+    errors_only: bool = Field(False, description="Skip warning-severity rules")
@@ -29,6 +29,8 @@ class ValidationRuleBase(BaseModel):
     severity: str = Field("error", description="Rule severity")
     effective_date: date = Field(..., description="Effective date")
     end_date: Optional[date] = Field(None, description="End date")
+    priority: int = Field(100, description="Execution priority; lower priorities run first")
+    rule_group: Optional[str] = Field(None, description="Rule group used to label and filter rules; does not affect execution")
 
 # Schema for creating a new validation rule
 class ValidationRuleCreate(ValidationRuleBase):
@@ -43,29 +45,25 @@ class ValidationRuleUpdate(BaseModel):
     severity: Optional[str] = None
     effective_date: Optional[date] = None
     end_date: Optional[date] = None
+    priority: Optional[int] = None
+    rule_group: Optional[str] = None
 
 # Schema for validation rule response
 class ValidationRuleResponse(ValidationRuleBase):
     id: int
+    version: int = Field(1, description="Rule version, incremented on every update")
     created_at: datetime
     updated_at: datetime
     
     class Config:
         from_attributes = True
 
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
+# Schema for a dry run of a candidate rule against historical submissions
+class RuleImpactRequest(BaseModel):
+    rule_type: str = Field(..., description="Rule type")
+    rule_definition: str = Field(..., description="Candidate rule definition")
+    severity: str = Field("error", description="Rule severity")
+    start_date: date = Field(..., description="Start of the reporting date window")
+    end_date: date = Field(..., description="End of the reporting date window")
+    report_series_id: Optional[int] = Field(None, description="Limit to a report series")
+    institution_id: Optional[int] = Field(None, description="Limit to an institution")
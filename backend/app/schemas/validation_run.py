@@ -0,0 +1,30 @@
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Optional
+from datetime import datetime
+
+# Schema for validation run response
+class ValidationRunResponse(BaseModel):
+    id: int
+    submission_id: int = Field(..., description="Data submission ID")
+    triggered_by: Optional[int] = Field(None, description="ID of the user who triggered the run")
+    status: str = Field(..., description="Run status")
+    fail_fast: bool = Field(False, description="Stop at the first error-severity finding")
+    max_errors: Optional[int] = Field(None, description="Stop after this many findings")
+    errors_only: bool = Field(False, description="Skip warning-severity rules")
+    stopped_early: bool = Field(False, description="Whether the run stopped before evaluating every rule")
+    rules_total: int = Field(0, description="Number of rules to evaluate")
+    rules_evaluated: int = Field(0, description="Number of rules evaluated so far")
+    errors_found: int = Field(0, description="Number of error findings so far")
+    warnings_found: int = Field(0, description="Number of warning findings so far")
+    elapsed_seconds: float = Field(0.0, description="Elapsed run time in seconds")
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    error_detail: Optional[str] = None
+    preview_findings: Optional[List[Dict[str, Any]]] = Field(
+        None, description="Findings of a limited run, which leaves the submission's results as they are"
+    )
+    created_at: datetime
+    updated_at: datetime
+    
+    class Config:
+        from_attributes = True
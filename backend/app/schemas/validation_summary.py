@@ -0,0 +1,15 @@
+from pydantic import BaseModel, Field
+
+# Schema for the validation result counts of a submission
+class ValidationSummaryResponse(BaseModel):
+    open_errors: int = Field(0, description="Open error findings")
+    open_warnings: int = Field(0, description="Open warning findings")
+    resolved_errors: int = Field(0, description="Resolved error findings")
+    resolved_warnings: int = Field(0, description="Resolved warning findings")
+    waived_errors: int = Field(0, description="Waived error findings")
+    waived_warnings: int = Field(0, description="Waived warning findings")
+    total_errors: int = Field(0, description="Error findings in any status")
+    total_warnings: int = Field(0, description="Warning findings in any status")
+    
+    class Config:
+        from_attributes = True
@@ -0,0 +1,108 @@
+from .validation_engine import (
+    CompiledRule,
+    ValidationEngine,
+    RuleCompilationError,
+    RunOptions,
+    validate_submission,
+)
+from .validation_executor import ValidationExecutor, preview_submissions, validate_submissions
+from .rule_pushdown import PushdownRule, run_pushdown_rules, split_pushdown_rules
+from .prior_period import PriorPeriodLookup
+from .cross_series import CounterpartLookup
+from .validation_results import replace_results
+from .validation_summaries import refresh_summaries
+from .result_memo import ResultMemo, load_memo, load_memos, prune_memo, save_memo
+from .messages import finding_message, template_ids
+from .jobs import Job, JobCancelled, JobQueue
+from .validation_runs import (
+    start_validation_run,
+    execute_validation_run,
+    start_batch_validation_run,
+    execute_batch_validation_run,
+    fail_interrupted_runs,
+    stream_run_events,
+)
+from .rule_impact import start_rule_impact_analysis
+from .rule_profiler import RuleProfiler, profiler, rule_stats_report
+from .mdrm_checks import MDRMCheckPlan, load_mdrm_check_plan
+from .reports import stream_csv
+from .report_cache import ReportCache, invalidate_reports
+from .report_exports import (
+    cancel_export,
+    execute_report_export,
+    export_queue,
+    fail_interrupted_exports,
+    start_report_export,
+    stream_export_events,
+)
+from .report_archive import stream_period_archive
+from .peer_analytics import (
+    analytics_queue,
+    get_peer_statistics,
+    rebuild_peer_statistics,
+    refresh_peer_statistics,
+    schedule_period_refresh,
+)
+from .period_rollups import period_aggregates, update_period_rollups, rebuild_period_rollups
+from .data_quality import quality_breakdown, refresh_quality_cube, rebuild_quality_cube
+
+__all__ = [
+    'CompiledRule',
+    'ValidationEngine',
+    'RuleCompilationError',
+    'RunOptions',
+    'validate_submission',
+    'ValidationExecutor',
+    'validate_submissions',
+    'preview_submissions',
+    'PushdownRule',
+    'run_pushdown_rules',
+    'split_pushdown_rules',
+    'PriorPeriodLookup',
+    'CounterpartLookup',
+    'replace_results',
+    'refresh_summaries',
+    'ResultMemo',
+    'load_memo',
+    'load_memos',
+    'prune_memo',
+    'save_memo',
+    'finding_message',
+    'template_ids',
+    'Job',
+    'JobCancelled',
+    'JobQueue',
+    'start_validation_run',
+    'execute_validation_run',
+    'start_batch_validation_run',
+    'execute_batch_validation_run',
+    'fail_interrupted_runs',
+    'stream_run_events',
+    'start_rule_impact_analysis',
+    'RuleProfiler',
+    'profiler',
+    'rule_stats_report',
+    'MDRMCheckPlan',
+    'load_mdrm_check_plan',
+    'stream_csv',
+    'ReportCache',
+    'invalidate_reports',
+    'export_queue',
+    'start_report_export',
+    'execute_report_export',
+    'cancel_export',
+    'fail_interrupted_exports',
+    'stream_export_events',
+    'stream_period_archive',
+    'get_peer_statistics',
+    'analytics_queue',
+    'schedule_period_refresh',
+    'refresh_peer_statistics',
+    'rebuild_peer_statistics',
+    'period_aggregates',
+    'update_period_rollups',
+    'rebuild_period_rollups',
+    'quality_breakdown',
+    'refresh_quality_cube',
+    'rebuild_quality_cube',
+]
@@ -0,0 +1,93 @@
+import re
+from datetime import date
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from ..models.data_submission import DataSubmission
+from ..models.report_series import ReportSeries
+from .submission_data import load_submission_values, parse_values
+
+# Submissions that can serve as the counterpart of a cross-series check
+COUNTERPART_STATUSES = ("submitted", "validated", "accepted")
+
+
+def series_key(series_code: str) -> str:
+    """Key used to reference a series in rule definitions, e.g. "FFIEC 031" -> "FFIEC031"."""
+    return re.sub(r"[^A-Za-z0-9]", "", series_code).upper()
+
+
+class CounterpartLookup:
+    """
+    Resolves counterpart values for cross-series validation rules.
+
+    The counterpart of a submission is the latest non-draft filing of another
+    series by the same institution for the same reporting date, found through
+    the institution/series/date index. Counterparts for a whole shard are
+    resolved with one query and their values loaded with another, and both
+    are cached on the lookup so a single instance can serve a whole batch.
+    """
+
+    def __init__(self, db: Session, series_keys: Iterable[str]):
+        self.db = db
+        by_key = {series_key(code): series_id for series_id, code in db.query(ReportSeries.id, ReportSeries.series_code)}
+        # Unknown series keys never resolve, so rules referencing them do not apply
+        self.series_ids = {key: by_key[key] for key in series_keys if key in by_key}
+        self._counterpart_ids: Dict[Tuple[int, int, date], Optional[int]] = {}
+        self._values: Dict[int, Dict[str, Any]] = {}
+
+    def prefetch(self, submissions: Iterable[Any]) -> None:
+        """Resolve and load the counterparts of many submissions at once."""
+        wanted = {
+            (submission.institution_id, series_id, submission.reporting_date)
+            for submission in submissions
+            for series_id in self.series_ids.values()
+            if series_id != submission.report_series_id
+        } - set(self._counterpart_ids)
+        if not wanted:
+            return
+
+        rows = self.db.query(
+            DataSubmission.id,
+            DataSubmission.institution_id,
+            DataSubmission.report_series_id,
+            DataSubmission.reporting_date
+        ).filter(
+            DataSubmission.institution_id.in_({key[0] for key in wanted}),
+            DataSubmission.report_series_id.in_({key[1] for key in wanted}),
+            DataSubmission.reporting_date.in_({key[2] for key in wanted}),
+            DataSubmission.status.in_(COUNTERPART_STATUSES)
+        ).order_by(DataSubmission.submission_date)
+
+        # Ordered by submission date, so the latest filing wins
+        found = {(row.institution_id, row.report_series_id, row.reporting_date): row.id for row in rows}
+        for key in wanted:
+            self._counterpart_ids[key] = found.get(key)
+
+        missing = {
+            counterpart_id for counterpart_id in self._counterpart_ids.values()
+            if counterpart_id is not None and counterpart_id not in self._values
+        }
+        if missing:
+            for counterpart_id, raw_values in load_submission_values(self.db, list(missing)).items():
+                self._values[counterpart_id] = parse_values(raw_values)
+
+    def values_for(self, submission: Any) -> Optional[Dict[str, Dict[str, Any]]]:
+        """
+        Get the parsed counterpart values for a submission by series key.
+
+        Returns None when no counterpart has been filed.
+        """
+        self.prefetch([submission])
+
+        counterparts = {}
+        for key, series_id in self.series_ids.items():
+            if series_id == submission.report_series_id:
+                continue
+            counterpart_id = self._counterpart_ids.get(
+                (submission.institution_id, series_id, submission.reporting_date)
+            )
+            if counterpart_id is not None:
+                counterparts[key] = self._values[counterpart_id]
+
+        return counterparts or None
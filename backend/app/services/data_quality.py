@@ -0,0 +1,152 @@
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import delete, func, insert, tuple_
+from sqlalchemy.orm import Session
+
+from ..models.data_quality_cell import DataQualityCell
+from ..models.data_submission import DataSubmission
+from ..models.validation_result import ValidationResult
+from .validation_summaries import SUMMARY_COLUMNS
+
+# Cube dimensions results can be broken down by, and the column each one groups on
+QUALITY_DIMENSIONS = {
+    "rule": DataQualityCell.rule_id,
+    "institution": DataQualityCell.institution_id,
+    "series": DataQualityCell.report_series_id,
+    "period": DataQualityCell.reporting_date,
+}
+
+# Validation statuses of submissions whose results count towards error rates
+VALIDATED_STATUSES = ("passed", "failed", "warning")
+
+_PERIOD_COLUMNS = ("institution_id", "report_series_id", "reporting_date")
+
+
+def refresh_quality_cube(db: Session, submission_ids: Optional[Iterable[int]] = None) -> int:
+    """
+    Recompute the cube cells of the periods the given submissions belong to,
+    or the whole cube when no IDs are given.
+
+    A cell holds the result counts of one rule for one institution's filing
+    period. Counts come from one grouped query and the cells are rewritten
+    with one delete and one bulk insert. Nothing is committed, so callers
+    refresh the cube inside the transaction that changed the results.
+
+    Returns the number of cells written.
+    """
+    # Write pending result changes so the counts include them
+    db.flush()
+
+    stale = delete(DataQualityCell)
+    counts = db.query(
+        DataSubmission.institution_id,
+        DataSubmission.report_series_id,
+        DataSubmission.reporting_date,
+        ValidationResult.rule_id,
+        ValidationResult.status,
+        ValidationResult.severity,
+        func.count(ValidationResult.id)
+    ).join(
+        DataSubmission, DataSubmission.id == ValidationResult.submission_id
+    )
+
+    if submission_ids is not None:
+        periods = db.query(
+            DataSubmission.institution_id, DataSubmission.report_series_id, DataSubmission.reporting_date
+        ).filter(DataSubmission.id.in_(set(submission_ids))).distinct().all()
+        if not periods:
+            return 0
+        stale = stale.where(tuple_(*(getattr(DataQualityCell, column) for column in _PERIOD_COLUMNS)).in_(periods))
+        counts = counts.filter(tuple_(*(getattr(DataSubmission, column) for column in _PERIOD_COLUMNS)).in_(periods))
+
+    cells: Dict[tuple, Dict[str, Any]] = {}
+    for institution_id, series_id, reporting_date, rule_id, result_status, severity, count in counts.group_by(
+        DataSubmission.institution_id,
+        DataSubmission.report_series_id,
+        DataSubmission.reporting_date,
+        ValidationResult.rule_id,
+        ValidationResult.status,
+        ValidationResult.severity
+    ):
+        column = SUMMARY_COLUMNS.get((result_status, severity or "error"))
+        if not column:
+            continue
+        cell = cells.setdefault((institution_id, series_id, reporting_date, rule_id), {
+            "institution_id": institution_id,
+            "report_series_id": series_id,
+            "reporting_date": reporting_date,
+            "rule_id": rule_id,
+            **{summary_column: 0 for summary_column in SUMMARY_COLUMNS.values()},
+        })
+        cell[column] += count
+
+    db.execute(stale.execution_options(synchronize_session=False))
+    if cells:
+        db.execute(insert(DataQualityCell), list(cells.values()))
+
+    return len(cells)
+
+
+def rebuild_quality_cube(db: Session) -> Dict[str, int]:
+    """Recompute the whole cube from the stored validation results and commit."""
+    cells = refresh_quality_cube(db)
+    db.commit()
+    return {"cells": cells}
+
+
+def quality_breakdown(db: Session, dimension: str, rule_id: Optional[int] = None,
+                      institution_id: Optional[int] = None, report_series_id: Optional[int] = None,
+                      start_date: Optional[date] = None, end_date: Optional[date] = None) -> List[Dict[str, Any]]:
+    """
+    Result counts and error rates broken down by one cube dimension.
+
+    Drilling down is a matter of fixing one dimension and breaking down by
+    another, e.g. the rules that fail for one institution. Counts are
+    summed from the cube; the error rate is the number of errors per
+    validated submission in the slice, counted from data_submissions.
+    """
+    group_column = QUALITY_DIMENSIONS[dimension]
+    query = db.query(
+        group_column,
+        *(func.sum(getattr(DataQualityCell, column)).label(column) for column in SUMMARY_COLUMNS.values())
+    )
+    submissions = db.query(func.count(DataSubmission.id)).filter(
+        DataSubmission.validation_status.in_(VALIDATED_STATUSES)
+    )
+
+    if rule_id is not None:
+        query = query.filter(DataQualityCell.rule_id == rule_id)
+    for column, value in (("institution_id", institution_id), ("report_series_id", report_series_id)):
+        if value is not None:
+            query = query.filter(getattr(DataQualityCell, column) == value)
+            submissions = submissions.filter(getattr(DataSubmission, column) == value)
+    if start_date is not None:
+        query = query.filter(DataQualityCell.reporting_date >= start_date)
+        submissions = submissions.filter(DataSubmission.reporting_date >= start_date)
+    if end_date is not None:
+        query = query.filter(DataQualityCell.reporting_date <= end_date)
+        submissions = submissions.filter(DataSubmission.reporting_date <= end_date)
+
+    # Every rule is checked against every submission in the slice; other
+    # dimensions are also dimensions of the submissions themselves
+    if dimension == "rule":
+        total = submissions.scalar()
+        validated = None
+    else:
+        submission_column = getattr(DataSubmission, group_column.key)
+        validated = dict(submissions.with_entities(
+            submission_column, func.count(DataSubmission.id)
+        ).group_by(submission_column).all())
+
+    breakdown = []
+    for row in query.group_by(group_column).order_by(group_column):
+        item = row._asdict()
+        item["total_errors"] = item["open_errors"] + item["resolved_errors"] + item["waived_errors"]
+        item["total_warnings"] = item["open_warnings"] + item["resolved_warnings"] + item["waived_warnings"]
+        item["validated_submissions"] = total if validated is None else validated.get(item[group_column.key], 0)
+        item["error_rate"] = (
+            item["total_errors"] / item["validated_submissions"] if item["validated_submissions"] else None
+        )
+        breakdown.append(item)
+    return breakdown
@@ -0,0 +1,156 @@
+import threading
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+# Number of finished jobs kept per queue for status lookups
+JOB_HISTORY_SIZE = 500
+
+
+class JobCancelled(Exception):
+    """Raised inside a job when it has been cancelled."""
+
+
+class Job:
+    """In-memory record of a tracked background job."""
+
+    def __init__(self, kind: str, owner_id: Optional[int] = None):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.owner_id = owner_id
+        self.status = "queued"
+        self.progress: Dict[str, Any] = {}
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created_at = datetime.now()
+        self.started_at: Optional[datetime] = None
+        self.finished_at: Optional[datetime] = None
+        self._cancel = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("completed", "failed", "cancelled")
+
+    def cancel(self) -> None:
+        """Request cancellation; the job stops at its next check."""
+        self._cancel.set()
+
+    def check_cancelled(self) -> None:
+        """Raise JobCancelled if cancellation was requested."""
+        if self.cancelled:
+            raise JobCancelled()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "progress": self.progress,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobQueue:
+    """
+    Bounded thread pool for running work off the HTTP request threads.
+
+    Keeps simple counters so queue depth and throughput can be reported.
+    Jobs submitted with submit_job are tracked so their progress can be
+    polled and they can be cancelled.
+    """
+
+    def __init__(self, name: str, max_workers: int):
+        self.name = name
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+        self._lock = threading.Lock()
+        self._counts = {"queued": 0, "running": 0, "completed": 0, "failed": 0, "cancelled": 0}
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+
+    def submit(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Future:
+        """Queue a job for execution."""
+        self._count("queued", 1)
+        return self._executor.submit(self._run, fn, *args, **kwargs)
+
+    def _run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        self._count("queued", -1)
+        self._count("running", 1)
+        try:
+            result = fn(*args, **kwargs)
+        except JobCancelled:
+            self._count("cancelled", 1)
+            raise
+        except Exception:
+            self._count("failed", 1)
+            raise
+        else:
+            self._count("completed", 1)
+            return result
+        finally:
+            self._count("running", -1)
+
+    def submit_job(self, kind: str, fn: Callable[..., Any], *args: Any,
+                   owner_id: Optional[int] = None) -> Job:
+        """
+        Queue a tracked job. fn is called with the Job as its first argument
+        and its return value becomes the job's result.
+        """
+        job = Job(kind, owner_id=owner_id)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._trim_history()
+
+        self.submit(self._run_job, job, fn, *args)
+        return job
+
+    def _run_job(self, job: Job, fn: Callable[..., Any], *args: Any) -> None:
+        job.started_at = datetime.now()
+        job.status = "running"
+        try:
+            job.check_cancelled()
+            job.result = fn(job, *args)
+        except JobCancelled:
+            job.status = "cancelled"
+            raise
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+            raise
+        else:
+            job.status = "completed"
+        finally:
+            job.finished_at = datetime.now()
+
+    def _trim_history(self) -> None:
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - JOB_HISTORY_SIZE)]:
+            del self._jobs[job_id]
+
+    def get_job(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _count(self, key: str, delta: int) -> None:
+        with self._lock:
+            self._counts[key] += delta
+
+    def metrics(self) -> Dict[str, Any]:
+        """Get queue depth and job counters."""
+        with self._lock:
+            return dict(self._counts, name=self.name, max_workers=self.max_workers)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            for job in self._jobs.values():
+                job.cancel()
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,293 @@
+import math
+import re
+from datetime import date
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, List, Optional, Pattern, Tuple
+
+import pandas as pd
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from ..models.mdrm import MDRMItem
+from ..models.validation_rule import ValidationRule
+from .messages import escape_template
+from .range_checks import BoundRow, Interval
+
+# Definitions of the system rules that findings from metadata checks are recorded against;
+# they are not expressions, so the prefix keeps them out of the compiled rule set
+METADATA_PREFIX = "@mdrm:"
+DATA_TYPE_CHECK = METADATA_PREFIX + "data_type"
+VALID_VALUES_CHECK = METADATA_PREFIX + "valid_values"
+
+METADATA_RULES = {
+    DATA_TYPE_CHECK: {
+        "rule_name": "MDRM Data Type Check",
+        "rule_description": "Reported values must match the data type of their MDRM item",
+        "rule_type": "data_type",
+    },
+    VALID_VALUES_CHECK: {
+        "rule_name": "MDRM Valid Values Check",
+        "rule_description": "Reported values must match the valid values of their MDRM item",
+        "rule_type": "format",
+    },
+}
+
+NUMERIC_TYPES = {"numeric", "number", "integer", "int", "decimal", "float", "amount", "monetary", "currency", "percent", "percentage"}
+DATE_TYPES = {"date", "datetime"}
+
+_PATTERN_PREFIXES = ("regex:", "pattern:")
+_ENUMERATION = re.compile(r"^\s*[\w.-]+(\s*[,|]\s*[\w.-]+)+\s*$")
+
+_NUMBER = r"([-+]?[\d,]*\.?\d+)"
+_BETWEEN = re.compile(rf"^(?:between\s+)?{_NUMBER}\s*(?:-|to|and)\s*{_NUMBER}$", re.IGNORECASE)
+_BOUND = re.compile(rf"^(>=|<=|>|<)\s*{_NUMBER}$")
+_SIGNED = {
+    "positive": (0.0, False, math.inf, True),
+    "non-negative": (0.0, True, math.inf, True),
+    "nonnegative": (0.0, True, math.inf, True),
+    "negative": (-math.inf, True, 0.0, False),
+    "non-positive": (-math.inf, True, 0.0, True),
+}
+
+
+@lru_cache(maxsize=4096)
+def compile_pattern(pattern: str) -> Pattern:
+    """Compile a valid_values pattern once per process."""
+    return re.compile(pattern)
+
+
+def data_kind(data_type: Optional[str]) -> str:
+    """Normalize an MDRM data type to numeric, date or text."""
+    data_type = (data_type or "").strip().lower()
+    if data_type in NUMERIC_TYPES:
+        return "numeric"
+    if data_type in DATE_TYPES:
+        return "date"
+    return "text"
+
+
+def _parse_number(text: str) -> float:
+    return float(text.replace(",", ""))
+
+
+def parse_range(identifier: str, valid_values: Optional[str]) -> Optional[Interval]:
+    """
+    Parse a numeric range from MDRMItem.valid_values.
+
+    Understands "Positive number", "Non-negative", "0 - 100", "0 to 100",
+    "Between 0 and 100" and single bounds such as ">= 0".
+    """
+    text = (valid_values or "").strip()
+    words = text.lower().split()
+    if words and words[0] in _SIGNED and (len(words) == 1 or words[1] in ("number", "numbers", "value", "values")):
+        return Interval(identifier, *_SIGNED[words[0]])
+
+    match = _BETWEEN.match(text)
+    if match:
+        lower, upper = sorted(_parse_number(group) for group in match.groups())
+        return Interval(identifier, lower, True, upper, True)
+
+    match = _BOUND.match(text)
+    if match:
+        operator, value = match.group(1), _parse_number(match.group(2))
+        if operator.startswith(">"):
+            return Interval(identifier, lower=value, lower_inclusive=operator == ">=")
+        return Interval(identifier, upper=value, upper_inclusive=operator == "<=")
+
+    return None
+
+
+def parse_valid_values(valid_values: Optional[str]) -> Dict[str, Any]:
+    """
+    Parse the pattern or enumeration forms of MDRMItem.valid_values.
+
+    "regex:^[0-9]{9}$" gives a pattern and "Y, N" or "1|2|3" gives an
+    enumeration; anything else (free text, numeric ranges) gives neither.
+    Numeric ranges are parsed separately by parse_range.
+    """
+    text = (valid_values or "").strip()
+    for prefix in _PATTERN_PREFIXES:
+        if text.lower().startswith(prefix):
+            return {"pattern": text[len(prefix):].strip()}
+    if _BETWEEN.match(text):
+        return {}
+    if _ENUMERATION.match(text):
+        return {"enumeration": frozenset(v.strip() for v in re.split(r"[,|]", text))}
+    return {}
+
+
+class MDRMCheckPlan:
+    """
+    Type and valid-values checks derived from the MDRM dictionary.
+
+    Identifiers are grouped by kind, so every numeric value in a submission
+    is checked in one vectorized pass, every date value in another, and
+    values sharing a pattern or enumeration in one pass per distinct
+    pattern or enumeration. Numeric ranges are exposed as bound rows so the
+    engine can check them together with range rules. The plan holds only
+    plain data, so it can be shipped to worker processes; patterns are
+    compiled and cached there.
+    """
+
+    def __init__(self, items: List[Dict[str, Any]], rules: Dict[str, Dict[str, Any]]):
+        self.rules = rules
+        self.identifiers = [item["mdrm_identifier"] for item in items]
+        self.kinds = pd.Series([data_kind(item["data_type"]) for item in items], index=self.identifiers, dtype=object)
+        self.effective_dates = pd.Series([item["effective_date"] for item in items], index=self.identifiers, dtype=object)
+        self.end_dates = pd.Series([item["end_date"] for item in items], index=self.identifiers, dtype=object)
+
+        self.patterns: Dict[str, List[str]] = {}
+        self.enumerations: Dict[FrozenSet[str], List[str]] = {}
+        self.ranges: List[Tuple[Interval, Optional[date], Optional[date]]] = []
+        for item in items:
+            interval = parse_range(item["mdrm_identifier"], item["valid_values"])
+            if interval:
+                self.ranges.append((interval, item["effective_date"], item["end_date"]))
+                continue
+
+            parsed = parse_valid_values(item["valid_values"])
+            if "pattern" in parsed:
+                self.patterns.setdefault(parsed["pattern"], []).append(item["mdrm_identifier"])
+            elif "enumeration" in parsed:
+                self.enumerations.setdefault(parsed["enumeration"], []).append(item["mdrm_identifier"])
+
+    @property
+    def rule_ids(self) -> List[int]:
+        return [rule["rule_id"] for rule in self.rules.values()]
+
+    def bound_rows(self) -> List[BoundRow]:
+        """Rows for a BoundsTable holding the numeric ranges of the dictionary."""
+        severity = self.rules[VALID_VALUES_CHECK]["severity"]
+        return [
+            (interval, VALID_VALUES_CHECK, severity, effective_date, end_date)
+            for interval, effective_date, end_date in self.ranges
+        ]
+
+    def range_finding(self, interval: Interval, value: str) -> Dict[str, Any]:
+        """Finding for a value outside the numeric range of its MDRM item."""
+        return self._finding(
+            self.rules[VALID_VALUES_CHECK], "{identifier} value '{value}' is outside the valid range {range}",
+            interval.identifier, value=value, range=interval.describe()
+        )
+
+    def _effective(self, values: pd.Series, reporting_date: Optional[date]) -> pd.Series:
+        """Restrict values to identifiers with an MDRM item effective on the reporting date."""
+        values = values[values.index.isin(self.kinds.index) & (values.str.strip() != "")]
+        if reporting_date is None or values.empty:
+            return values
+
+        effective = self.effective_dates.reindex(values.index)
+        end = self.end_dates.reindex(values.index)
+        mask = ~(effective.notna() & (effective > reporting_date)) & ~(end.notna() & (end <= reporting_date))
+        return values[mask.to_numpy(dtype=bool)]
+
+    def evaluate(self, raw_values: Dict[str, str], reporting_date: Optional[date] = None,
+                 severities: Optional[set] = None) -> List[Dict[str, Any]]:
+        """Check a submission's values against the MDRM dictionary."""
+        if not raw_values or not self.identifiers:
+            return []
+
+        values = self._effective(pd.Series(raw_values, dtype=object).astype(str), reporting_date)
+        if values.empty:
+            return []
+
+        findings = []
+        type_rule = self.rules[DATA_TYPE_CHECK]
+        format_rule = self.rules[VALID_VALUES_CHECK]
+        kinds = self.kinds.reindex(values.index)
+
+        if severities is None or type_rule["severity"] in severities:
+            numeric = values[(kinds == "numeric").to_numpy()]
+            parsed = pd.to_numeric(numeric.str.replace(",", "", regex=False), errors="coerce")
+            for identifier, value in numeric[parsed.isna().to_numpy()].items():
+                findings.append(self._finding(type_rule, "{identifier} must be numeric (reported '{value}')", identifier, value=value))
+
+            dates = values[(kinds == "date").to_numpy()]
+            parsed = pd.to_datetime(dates, errors="coerce", format="ISO8601")
+            for identifier, value in dates[parsed.isna().to_numpy()].items():
+                findings.append(self._finding(type_rule, "{identifier} must be a date (reported '{value}')", identifier, value=value))
+
+        if severities is None or format_rule["severity"] in severities:
+            for pattern, identifiers in self.patterns.items():
+                subset = values[values.index.isin(identifiers)]
+                if subset.empty:
+                    continue
+                matched = subset.str.fullmatch(compile_pattern(pattern))
+                for identifier, value in subset[~matched.to_numpy(dtype=bool)].items():
+                    findings.append(self._finding(
+                        format_rule, "{identifier} value '{value}' does not match the required format", identifier, value=value
+                    ))
+
+            for enumeration, identifiers in self.enumerations.items():
+                subset = values[values.index.isin(identifiers)]
+                if subset.empty:
+                    continue
+                valid = subset.str.strip().isin(enumeration).to_numpy()
+                for identifier, value in subset[~valid].items():
+                    findings.append(self._finding(
+                        format_rule, "{identifier} value '{value}' is not one of {allowed}", identifier,
+                        value=value, allowed=", ".join(sorted(enumeration))
+                    ))
+
+        return findings
+
+    @staticmethod
+    def _finding(rule: Dict[str, Any], template: str, identifier: str, **params: Any) -> Dict[str, Any]:
+        return {
+            "rule_id": rule["rule_id"],
+            "field_identifier": identifier,
+            "message_template": f"{escape_template(rule['rule_name'])}: {template}",
+            "message_params": dict(params, identifier=identifier),
+            "severity": rule["severity"],
+        }
+
+
+def ensure_metadata_rules(db: Session) -> Dict[str, Dict[str, Any]]:
+    """Get or create the system rules that metadata check findings are recorded against."""
+    rules = {
+        rule.rule_definition: rule
+        for rule in db.query(ValidationRule).filter(ValidationRule.rule_definition.in_(list(METADATA_RULES)))
+    }
+
+    for definition, attributes in METADATA_RULES.items():
+        if definition not in rules:
+            rule = ValidationRule(
+                rule_definition=definition,
+                severity="error",
+                effective_date=date(2000, 1, 1),
+                **attributes
+            )
+            db.add(rule)
+            rules[definition] = rule
+
+    if db.new:
+        db.commit()
+
+    return {
+        definition: {"rule_id": rule.id, "rule_name": rule.rule_name, "severity": rule.severity or "error"}
+        for definition, rule in rules.items()
+    }
+
+
+# Plan cache keyed by the dictionary's size and last update
+_plan_cache: Dict[tuple, MDRMCheckPlan] = {}
+
+
+def load_mdrm_check_plan(db: Session) -> MDRMCheckPlan:
+    """Build (or reuse) the metadata check plan for the current MDRM dictionary."""
+    rules = ensure_metadata_rules(db)
+    signature = db.query(func.count(MDRMItem.id), func.max(MDRMItem.updated_at)).one()
+    key = (tuple(signature), tuple(sorted((d, tuple(sorted(r.items()))) for d, r in rules.items())))
+
+    if key not in _plan_cache:
+        items = db.query(
+            MDRMItem.mdrm_identifier,
+            MDRMItem.data_type,
+            MDRMItem.valid_values,
+            MDRMItem.effective_date,
+            MDRMItem.end_date
+        ).all()
+        _plan_cache.clear()
+        _plan_cache[key] = MDRMCheckPlan([item._asdict() for item in items], rules)
+
+    return _plan_cache[key]
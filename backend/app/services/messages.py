@@ -0,0 +1,46 @@
+from typing import Any, Dict, Iterable
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from ..models.validation_message_template import ValidationMessageTemplate
+
+
+def escape_template(text: str) -> str:
+    """Escape literal text (rule names, definitions) for use in a message template."""
+    return text.replace("{", "{{").replace("}", "}}")
+
+
+def finding_message(finding: Dict[str, Any]) -> str:
+    """Render the error message of a finding produced by the engine."""
+    return finding["message_template"].format(**finding["message_params"])
+
+
+def template_ids(db: Session, templates: Iterable[str]) -> Dict[str, int]:
+    """
+    Get the IDs of message templates, creating the ones that do not exist yet.
+
+    Uses one query for the existing templates and one bulk insert for new
+    ones. Nothing is committed, so templates are created in the same
+    transaction as the results that use them.
+    """
+    templates = set(templates)
+    if not templates:
+        return {}
+
+    def existing() -> Dict[str, int]:
+        return dict(db.query(ValidationMessageTemplate.template, ValidationMessageTemplate.id).filter(
+            ValidationMessageTemplate.template.in_(templates)
+        ))
+
+    ids = existing()
+    missing = templates - set(ids)
+    if missing:
+        # Another run may have created the same template in the meantime
+        db.execute(
+            insert(ValidationMessageTemplate).prefix_with("OR IGNORE", dialect="sqlite"),
+            [{"template": template} for template in missing]
+        )
+        ids = existing()
+
+    return ids
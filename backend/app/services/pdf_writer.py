@@ -0,0 +1,122 @@
+from typing import Any, BinaryIO, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# US Letter, landscape, in points
+PAGE_WIDTH = 792
+PAGE_HEIGHT = 612
+MARGIN = 36
+
+# Courier is one of the standard PDF fonts, so nothing needs to be embedded,
+# and being fixed-width it keeps table columns aligned
+FONT_SIZE = 7
+LEADING = 9
+CHAR_WIDTH = FONT_SIZE * 0.6
+LINE_CHARS = int((PAGE_WIDTH - 2 * MARGIN) / CHAR_WIDTH)
+PAGE_LINES = int((PAGE_HEIGHT - 2 * MARGIN) / LEADING) - 3  # Less the title and header lines
+
+_CATALOG, _PAGES, _FONT = 1, 2, 3
+
+
+def _escape(text: str) -> bytes:
+    text = text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+    return text.encode("latin-1", errors="replace")
+
+
+def _cell(value: Any, width: int) -> str:
+    text = "" if value is None else " ".join(str(value).split())
+    if len(text) > width:
+        text = text[:width - 3] + "..."
+    return text.ljust(width)
+
+
+def column_widths(columns: Sequence[str], widths: Optional[Dict[str, int]] = None) -> List[int]:
+    """
+    Character widths of a table's columns.
+
+    Columns without an explicit width share the space the others leave on
+    the line, but are never narrower than their header.
+    """
+    widths = widths or {}
+    fixed = sum(widths.get(column, 0) + 1 for column in columns)
+    flexible = [column for column in columns if column not in widths]
+    share = (LINE_CHARS - fixed) // len(flexible) - 1 if flexible else 0
+    return [widths.get(column, max(share, len(column))) for column in columns]
+
+
+class PDFTableWriter:
+    """
+    Writes rows as a plain-text table to a PDF, one page at a time.
+
+    Only the current page and the byte offsets of the objects written so
+    far are kept in memory, so a report of any length can be written. Long
+    cell values are truncated to their column's width.
+    """
+
+    def __init__(self, output: BinaryIO, title: str, columns: Sequence[str],
+                 widths: Optional[Dict[str, int]] = None):
+        self.output = output
+        self.title = title
+        self.widths = column_widths(columns, widths)
+        self.header = self._line(columns)
+        self.offsets: Dict[int, int] = {}
+        self.page_ids: List[int] = []
+        self.lines: List[str] = []
+        self.position = 0
+        self._write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    def _write(self, data: bytes) -> None:
+        self.output.write(data)
+        self.position += len(data)
+
+    def _object(self, object_id: int, body: bytes) -> None:
+        self.offsets[object_id] = self.position
+        self._write(b"%d 0 obj\n" % object_id + body + b"\nendobj\n")
+
+    def _line(self, values: Sequence[Any]) -> str:
+        return " ".join(_cell(value, width) for value, width in zip(values, self.widths)).rstrip()
+
+    def add_row(self, row: Sequence[Any]) -> None:
+        self.lines.append(self._line(row))
+        if len(self.lines) >= PAGE_LINES:
+            self._flush_page()
+
+    def _flush_page(self) -> None:
+        page_number = len(self.page_ids) + 1
+        lines = [f"{self.title} - page {page_number}", "", self.header] + self.lines
+        text = b"BT /F1 %d Tf %d TL %d %d Td\n" % (FONT_SIZE, LEADING, MARGIN, PAGE_HEIGHT - MARGIN - FONT_SIZE)
+        text += b"".join(b"(" + _escape(line) + b") '\n" for line in lines) + b"ET"
+
+        # Objects 1-3 are the catalog, page tree and font; pages follow in pairs
+        page_id = 4 + 2 * len(self.page_ids)
+        self._object(page_id + 1, b"<< /Length %d >>\nstream\n" % len(text) + text + b"\nendstream")
+        self._object(page_id, (
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %d %d] "
+            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>"
+        ) % (_PAGES, PAGE_WIDTH, PAGE_HEIGHT, _FONT, page_id + 1))
+        self.page_ids.append(page_id)
+        self.lines = []
+
+    def close(self) -> int:
+        """Finish the document; returns the number of pages written."""
+        if self.lines or not self.page_ids:
+            self._flush_page()
+
+        kids = b" ".join(b"%d 0 R" % page_id for page_id in self.page_ids)
+        self._object(_PAGES, b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(self.page_ids)))
+        self._object(_FONT, b"<< /Type /Font /Subtype /Type1 /BaseFont /Courier /Encoding /WinAnsiEncoding >>")
+        self._object(_CATALOG, b"<< /Type /Catalog /Pages %d 0 R >>" % _PAGES)
+
+        object_count = max(self.offsets) + 1
+        xref = self.position
+        entries = [b"0000000000 65535 f \n"] + [b"%010d 00000 n \n" % self.offsets[i] for i in range(1, object_count)]
+        self._write(b"xref\n0 %d\n" % object_count + b"".join(entries))
+        self._write(b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (object_count, _CATALOG, xref))
+        return len(self.page_ids)
+
+
+def write_pdf(title: str, columns: Sequence[str], rows: Iterable[Tuple[Any, ...]], output: BinaryIO,
+              widths: Optional[Dict[str, int]] = None) -> int:
+    """Write a report as a PDF table; returns the number of pages written."""
+    writer = PDFTableWriter(output, title, columns, widths)
+    for row in rows:
+        writer.add_row(row)
+    return writer.close()
@@ -0,0 +1,207 @@
+import threading
+from datetime import date
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+import pandas as pd
+from sqlalchemy import delete, insert
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..core.database import SessionLocal
+from ..models.data_submission import DataSubmission
+from ..models.institution import Institution
+from ..models.peer_group_statistic import PeerGroupStatistic
+from ..models.submitted_data import SubmittedData
+from .jobs import JobQueue
+
+# Only accepted filings count towards peer statistics
+PEER_SUBMISSION_STATUSES = ("accepted",)
+
+# Percentile columns and the quantile each one holds
+PERCENTILES = {"p10": 0.10, "p25": 0.25, "median": 0.50, "p75": 0.75, "p90": 0.90}
+
+# Worker pool recomputing period statistics off the request threads
+analytics_queue = JobQueue("analytics", settings.ANALYTICS_JOB_WORKERS)
+
+# Session factory used by background refreshes
+session_factory = SessionLocal
+
+# Refreshes queued and not yet started, by refresh function and period
+_scheduled = set()
+_scheduled_lock = threading.Lock()
+
+# Recomputes the statistics of one period: (db, report series ID, reporting date)
+PeriodRefresh = Callable[[Session, int, date], int]
+
+
+def numeric_values(values: pd.Series) -> pd.Series:
+    """Reported values as numbers, allowing thousands separators; other values become NaN."""
+    return pd.to_numeric(values.astype(str).str.replace(",", "", regex=False), errors="coerce")
+
+
+def load_peer_values(db: Session, report_series_id: int, reporting_date: date) -> pd.DataFrame:
+    """
+    Load the numeric values reported for a period, one filing per institution.
+
+    Returns a frame of institution_id, institution_type, mdrm_identifier and
+    value. Where an institution filed more than once, only its latest
+    accepted filing is used; values that are not numeric are left out.
+    """
+    rows = db.query(
+        DataSubmission.id,
+        DataSubmission.institution_id,
+        Institution.institution_type,
+        SubmittedData.mdrm_identifier,
+        SubmittedData.reported_value
+    ).join(
+        Institution, Institution.id == DataSubmission.institution_id
+    ).join(
+        SubmittedData, SubmittedData.submission_id == DataSubmission.id
+    ).filter(
+        DataSubmission.report_series_id == report_series_id,
+        DataSubmission.reporting_date == reporting_date,
+        DataSubmission.status.in_(PEER_SUBMISSION_STATUSES)
+    ).order_by(DataSubmission.submission_date, DataSubmission.id)
+
+    df = pd.DataFrame(
+        rows.all(), columns=["submission_id", "institution_id", "institution_type", "mdrm_identifier", "value"]
+    )
+    latest = df.groupby("institution_id")["submission_id"].transform("last")
+    df = df[df["submission_id"] == latest]
+    df["value"] = numeric_values(df["value"])
+    return df.dropna(subset=["value"]).drop(columns="submission_id")
+
+
+def compute_peer_statistics(values: pd.DataFrame) -> pd.DataFrame:
+    """Distribution of each item's values per institution type, with one grouped aggregation."""
+    if values.empty:
+        return pd.DataFrame()
+
+    grouped = values.groupby(["institution_type", "mdrm_identifier"])["value"]
+    stats = grouped.agg(
+        institution_count="count", mean="mean", std="std", min_value="min", max_value="max"
+    )
+    quantiles = grouped.quantile(list(PERCENTILES.values())).unstack()
+    quantiles.columns = list(PERCENTILES)
+    return stats.join(quantiles).reset_index()
+
+
+def refresh_peer_statistics(db: Session, report_series_id: int, reporting_date: date) -> int:
+    """
+    Recompute the peer statistics of one period.
+
+    The period's rows are rewritten with one delete and one bulk insert.
+    Nothing is committed, so callers refresh the statistics inside the
+    transaction that changed which filings are accepted.
+
+    Returns the number of statistics written.
+    """
+    db.flush()
+    stats = compute_peer_statistics(load_peer_values(db, report_series_id, reporting_date))
+
+    db.execute(
+        delete(PeerGroupStatistic).where(
+            PeerGroupStatistic.report_series_id == report_series_id,
+            PeerGroupStatistic.reporting_date == reporting_date
+        ).execution_options(synchronize_session=False)
+    )
+    if stats.empty:
+        return 0
+
+    stats["report_series_id"] = report_series_id
+    stats["reporting_date"] = reporting_date
+    # NaN (the deviation of a single value) is stored as null
+    rows = stats.astype(object).where(stats.notna(), None).to_dict("records")
+    db.execute(insert(PeerGroupStatistic), rows)
+    return len(rows)
+
+
+def schedule_period_refresh(refresh: PeriodRefresh, report_series_id: int, reporting_date: date) -> None:
+    """
+    Queue a background recompute of a period's statistics, e.g. refresh_peer_statistics.
+
+    Until it has run, reads are served the statistics already stored. A
+    refresh is queued once however many changes arrive before it starts,
+    so a burst of accepted filings costs one recompute of the period.
+    """
+    key = (refresh, report_series_id, reporting_date)
+    with _scheduled_lock:
+        if key in _scheduled:
+            return
+        _scheduled.add(key)
+
+    analytics_queue.submit(execute_period_refresh, refresh, report_series_id, reporting_date)
+
+
+def execute_period_refresh(refresh: PeriodRefresh, report_series_id: int, reporting_date: date) -> None:
+    """Run a queued refresh of a period's statistics and commit it."""
+    # Changes arriving from here on need a refresh of their own
+    with _scheduled_lock:
+        _scheduled.discard((refresh, report_series_id, reporting_date))
+
+    db = session_factory()
+    try:
+        refresh(db, report_series_id, reporting_date)
+        db.commit()
+    finally:
+        db.close()
+
+
+def rebuild_peer_statistics(db: Session, report_series_id: Optional[int] = None) -> Dict[str, int]:
+    """Recompute the peer statistics of every period with accepted filings and commit."""
+    query = db.query(DataSubmission.report_series_id, DataSubmission.reporting_date).filter(
+        DataSubmission.status.in_(PEER_SUBMISSION_STATUSES)
+    ).distinct()
+    if report_series_id is not None:
+        query = query.filter(DataSubmission.report_series_id == report_series_id)
+
+    periods = query.all()
+    statistics = sum(refresh_peer_statistics(db, series_id, reporting_date) for series_id, reporting_date in periods)
+    db.commit()
+    return {"periods": len(periods), "statistics": statistics}
+
+
+def get_peer_statistics(db: Session, report_series_id: int, reporting_date: date,
+                        mdrm_identifiers: Optional[Iterable[str]] = None,
+                        institution_type: Optional[str] = None) -> List[PeerGroupStatistic]:
+    """
+    Read a period's peer statistics from the precomputed table.
+
+    Statistics are never computed here. A period that has none yet, e.g.
+    one filed before statistics were kept, gets a background refresh
+    queued and has statistics on a later read.
+    """
+    period = db.query(PeerGroupStatistic).filter(
+        PeerGroupStatistic.report_series_id == report_series_id,
+        PeerGroupStatistic.reporting_date == reporting_date
+    )
+    if not db.query(period.exists()).scalar():
+        schedule_period_refresh(refresh_peer_statistics, report_series_id, reporting_date)
+        return []
+
+    if mdrm_identifiers:
+        period = period.filter(PeerGroupStatistic.mdrm_identifier.in_(list(mdrm_identifiers)))
+    if institution_type:
+        period = period.filter(PeerGroupStatistic.institution_type == institution_type)
+    return period.order_by(PeerGroupStatistic.institution_type, PeerGroupStatistic.mdrm_identifier).all()
+
+
+def institution_values(db: Session, institution_id: int, report_series_id: int, reporting_date: date,
+                       mdrm_identifiers: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    """Values of an institution's latest accepted filing for a period, for comparison with its peers."""
+    submission_id = db.query(DataSubmission.id).filter(
+        DataSubmission.institution_id == institution_id,
+        DataSubmission.report_series_id == report_series_id,
+        DataSubmission.reporting_date == reporting_date,
+        DataSubmission.status.in_(PEER_SUBMISSION_STATUSES)
+    ).order_by(DataSubmission.submission_date.desc(), DataSubmission.id.desc()).limit(1).scalar()
+    if submission_id is None:
+        return {}
+
+    rows = db.query(SubmittedData.mdrm_identifier, SubmittedData.reported_value).filter(
+        SubmittedData.submission_id == submission_id
+    )
+    if mdrm_identifiers:
+        rows = rows.filter(SubmittedData.mdrm_identifier.in_(list(mdrm_identifiers)))
+
+    return numeric_values(pd.Series(dict(rows.all()), dtype=object)).dropna().to_dict()
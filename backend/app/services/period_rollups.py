@@ -0,0 +1,189 @@
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional
+
+import pandas as pd
+from sqlalchemy import delete, func, insert, update
+from sqlalchemy.orm import Session
+
+from ..models.data_submission import DataSubmission
+from ..models.institution import Institution
+from ..models.period_rollup import PeriodRollup
+from ..models.submitted_data import SubmittedData
+from .peer_analytics import PEER_SUBMISSION_STATUSES, load_peer_values, numeric_values, schedule_period_refresh
+
+
+def refresh_period_rollups(db: Session, report_series_id: int, reporting_date: date,
+                           institution_type: Optional[str] = None) -> int:
+    """
+    Recompute the rollups of one period, or of one institution type within it.
+
+    Rollups cover the same filings as peer statistics: the latest accepted
+    filing of each institution. They are rewritten with one delete and one
+    bulk insert, and nothing is committed.
+
+    Returns the number of rollups written.
+    """
+    db.flush()
+    values = load_peer_values(db, report_series_id, reporting_date)
+    if institution_type is not None:
+        values = values[values["institution_type"] == institution_type]
+    rollups = values.groupby(["mdrm_identifier", "institution_type"])["value"].agg(
+        total="sum", value_count="count", min_value="min", max_value="max"
+    ).reset_index()
+
+    stale = delete(PeriodRollup).where(
+        PeriodRollup.report_series_id == report_series_id,
+        PeriodRollup.reporting_date == reporting_date
+    )
+    if institution_type is not None:
+        stale = stale.where(PeriodRollup.institution_type == institution_type)
+    db.execute(stale.execution_options(synchronize_session=False))
+    if rollups.empty:
+        return 0
+
+    rollups["report_series_id"] = report_series_id
+    rollups["reporting_date"] = reporting_date
+    rows = rollups.to_dict("records")
+    db.execute(insert(PeriodRollup), rows)
+    return len(rows)
+
+
+def add_to_period_rollups(db: Session, submission: DataSubmission) -> int:
+    """
+    Fold a newly accepted submission's values into its period's rollups.
+
+    Sums and counts are added to and minimums and maximums widened in
+    place, so accepting a filing touches only the rollups of its own
+    institution type, without reading any other filing. Nothing is committed.
+
+    Returns the number of rollups updated or created.
+    """
+    institution_type = db.query(Institution.institution_type).filter(
+        Institution.id == submission.institution_id
+    ).scalar()
+    rows = db.query(SubmittedData.mdrm_identifier, SubmittedData.reported_value).filter(
+        SubmittedData.submission_id == submission.id
+    )
+    values = numeric_values(pd.Series(dict(rows.all()), dtype=object)).dropna()
+
+    existing = {
+        rollup.mdrm_identifier: rollup for rollup in db.query(
+            PeriodRollup.id, PeriodRollup.mdrm_identifier, PeriodRollup.total,
+            PeriodRollup.value_count, PeriodRollup.min_value, PeriodRollup.max_value
+        ).filter(
+            PeriodRollup.report_series_id == submission.report_series_id,
+            PeriodRollup.reporting_date == submission.reporting_date,
+            PeriodRollup.institution_type == institution_type
+        )
+    }
+
+    updated, created = [], []
+    for mdrm_identifier, value in values.items():
+        rollup = existing.get(mdrm_identifier)
+        if rollup is None:
+            created.append({
+                "report_series_id": submission.report_series_id,
+                "reporting_date": submission.reporting_date,
+                "mdrm_identifier": mdrm_identifier,
+                "institution_type": institution_type,
+                "total": value,
+                "value_count": 1,
+                "min_value": value,
+                "max_value": value,
+            })
+        else:
+            updated.append({
+                "id": rollup.id,
+                "total": rollup.total + value,
+                "value_count": rollup.value_count + 1,
+                "min_value": min(rollup.min_value, value),
+                "max_value": max(rollup.max_value, value),
+            })
+
+    if updated:
+        db.execute(update(PeriodRollup), updated)
+    if created:
+        db.execute(insert(PeriodRollup), created)
+    return len(updated) + len(created)
+
+
+def update_period_rollups(db: Session, submission: DataSubmission, previous_status: str) -> None:
+    """
+    Bring a period's rollups up to date after a submission's status changed.
+
+    A first accepted filing is folded in incrementally. Withdrawing an
+    accepted filing, or accepting an amendment that replaces one, cannot be
+    undone from sums and extremes alone, so the rollups of the submission's
+    institution type are recomputed for the period instead.
+    """
+    if previous_status in PEER_SUBMISSION_STATUSES or submission.status not in PEER_SUBMISSION_STATUSES:
+        incremental = False
+    else:
+        incremental = not db.query(DataSubmission.id).filter(
+            DataSubmission.institution_id == submission.institution_id,
+            DataSubmission.report_series_id == submission.report_series_id,
+            DataSubmission.reporting_date == submission.reporting_date,
+            DataSubmission.status.in_(PEER_SUBMISSION_STATUSES),
+            DataSubmission.id != submission.id
+        ).first()
+
+    if incremental:
+        add_to_period_rollups(db, submission)
+    else:
+        institution_type = db.query(Institution.institution_type).filter(
+            Institution.id == submission.institution_id
+        ).scalar()
+        refresh_period_rollups(db, submission.report_series_id, submission.reporting_date, institution_type)
+
+
+def rebuild_period_rollups(db: Session, report_series_id: Optional[int] = None) -> Dict[str, int]:
+    """Recompute the rollups of every period with accepted filings and commit."""
+    query = db.query(DataSubmission.report_series_id, DataSubmission.reporting_date).filter(
+        DataSubmission.status.in_(PEER_SUBMISSION_STATUSES)
+    ).distinct()
+    if report_series_id is not None:
+        query = query.filter(DataSubmission.report_series_id == report_series_id)
+
+    periods = query.all()
+    rollups = sum(refresh_period_rollups(db, series_id, reporting_date) for series_id, reporting_date in periods)
+    db.commit()
+    return {"periods": len(periods), "rollups": rollups}
+
+
+def period_aggregates(db: Session, report_series_id: int, reporting_date: date,
+                      mdrm_identifiers: Optional[Iterable[str]] = None,
+                      by_institution_type: bool = False) -> List[Dict[str, Any]]:
+    """
+    Totals of MDRM items across all accepted filings of a period, read from the rollups.
+
+    Rollups are kept per institution type and combined here, unless
+    by_institution_type is set. As with peer statistics, a period that has
+    no rollups yet gets a background refresh queued rather than being
+    computed on the read.
+    """
+    period = (
+        PeriodRollup.report_series_id == report_series_id,
+        PeriodRollup.reporting_date == reporting_date
+    )
+    if not db.query(db.query(PeriodRollup).filter(*period).exists()).scalar():
+        schedule_period_refresh(refresh_period_rollups, report_series_id, reporting_date)
+        return []
+
+    group_by = [PeriodRollup.mdrm_identifier]
+    if by_institution_type:
+        group_by.append(PeriodRollup.institution_type)
+
+    query = db.query(
+        *group_by,
+        func.sum(PeriodRollup.total).label("total"),
+        func.sum(PeriodRollup.value_count).label("value_count"),
+        func.min(PeriodRollup.min_value).label("min_value"),
+        func.max(PeriodRollup.max_value).label("max_value")
+    ).filter(*period)
+    if mdrm_identifiers:
+        query = query.filter(PeriodRollup.mdrm_identifier.in_(list(mdrm_identifiers)))
+
+    return [
+        {**row._asdict(), "mean": row.total / row.value_count}
+        for row in query.group_by(*group_by).order_by(*group_by)
+    ]
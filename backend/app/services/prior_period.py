@@ -0,0 +1,61 @@
+from datetime import date
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from ..models.data_submission import DataSubmission
+from .submission_data import load_submission_values, parse_values
+
+
+class PriorPeriodLookup:
+    """
+    Resolves prior-period values for historical validation rules.
+
+    The previous accepted submission for an (institution, series) pair is
+    resolved with a single query against the institution/series/date index and
+    its values are loaded and parsed once. Results are cached on the lookup,
+    so a single instance can serve a whole period-close batch.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self._prior_ids: Dict[Tuple[int, int, date], Optional[int]] = {}
+        self._values: Dict[int, Dict[str, Any]] = {}
+
+    def prior_submission_id(self, institution_id: int, report_series_id: int,
+                            reporting_date: date) -> Optional[int]:
+        """Resolve the latest accepted submission before the reporting date."""
+        key = (institution_id, report_series_id, reporting_date)
+        if key not in self._prior_ids:
+            row = self.db.query(DataSubmission.id).filter(
+                DataSubmission.institution_id == institution_id,
+                DataSubmission.report_series_id == report_series_id,
+                DataSubmission.reporting_date < reporting_date,
+                DataSubmission.status == "accepted"
+            ).order_by(
+                DataSubmission.reporting_date.desc(),
+                DataSubmission.submission_date.desc()
+            ).first()
+            self._prior_ids[key] = row[0] if row else None
+
+        return self._prior_ids[key]
+
+    def values_for(self, submission: DataSubmission) -> Optional[Dict[str, Any]]:
+        """
+        Get the parsed prior-period values for a submission.
+
+        Returns None when the institution has no accepted prior submission.
+        """
+        prior_id = self.prior_submission_id(
+            submission.institution_id,
+            submission.report_series_id,
+            submission.reporting_date
+        )
+        if prior_id is None:
+            return None
+
+        if prior_id not in self._values:
+            raw_values = load_submission_values(self.db, [prior_id])[prior_id]
+            self._values[prior_id] = parse_values(raw_values)
+
+        return self._values[prior_id]
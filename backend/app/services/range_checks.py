@@ -0,0 +1,98 @@
+import math
+from datetime import date
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+class Interval(NamedTuple):
+    """Numeric bounds on the value of a single MDRM item."""
+    identifier: str
+    lower: float = -math.inf
+    lower_inclusive: bool = True
+    upper: float = math.inf
+    upper_inclusive: bool = True
+
+    def intersect(self, other: "Interval") -> "Interval":
+        """Combine two intervals on the same identifier."""
+        if (other.lower, not other.lower_inclusive) > (self.lower, not self.lower_inclusive):
+            lower, lower_inclusive = other.lower, other.lower_inclusive
+        else:
+            lower, lower_inclusive = self.lower, self.lower_inclusive
+        if (other.upper, other.upper_inclusive) < (self.upper, self.upper_inclusive):
+            upper, upper_inclusive = other.upper, other.upper_inclusive
+        else:
+            upper, upper_inclusive = self.upper, self.upper_inclusive
+        return Interval(self.identifier, lower, lower_inclusive, upper, upper_inclusive)
+
+    def describe(self) -> str:
+        return (
+            f"{'[' if self.lower_inclusive else '('}{self.lower:g}, "
+            f"{self.upper:g}{']' if self.upper_inclusive else ')'}"
+        )
+
+
+# (interval, owner, severity, effective date, end date); the owner is whatever
+# produced the bound and is handed back when it is violated
+BoundRow = Tuple[Interval, Any, str, Optional[date], Optional[date]]
+
+
+def _dates(values: Iterable[Optional[date]]) -> np.ndarray:
+    return np.array(
+        [np.datetime64(value, "D") if value else np.datetime64("NaT", "D") for value in values],
+        dtype="datetime64[D]"
+    )
+
+
+class BoundsTable:
+    """
+    Numeric bounds for many MDRM items, checked with vector comparisons.
+
+    Each row holds the bounds of one constraint. Exclusive bounds are stored
+    as the next representable float, so a submission's values are checked
+    against every row with exactly two comparisons: value < lower and
+    value > upper.
+    """
+
+    def __init__(self, rows: List[BoundRow]):
+        self.intervals = [row[0] for row in rows]
+        self.owners = [row[1] for row in rows]
+        self.identifiers = pd.Index([interval.identifier for interval in self.intervals], dtype=object)
+        self.lower = np.array([
+            interval.lower if interval.lower_inclusive else np.nextafter(interval.lower, math.inf)
+            for interval in self.intervals
+        ], dtype=float)
+        self.upper = np.array([
+            interval.upper if interval.upper_inclusive else np.nextafter(interval.upper, -math.inf)
+            for interval in self.intervals
+        ], dtype=float)
+        self.severities = np.array([row[2] for row in rows], dtype=object)
+        self.effective_dates = _dates(row[3] for row in rows)
+        self.end_dates = _dates(row[4] for row in rows)
+
+    def __len__(self) -> int:
+        return len(self.intervals)
+
+    def check(self, values: Dict[str, Any], reporting_date: Optional[date] = None,
+              severities: Optional[set] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Check parsed submission values against every active row.
+
+        Returns the indices of the rows whose bounds are violated and of the
+        rows whose reported value is not numeric.
+        """
+        active = np.ones(len(self), dtype=bool)
+        if reporting_date is not None:
+            day = np.datetime64(reporting_date, "D")
+            active &= ~(self.effective_dates > day) & ~(self.end_dates <= day)
+        if severities is not None:
+            active &= np.isin(self.severities, list(severities))
+
+        reported = pd.Series(values, dtype=object).reindex(self.identifiers)
+        active &= reported.notna().to_numpy()
+        numbers = pd.to_numeric(reported, errors="coerce").to_numpy(dtype=float)
+
+        violated = active & ((numbers < self.lower) | (numbers > self.upper))
+        non_numeric = active & np.isnan(numbers)
+        return np.flatnonzero(violated), np.flatnonzero(non_numeric)
@@ -0,0 +1,81 @@
+import csv
+import io
+import tempfile
+import zipfile
+from datetime import date
+from itertools import groupby
+from typing import Any, Iterable, Iterator, List, Tuple
+
+from ..core.config import settings
+from .reports import PERIOD_REPORT_COLUMNS, SUBMISSION_REPORT_COLUMNS, csv_chunks, period_report_rows, read_rows
+
+# Name of the archive entry holding every institution's rows
+COMBINED_ENTRY = "all_institutions.csv"
+
+
+class _ChunkSink(io.RawIOBase):
+    """Unseekable output that collects what is written until it is drained."""
+
+    def __init__(self):
+        self.chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def _tee(rows: Iterable[Tuple[Any, ...]], combined: Any) -> Iterator[Tuple[Any, ...]]:
+    """Pass an institution's rows on without their institution columns, copying them to the combined file."""
+    for row in rows:
+        combined.writerow(row)
+        yield row[3:]
+
+
+def stream_period_archive(report_series_id: int, reporting_date: date) -> Iterator[bytes]:
+    """
+    Stream a zip archive of every accepted filing for a period.
+
+    The archive holds one CSV file per institution, named by RSSD ID, and a
+    combined file of all institutions. Rows come from a single ordered scan
+    and each institution's file is deflated and sent as it is written.
+    Since a zip entry has to be written in one piece, the combined file is
+    spooled to a temporary file on disk during the scan and added last.
+    """
+    sink = _ChunkSink()
+    with tempfile.TemporaryFile("w+", encoding="utf-8", newline="") as spool:
+        combined = csv.writer(spool, lineterminator="\n")
+        combined.writerow(PERIOD_REPORT_COLUMNS)
+
+        # Written without seeking, with sizes in data descriptors after each entry
+        with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            rows = read_rows(period_report_rows(report_series_id, reporting_date))
+            try:
+                for rssd_id, institution_rows in groupby(rows, key=lambda row: row[0]):
+                    with archive.open(f"institutions/{rssd_id}.csv", "w") as entry:
+                        for chunk in csv_chunks(SUBMISSION_REPORT_COLUMNS, _tee(institution_rows, combined)):
+                            entry.write(chunk.encode())
+                            data = sink.drain()
+                            if data:
+                                yield data
+            finally:
+                # Release the session at once if the download is abandoned
+                rows.close()
+
+            spool.seek(0)
+            with archive.open(COMBINED_ENTRY, "w", force_zip64=True) as entry:
+                for chunk in iter(lambda: spool.read(settings.REPORT_CHUNK_SIZE), ""):
+                    entry.write(chunk.encode())
+                    data = sink.drain()
+                    if data:
+                        yield data
+
+    # Closing the archive wrote the central directory
+    yield sink.drain()
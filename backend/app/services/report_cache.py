@@ -0,0 +1,161 @@
+import hashlib
+import os
+import tempfile
+import threading
+from typing import BinaryIO, Callable, Iterable, Iterator, Optional, Union
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..models.data_submission import DataSubmission
+
+
+class ReportCache:
+    """
+    On-disk cache of generated report artifacts.
+
+    Artifacts are keyed by (report type, submission ID, format, data
+    version). A submission's data version is bumped whenever its values or
+    validation results change, so a key never refers to stale content and
+    can double as a strong ETag. Reading an artifact marks it as recently
+    used; once the cache grows past max_bytes the least recently used
+    artifacts are removed.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(report_type: str, submission_id: int, format: str, data_version: int) -> str:
+        return f"{submission_id}-{report_type}-{format}-v{data_version}"
+
+    @staticmethod
+    def etag(key: str) -> str:
+        return f'"{hashlib.sha256(key.encode()).hexdigest()[:32]}"'
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, key)
+
+    def get(self, key: str) -> Optional[str]:
+        """Path of a cached artifact, or None on a miss."""
+        path = self.path(key)
+        try:
+            # The modification time records when the artifact was last used
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def store(self, key: str, content: bytes) -> str:
+        """Cache a generated artifact and return its path."""
+        return self.write(key, lambda output: output.write(content))
+
+    def write(self, key: str, write: Callable[[BinaryIO], None]) -> str:
+        """Generate an artifact straight into the cache and return its path."""
+        temp_path = self._temp_path()
+        try:
+            with open(temp_path, "wb") as output:
+                write(output)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+        return self._commit(key, temp_path)
+
+    def stream_through(self, key: str, chunks: Iterable[Union[str, bytes]]) -> Iterator[Union[str, bytes]]:
+        """
+        Pass a streamed artifact through, caching it once it is complete.
+
+        Chunks are written to a temporary file as they are yielded, so the
+        response is not held back; an interrupted stream leaves nothing behind.
+        """
+        temp_path = self._temp_path()
+        try:
+            with open(temp_path, "wb") as temp_file:
+                for chunk in chunks:
+                    temp_file.write(chunk.encode() if isinstance(chunk, str) else chunk)
+                    yield chunk
+        except BaseException:
+            os.remove(temp_path)
+            raise
+        self._commit(key, temp_path)
+
+    def invalidate(self, submission_ids: Iterable[int]) -> int:
+        """Remove the cached artifacts of the given submissions; returns how many were removed."""
+        prefixes = tuple(f"{submission_id}-" for submission_id in submission_ids)
+        removed = 0
+        for entry in self._entries():
+            if entry.name.startswith(prefixes):
+                removed += self._remove(entry.path)
+        return removed
+
+    def _temp_path(self) -> str:
+        # Created in the cache directory so the finished file can be renamed into place
+        os.makedirs(self.directory, exist_ok=True)
+        handle, temp_path = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        os.close(handle)
+        return temp_path
+
+    def _commit(self, key: str, temp_path: str) -> str:
+        path = self.path(key)
+        # Atomic, so readers never see a partly written artifact
+        os.replace(temp_path, path)
+        self._evict()
+        return path
+
+    def _entries(self) -> list:
+        try:
+            return [entry for entry in os.scandir(self.directory) if entry.is_file() and not entry.name.startswith(".")]
+        except FileNotFoundError:
+            return []
+
+    def _evict(self) -> None:
+        with self._lock:
+            entries = []
+            for entry in self._entries():
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                self._remove(path)
+                total -= size
+
+    @staticmethod
+    def _remove(path: str) -> int:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            return 0
+        return 1
+
+
+# Shared by all requests of a worker process; the files are shared by all workers
+report_cache = ReportCache(settings.REPORT_CACHE_DIR, settings.REPORT_CACHE_MAX_BYTES)
+
+
+def invalidate_reports(db: Session, submission_ids: Iterable[int]) -> None:
+    """
+    Mark the reports of submissions whose values or validation results changed as stale.
+
+    Bumps the submissions' data version in the caller's transaction, so
+    later requests use new cache keys and ETags, and removes the artifacts
+    cached for the old versions.
+    """
+    submission_ids = list(set(submission_ids))
+    if not submission_ids:
+        return
+
+    db.execute(
+        update(DataSubmission).where(DataSubmission.id.in_(submission_ids)).values(
+            data_version=DataSubmission.data_version + 1
+        ).execution_options(synchronize_session=False)
+    )
+    report_cache.invalidate(submission_ids)
@@ -0,0 +1,306 @@
+import json
+import os
+import time
+from datetime import date, datetime
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, Optional, Sequence, Tuple
+
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..core.database import SessionLocal
+from ..models.report_export import ReportExport
+from ..models.user import User
+from .jobs import JobCancelled, JobQueue
+from .parquet_writer import write_parquet
+from .pdf_writer import write_pdf
+from .reports import (
+    HISTORICAL_REPORT_COLUMNS,
+    SUBMISSION_REPORT_COLUMNS,
+    VALIDATION_REPORT_COLUMNS,
+    csv_chunks,
+    historical_report_dates,
+    historical_report_rows,
+    historical_wide_rows,
+    read_rows,
+    submission_report_rows,
+    validation_report_rows,
+    wide_historical_columns,
+    write_excel,
+)
+
+# Worker pool for report exports, kept apart from the HTTP workers and validation runs
+export_queue = JobQueue("export", settings.EXPORT_JOB_WORKERS)
+
+# Session factory used by background exports and event streams
+session_factory = SessionLocal
+
+# Report parameters stored as ISO dates
+_DATE_PARAMETERS = ("start_date", "end_date")
+
+# Media type and file extension of each export format
+EXPORT_FORMATS = {
+    "csv": ("text/csv", "csv"),
+    "excel": ("application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx"),
+    "pdf": ("application/pdf", "pdf"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+# Column widths (in characters) of PDF reports; other columns share the rest of the line
+PDF_COLUMN_WIDTHS = {
+    "mdrm_identifier": 16,
+    "field_identifier": 16,
+    "reporting_date": 14,
+    "severity": 8,
+    "status": 8,
+}
+
+# Rows written between checks of the progress interval
+_PROGRESS_ROWS = 1000
+
+
+def start_report_export(db: Session, report_type: str, format: str, params: Dict[str, Any],
+                        user: Optional[User] = None) -> ReportExport:
+    """
+    Create a report export record and queue it for background execution.
+
+    Returns the queued export immediately; its file can be downloaded once it completes.
+    """
+    remove_expired_exports()
+    export = ReportExport(
+        owner_id=user.id if user else None,
+        report_type=report_type,
+        format=format,
+        parameters=json.dumps(params, default=str),
+        status="queued"
+    )
+    db.add(export)
+    db.commit()
+    db.refresh(export)
+
+    export_queue.submit(execute_report_export, export.id)
+
+    return export
+
+
+def export_path(export: ReportExport) -> str:
+    """Path of an export's file; the download name is kept on the export record."""
+    return os.path.join(settings.EXPORT_DIR, str(export.id))
+
+
+def export_parameters(export: ReportExport) -> Dict[str, Any]:
+    """Parameters of an export's report, with dates parsed back from the stored JSON."""
+    params = json.loads(export.parameters)
+    for name in _DATE_PARAMETERS:
+        if params.get(name):
+            params[name] = date.fromisoformat(params[name])
+    return params
+
+
+def _report(db: Session, report_type: str,
+            params: Dict[str, Any]) -> Tuple[str, Sequence[str], Iterable[Tuple[Any, ...]]]:
+    """Title, columns and rows of a report."""
+    if report_type == "submission":
+        rows = read_rows(submission_report_rows(params["submission_id"]))
+        return f"Submission {params['submission_id']} report", SUBMISSION_REPORT_COLUMNS, rows
+    if report_type == "validation":
+        rows = read_rows(validation_report_rows(params["submission_id"]))
+        return f"Submission {params['submission_id']} validation report", VALIDATION_REPORT_COLUMNS, rows
+
+    period = (params["institution_id"], params["report_series_id"], params["start_date"], params["end_date"])
+    title = f"Institution {params['institution_id']} historical report"
+    if params.get("layout") == "wide":
+        reporting_dates = historical_report_dates(db, *period)
+        return title, wide_historical_columns(reporting_dates), read_rows(historical_wide_rows(*period, reporting_dates))
+    return title, HISTORICAL_REPORT_COLUMNS, read_rows(historical_report_rows(*period))
+
+
+def _tracked(db: Session, export: ReportExport, rows: Iterable[Tuple[Any, ...]]) -> Iterator[Tuple[Any, ...]]:
+    """
+    Pass rows through, recording progress on the export record and
+    stopping once cancellation has been requested.
+    """
+    last_update = time.monotonic()
+    rows_written = 0
+    for row in rows:
+        # Throttle progress writes so they don't dominate the export
+        if rows_written % _PROGRESS_ROWS == 0 and time.monotonic() - last_update >= settings.EXPORT_PROGRESS_INTERVAL:
+            export.rows_written = rows_written
+            db.commit()
+            last_update = time.monotonic()
+            # Reloaded after the commit, so a request from any worker is seen
+            if export.cancel_requested:
+                raise JobCancelled()
+        yield row
+        rows_written += 1
+    export.rows_written = rows_written
+
+
+def run_report_export(db: Session, export: ReportExport) -> None:
+    """
+    Write a report to the export directory, recording the result on the export record.
+
+    Rows are read from the database in batches and written out as they
+    arrive, whatever the format and layout, so an export of any size runs
+    in bounded memory. A cancelled or failed export leaves no file behind.
+    """
+    path = export_path(export)
+    os.makedirs(settings.EXPORT_DIR, exist_ok=True)
+
+    title, columns, rows = _report(db, export.report_type, export_parameters(export))
+    rows = _tracked(db, export, rows)
+
+    writers: Dict[str, Callable[[BinaryIO], Any]] = {
+        "csv": lambda output: output.writelines(chunk.encode() for chunk in csv_chunks(columns, rows)),
+        "excel": lambda output: write_excel(columns, rows, output),
+        "pdf": lambda output: write_pdf(title, columns, rows, output, PDF_COLUMN_WIDTHS),
+        "parquet": lambda output: write_parquet(columns, rows, output),
+    }
+    try:
+        with open(path, "wb") as output:
+            writers[export.format](output)
+    except BaseException:
+        os.remove(path)
+        raise
+
+    params = json.loads(export.parameters)
+    media_type, extension = EXPORT_FORMATS[export.format]
+    export.filename = (
+        f"{export.report_type}_{params.get('submission_id') or params.get('institution_id')}_report.{extension}"
+    )
+    export.media_type = media_type
+    export.size_bytes = os.path.getsize(path)
+
+
+def execute_report_export(export_id: int) -> None:
+    """Execute a queued report export, recording progress on the export record."""
+    db = session_factory()
+    try:
+        export = db.query(ReportExport).filter(ReportExport.id == export_id).first()
+        if not export:
+            return
+        if export.cancel_requested:
+            export.status = "cancelled"
+            export.finished_at = datetime.now()
+            db.commit()
+            return
+
+        export.status = "running"
+        export.started_at = datetime.now()
+        db.commit()
+
+        try:
+            run_report_export(db, export)
+        except JobCancelled:
+            db.rollback()
+            export.status = "cancelled"
+        except Exception as e:
+            db.rollback()
+            export.status = "failed"
+            export.error_detail = str(e)
+        else:
+            export.status = "completed"
+
+        export.finished_at = datetime.now()
+        db.commit()
+    finally:
+        db.close()
+
+
+def cancel_export(db: Session, export: ReportExport) -> ReportExport:
+    """
+    Request cancellation of an export. A queued export is cancelled at once;
+    a running one stops at its next progress update, in whichever worker runs it.
+    """
+    if not export.finished:
+        export.cancel_requested = True
+        if export.status == "queued":
+            export.status = "cancelled"
+            export.finished_at = datetime.now()
+        db.commit()
+        db.refresh(export)
+    return export
+
+
+def fail_interrupted_exports(db: Session) -> int:
+    """
+    Fail the exports left queued or running by a server that stopped, e.g.
+    on startup, removing any partial file. Returns the number failed.
+    """
+    exports = db.query(ReportExport).filter(ReportExport.status.in_(("queued", "running"))).all()
+    finished_at = datetime.now()
+    for export in exports:
+        export.status = "failed"
+        export.error_detail = "Interrupted by a server restart"
+        export.finished_at = finished_at
+        try:
+            os.remove(export_path(export))
+        except FileNotFoundError:
+            pass
+
+    db.commit()
+    return len(exports)
+
+
+def remove_expired_exports() -> int:
+    """Remove export files older than EXPORT_RETENTION_HOURS; returns how many were removed."""
+    cutoff = time.time() - settings.EXPORT_RETENTION_HOURS * 3600
+    removed = 0
+    try:
+        entries = list(os.scandir(settings.EXPORT_DIR))
+    except FileNotFoundError:
+        return 0
+    for entry in entries:
+        try:
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+                removed += 1
+        except FileNotFoundError:
+            continue
+    return removed
+
+
+def _export_event(export: ReportExport) -> str:
+    """Format an export's progress as a Server-Sent Event."""
+    data = {
+        "export_id": export.id,
+        "status": export.status,
+        "rows_written": export.rows_written,
+        "elapsed_seconds": export.elapsed_seconds,
+        "size_bytes": export.size_bytes,
+        "error_detail": export.error_detail,
+    }
+    event = "done" if export.finished else "progress"
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def stream_export_events(export_id: int) -> Iterator[str]:
+    """
+    Stream an export's progress as Server-Sent Events until it finishes.
+
+    Progress is read from the persistent export record, so the stream works
+    regardless of which worker executes the export.
+    """
+    last_event = None
+    while True:
+        db = session_factory()
+        try:
+            export = db.query(ReportExport).filter(ReportExport.id == export_id).first()
+            if not export:
+                return
+
+            event = _export_event(export)
+            finished = export.finished
+        finally:
+            db.close()
+
+        if event != last_event:
+            yield event
+            last_event = event
+        elif not finished:
+            # Keep the connection alive through proxies
+            yield ": keep-alive\n\n"
+
+        if finished:
+            return
+
+        time.sleep(settings.EXPORT_PROGRESS_INTERVAL)
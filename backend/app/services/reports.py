@@ -0,0 +1,253 @@
+import csv
+import io
+import json
+import os
+import tempfile
+from datetime import date
+from itertools import groupby
+from typing import Any, BinaryIO, Callable, Iterable, Iterator, List, Sequence, Tuple
+
+from openpyxl import Workbook
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..core.database import SessionLocal
+from ..models.data_submission import DataSubmission
+from ..models.institution import Institution
+from ..models.submitted_data import SubmittedData
+from ..models.validation_message_template import ValidationMessageTemplate
+from ..models.validation_result import ValidationResult
+
+# Session factory used by streamed reports, which outlive the request's session
+session_factory = SessionLocal
+
+SUBMISSION_REPORT_COLUMNS = ("mdrm_identifier", "reported_value", "calculated_value")
+VALIDATION_REPORT_COLUMNS = ("field_identifier", "error_message", "severity", "status")
+HISTORICAL_REPORT_COLUMNS = ("reporting_date", "mdrm_identifier", "reported_value")
+PERIOD_REPORT_COLUMNS = ("rssd_id", "institution_name", "submission_id") + SUBMISSION_REPORT_COLUMNS
+
+# Row layouts of the historical report
+HISTORICAL_LAYOUTS = ("long", "wide")
+
+# Yields the rows of a report from an open session
+RowSource = Callable[[Session], Iterator[Tuple[Any, ...]]]
+
+
+def submission_report_rows(submission_id: int) -> RowSource:
+    """Rows of a submission's data report, in upload order."""
+    def rows(db: Session) -> Iterator[Tuple[Any, ...]]:
+        query = select(
+            SubmittedData.mdrm_identifier,
+            SubmittedData.reported_value,
+            SubmittedData.calculated_value
+        ).where(
+            SubmittedData.submission_id == submission_id
+        ).order_by(SubmittedData.id)
+        for row in db.execute(query.execution_options(yield_per=settings.REPORT_BATCH_SIZE)):
+            yield tuple(row)
+    return rows
+
+
+def validation_report_rows(submission_id: int) -> RowSource:
+    """Rows of a submission's validation report, with messages rendered from their templates."""
+    def rows(db: Session) -> Iterator[Tuple[Any, ...]]:
+        query = select(
+            ValidationResult.field_identifier,
+            ValidationResult.stored_message,
+            ValidationMessageTemplate.template,
+            ValidationResult.message_params,
+            ValidationResult.severity,
+            ValidationResult.status
+        ).outerjoin(
+            ValidationMessageTemplate, ValidationMessageTemplate.id == ValidationResult.message_template_id
+        ).where(
+            ValidationResult.submission_id == submission_id
+        ).order_by(ValidationResult.id)
+        for field_identifier, stored_message, template, params, severity, result_status in db.execute(
+            query.execution_options(yield_per=settings.REPORT_BATCH_SIZE)
+        ):
+            if template is not None:
+                stored_message = template.format(**json.loads(params or "{}"))
+            yield field_identifier, stored_message, severity, result_status
+    return rows
+
+
+def historical_report_rows(institution_id: int, report_series_id: int,
+                           start_date: date, end_date: date) -> RowSource:
+    """
+    Rows of an institution's history for a series, read with one joined query.
+
+    Submissions are found through the institution/series/date index and
+    their values through the submission index. Rows are ordered by
+    reporting date and then submission date, so an amended filing's values
+    follow those of the filing it replaces.
+    """
+    def rows(db: Session) -> Iterator[Tuple[Any, ...]]:
+        query = select(
+            DataSubmission.reporting_date,
+            SubmittedData.mdrm_identifier,
+            SubmittedData.reported_value
+        ).join(
+            SubmittedData, SubmittedData.submission_id == DataSubmission.id
+        ).where(
+            DataSubmission.institution_id == institution_id,
+            DataSubmission.report_series_id == report_series_id,
+            DataSubmission.reporting_date >= start_date,
+            DataSubmission.reporting_date <= end_date
+        ).order_by(DataSubmission.reporting_date, DataSubmission.submission_date, SubmittedData.id)
+        for row in db.execute(query.execution_options(yield_per=settings.REPORT_BATCH_SIZE)):
+            yield tuple(row)
+    return rows
+
+
+def period_report_rows(report_series_id: int, reporting_date: date) -> RowSource:
+    """
+    Rows of every institution's accepted filing for a period, read with one ordered query.
+
+    Rows are grouped by institution, and within an institution the latest
+    accepted filing comes first; rows of the filings it replaces are skipped.
+    """
+    def rows(db: Session) -> Iterator[Tuple[Any, ...]]:
+        query = select(
+            Institution.rssd_id,
+            Institution.name,
+            DataSubmission.id,
+            SubmittedData.mdrm_identifier,
+            SubmittedData.reported_value,
+            SubmittedData.calculated_value
+        ).join(
+            Institution, Institution.id == DataSubmission.institution_id
+        ).join(
+            SubmittedData, SubmittedData.submission_id == DataSubmission.id
+        ).where(
+            DataSubmission.report_series_id == report_series_id,
+            DataSubmission.reporting_date == reporting_date,
+            DataSubmission.status == "accepted"
+        ).order_by(
+            Institution.rssd_id, DataSubmission.submission_date.desc(), DataSubmission.id.desc(), SubmittedData.id
+        )
+        rssd_id = latest_id = None
+        for row in db.execute(query.execution_options(yield_per=settings.REPORT_BATCH_SIZE)):
+            if row[0] != rssd_id:
+                rssd_id, latest_id = row[0], row[2]
+            if row[2] == latest_id:
+                yield tuple(row)
+    return rows
+
+
+def historical_report_dates(db: Session, institution_id: int, report_series_id: int,
+                            start_date: date, end_date: date) -> List[date]:
+    """Reporting dates of an institution's filings for a series, the columns of the wide layout."""
+    return list(db.execute(
+        select(DataSubmission.reporting_date).where(
+            DataSubmission.institution_id == institution_id,
+            DataSubmission.report_series_id == report_series_id,
+            DataSubmission.reporting_date >= start_date,
+            DataSubmission.reporting_date <= end_date
+        ).distinct().order_by(DataSubmission.reporting_date)
+    ).scalars())
+
+
+def wide_historical_columns(reporting_dates: Sequence[date]) -> List[str]:
+    return ["mdrm_identifier"] + [reporting_date.isoformat() for reporting_date in reporting_dates]
+
+
+def historical_wide_rows(institution_id: int, report_series_id: int, start_date: date, end_date: date,
+                         reporting_dates: Sequence[date]) -> RowSource:
+    """
+    Rows of the wide historical layout: one per MDRM item, with a value per reporting date.
+
+    Values are read ordered by item, so each row is complete once the next
+    item starts and only one item's values are held at a time. Where a
+    period was filed more than once, the latest filing's value is kept.
+    """
+    def rows(db: Session) -> Iterator[Tuple[Any, ...]]:
+        query = select(
+            SubmittedData.mdrm_identifier,
+            DataSubmission.reporting_date,
+            SubmittedData.reported_value
+        ).join(
+            SubmittedData, SubmittedData.submission_id == DataSubmission.id
+        ).where(
+            DataSubmission.institution_id == institution_id,
+            DataSubmission.report_series_id == report_series_id,
+            DataSubmission.reporting_date >= start_date,
+            DataSubmission.reporting_date <= end_date
+        ).order_by(
+            SubmittedData.mdrm_identifier, DataSubmission.reporting_date, DataSubmission.submission_date,
+            SubmittedData.id
+        )
+        values = db.execute(query.execution_options(yield_per=settings.REPORT_BATCH_SIZE))
+        for mdrm_identifier, item_values in groupby(values, key=lambda row: row[0]):
+            latest = {reporting_date: value for _, reporting_date, value in item_values}
+            yield (mdrm_identifier, *(latest.get(reporting_date) for reporting_date in reporting_dates))
+    return rows
+
+
+def read_rows(rows: RowSource) -> Iterator[Tuple[Any, ...]]:
+    """Iterate over a report's rows in a session of its own, closed once the rows run out."""
+    db = session_factory()
+    try:
+        yield from rows(db)
+    finally:
+        db.close()
+
+
+def csv_chunks(columns: Sequence[str], rows: Iterable[Tuple[Any, ...]]) -> Iterator[str]:
+    """Write rows as CSV text, yielding a chunk once REPORT_CHUNK_SIZE characters have been written."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(columns)
+
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= settings.REPORT_CHUNK_SIZE:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue()
+
+
+def stream_csv(columns: Sequence[str], rows: RowSource) -> Iterator[str]:
+    """
+    Write a report as CSV text, one chunk at a time.
+
+    Rows are fetched from the database in batches of REPORT_BATCH_SIZE and
+    written out in chunks, so memory use does not grow with the size of
+    the report.
+    """
+    return csv_chunks(columns, read_rows(rows))
+
+
+def write_excel(columns: Sequence[str], rows: Iterable[Tuple[Any, ...]], output: BinaryIO) -> None:
+    """
+    Write a report as an Excel workbook, one row at a time.
+
+    The workbook is opened in openpyxl's write-only mode, which writes each
+    row out as it is appended instead of keeping the sheet in memory.
+    """
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Report")
+    sheet.append(list(columns))
+    try:
+        for row in rows:
+            sheet.append(row)
+    except BaseException:
+        # Close the sheet's XML stream so an abandoned workbook is cleaned up quietly
+        sheet.close()
+        raise
+    workbook.save(output)
+
+
+def spool_report(write: Callable[[BinaryIO], None], suffix: str) -> str:
+    """Write a report to a temporary file and return its path; the caller removes the file."""
+    handle, path = tempfile.mkstemp(suffix=suffix)
+    try:
+        with os.fdopen(handle, "wb") as output:
+            write(output)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path
@@ -0,0 +1,128 @@
+import json
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from sqlalchemy import and_, delete, exists, insert
+from sqlalchemy.orm import Session
+
+from ..models.validation_result_memo import ValidationResultMemo
+from ..models.validation_rule import ValidationRule
+
+# (rule id, rule version, hash of the rule's input values)
+MemoKey = Tuple[int, int, str]
+
+
+class ResultMemo:
+    """
+    Earlier outcomes of rules for a submission's inputs.
+
+    keys maps each rule to its memo key for the submission being validated;
+    entries holds the known outcomes, with None for a rule that passed.
+    Outcomes recorded during evaluation are kept in added until saved.
+    """
+
+    def __init__(self, keys: Dict[int, MemoKey], entries: Optional[Dict[MemoKey, Optional[Dict[str, Any]]]] = None):
+        self.keys = keys
+        self.entries = entries or {}
+        self.added: Dict[MemoKey, Optional[Dict[str, Any]]] = {}
+        self.hits = 0
+
+    def lookup(self, rule_id: int) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        """Get (found, finding) for a rule; found is False when it must be evaluated."""
+        key = self.keys.get(rule_id)
+        if key is None or key not in self.entries:
+            return False, None
+        self.hits += 1
+        finding = self.entries[key]
+        return True, dict(finding) if finding else None
+
+    def record(self, rule_id: int, finding: Optional[Dict[str, Any]]) -> None:
+        key = self.keys.get(rule_id)
+        if key is not None:
+            self.entries[key] = finding
+            self.added[key] = finding
+
+
+def load_memo(db: Session, keys: Dict[int, MemoKey]) -> ResultMemo:
+    """Load the memoized outcomes for a submission's memo keys with one query."""
+    return load_memos(db, {None: keys})[None]
+
+
+def load_memos(db: Session, keys: Dict[Any, Dict[int, MemoKey]]) -> Dict[Any, ResultMemo]:
+    """
+    Load the memoized outcomes for many submissions' memo keys with one query.
+
+    keys maps each submission to its memo keys; a memo is returned for each.
+    """
+    memos = {submission: ResultMemo(submission_keys) for submission, submission_keys in keys.items()}
+    wanted = set().union(*(submission_keys.values() for submission_keys in keys.values()))
+    if not wanted:
+        return memos
+
+    rows = db.query(
+        ValidationResultMemo.rule_id,
+        ValidationResultMemo.rule_version,
+        ValidationResultMemo.input_hash,
+        ValidationResultMemo.finding
+    ).filter(
+        ValidationResultMemo.rule_id.in_({key[0] for key in wanted}),
+        ValidationResultMemo.input_hash.in_({key[2] for key in wanted})
+    )
+    entries = {}
+    for rule_id, rule_version, input_hash, finding in rows:
+        key = (rule_id, rule_version, input_hash)
+        if key in wanted:
+            entries[key] = json.loads(finding) if finding else None
+
+    for memo in memos.values():
+        memo.entries = {key: entries[key] for key in memo.keys.values() if key in entries}
+    return memos
+
+
+def save_memo(db: Session, memo: ResultMemo) -> int:
+    """
+    Store the outcomes recorded during evaluation. Nothing is committed, so
+    they are written in the same transaction as the results.
+    """
+    saved = save_outcomes(db, memo.added)
+    memo.added = {}
+    return saved
+
+
+def save_outcomes(db: Session, outcomes: Dict[MemoKey, Optional[Dict[str, Any]]]) -> int:
+    """Store outcomes recorded elsewhere, e.g. by the memos of a worker process."""
+    if not outcomes:
+        return 0
+
+    rows = [
+        {
+            "rule_id": rule_id,
+            "rule_version": rule_version,
+            "input_hash": input_hash,
+            "finding": json.dumps(finding) if finding else None,
+        }
+        for (rule_id, rule_version, input_hash), finding in outcomes.items()
+    ]
+    # Another run may have stored the same outcome in the meantime
+    db.execute(insert(ValidationResultMemo).prefix_with("OR IGNORE", dialect="sqlite"), rows)
+    return len(rows)
+
+
+def prune_memo(db: Session, rule_ids: Optional[Iterable[int]] = None) -> int:
+    """
+    Remove memoized outcomes of superseded rule versions and of deleted rules.
+
+    Runs started before a rule was updated can still store outcomes of its
+    old version, so pruning is repeated after batch runs as well as on
+    update. Only the given rules are pruned, or every rule when none are
+    given. Nothing is committed.
+
+    Returns the number of outcomes removed.
+    """
+    current = exists().where(and_(
+        ValidationRule.id == ValidationResultMemo.rule_id,
+        ValidationRule.version == ValidationResultMemo.rule_version
+    ))
+    stale = delete(ValidationResultMemo).where(~current)
+    if rule_ids is not None:
+        stale = stale.where(ValidationResultMemo.rule_id.in_(list(rule_ids)))
+    return db.execute(stale.execution_options(synchronize_session=False)).rowcount
@@ -0,0 +1,101 @@
+import time
+from datetime import date
+from typing import Any, Dict, Optional
+
+from ..core.config import settings
+from ..models.data_submission import DataSubmission
+from ..models.institution import Institution
+from . import validation_runs
+from .jobs import Job, JobQueue
+from .validation_executor import iter_results, load_submission_rows
+
+# Worker pool for analyst analysis jobs, kept apart from validation runs
+analysis_queue = JobQueue("analysis", settings.ANALYSIS_JOB_WORKERS)
+
+# Placeholder ID for a rule that has not been created yet
+CANDIDATE_RULE_ID = 0
+
+
+def start_rule_impact_analysis(rule_definition: str, rule_type: str, severity: str,
+                               start_date: date, end_date: date,
+                               report_series_id: Optional[int] = None,
+                               institution_id: Optional[int] = None,
+                               owner_id: Optional[int] = None) -> Job:
+    """Queue a dry run of a candidate rule against historical submissions."""
+    rule_spec = {
+        "rule_id": CANDIDATE_RULE_ID,
+        "rule_name": "Candidate rule",
+        "rule_type": rule_type,
+        "rule_definition": rule_definition,
+        "severity": severity,
+    }
+    window = {
+        "start_date": start_date,
+        "end_date": end_date,
+        "report_series_id": report_series_id,
+        "institution_id": institution_id,
+    }
+    return analysis_queue.submit_job("rule_impact", run_rule_impact_analysis, rule_spec, window, owner_id=owner_id)
+
+
+def run_rule_impact_analysis(job: Job, rule_spec: Dict[str, Any], window: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Evaluate a candidate rule against a window of submissions without persisting results.
+
+    Submissions are evaluated in shards across the validation process pool;
+    the job stops loading new shards as soon as it is cancelled.
+    """
+    started = time.perf_counter()
+    db = validation_runs.session_factory()
+    try:
+        query = db.query(DataSubmission).filter(
+            DataSubmission.reporting_date >= window["start_date"],
+            DataSubmission.reporting_date <= window["end_date"],
+            DataSubmission.status != "draft"
+        )
+        if window["report_series_id"]:
+            query = query.filter(DataSubmission.report_series_id == window["report_series_id"])
+        if window["institution_id"]:
+            query = query.filter(DataSubmission.institution_id == window["institution_id"])
+
+        submissions = load_submission_rows(db, query)
+        by_id = {submission.id: submission for submission in submissions}
+        job.progress = {"submissions_total": len(submissions), "submissions_evaluated": 0}
+
+        hits: Dict[tuple, Dict[str, Any]] = {}
+        results_iter = iter_results(
+            db, submissions, [rule_spec], should_stop=lambda: job.cancelled, profile=False
+        )
+        for results in results_iter:
+            for submission_id, findings in results.items():
+                submission = by_id[submission_id]
+                key = (submission.institution_id, submission.reporting_date)
+                entry = hits.setdefault(key, {
+                    "institution_id": submission.institution_id,
+                    "reporting_date": submission.reporting_date,
+                    "submissions": 0,
+                    "submissions_flagged": 0,
+                })
+                entry["submissions"] += 1
+                entry["submissions_flagged"] += bool(findings)
+
+            job.progress["submissions_evaluated"] += len(results)
+
+        job.check_cancelled()
+
+        names = dict(db.query(Institution.id, Institution.name).filter(
+            Institution.id.in_({institution_id for institution_id, _ in hits})
+        ))
+    finally:
+        db.close()
+
+    rows = sorted(hits.values(), key=lambda entry: (entry["institution_id"], entry["reporting_date"]))
+    for entry in rows:
+        entry["institution_name"] = names.get(entry["institution_id"])
+
+    return {
+        "submissions_evaluated": len(submissions),
+        "submissions_flagged": sum(entry["submissions_flagged"] for entry in rows),
+        "hits": rows,
+        "evaluation_seconds": round(time.perf_counter() - started, 3),
+    }
@@ -0,0 +1,181 @@
+import json
+import logging
+import math
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Tuple
+
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..models.validation_rule_stats import ValidationRuleStats
+
+logger = logging.getLogger(__name__)
+
+# Number of recent evaluation timings kept per rule for percentiles
+SAMPLE_SIZE = 1000
+
+# (rule id, seconds, fired)
+RuleTiming = Tuple[int, float, bool]
+
+
+class _RuleStats:
+    __slots__ = ("evaluations", "fired", "seconds", "samples")
+
+    def __init__(self):
+        self.evaluations = 0
+        self.fired = 0
+        self.seconds = 0.0
+        self.samples = deque(maxlen=SAMPLE_SIZE)
+
+
+def percentile(samples: Iterable[float], fraction: float) -> float:
+    """Nearest-rank percentile of a set of samples."""
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+class RuleProfiler:
+    """
+    Aggregates per-rule execution statistics in memory.
+
+    Counters accumulated since the last flush are added to the
+    validation_rule_stats table by flush(). Each rule's row also keeps its
+    most recent SAMPLE_SIZE timings, so p95 covers the same rolling window
+    however often statistics are flushed and by however many processes.
+    Flushes are serialized, so concurrent flushes from validation jobs and
+    the stats endpoint cannot both create the row of a new rule.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stats: Dict[int, _RuleStats] = {}
+        self._last_flush = time.monotonic()
+
+    def record(self, timings: Iterable[RuleTiming]) -> None:
+        """Record the timings of one engine pass."""
+        with self._lock:
+            for rule_id, seconds, fired in timings:
+                stats = self._stats.get(rule_id)
+                if stats is None:
+                    stats = self._stats[rule_id] = _RuleStats()
+                stats.evaluations += 1
+                stats.fired += fired
+                stats.seconds += seconds
+                stats.samples.append(seconds)
+
+    def drain(self) -> Dict[int, Dict[str, Any]]:
+        """Remove and return the pending statistics, e.g. to ship them out of a worker process."""
+        with self._lock:
+            stats, self._stats = self._stats, {}
+        return {
+            rule_id: {
+                "evaluations": s.evaluations,
+                "fired": s.fired,
+                "seconds": s.seconds,
+                "samples": list(s.samples),
+            }
+            for rule_id, s in stats.items()
+        }
+
+    def merge(self, drained: Dict[int, Dict[str, Any]]) -> None:
+        """Merge statistics drained from another profiler."""
+        with self._lock:
+            for rule_id, other in drained.items():
+                stats = self._stats.get(rule_id)
+                if stats is None:
+                    stats = self._stats[rule_id] = _RuleStats()
+                stats.evaluations += other["evaluations"]
+                stats.fired += other["fired"]
+                stats.seconds += other["seconds"]
+                stats.samples.extend(other["samples"])
+
+    def flush(self, db: Session) -> int:
+        """
+        Add pending statistics to the stats table. Returns the number of rules flushed.
+
+        If the write fails, the statistics are put back to be flushed next time.
+        """
+        with self._flush_lock:
+            self._last_flush = time.monotonic()
+            pending = self.drain()
+            if not pending:
+                return 0
+
+            try:
+                self._write(db, pending)
+            except SQLAlchemyError:
+                db.rollback()
+                self.merge(pending)
+                raise
+            return len(pending)
+
+    def _write(self, db: Session, pending: Dict[int, Dict[str, Any]]) -> None:
+        existing = {
+            row.rule_id: row
+            for row in db.query(ValidationRuleStats).filter(ValidationRuleStats.rule_id.in_(list(pending)))
+        }
+        now = datetime.now()
+        for rule_id, stats in pending.items():
+            row = existing.get(rule_id)
+            if row is None:
+                row = ValidationRuleStats(rule_id=rule_id, evaluation_count=0, fire_count=0, total_seconds=0.0)
+                db.add(row)
+            row.evaluation_count += stats["evaluations"]
+            row.fire_count += stats["fired"]
+            row.total_seconds += stats["seconds"]
+            window = (json.loads(row.recent_seconds) if row.recent_seconds else []) + stats["samples"]
+            window = window[-SAMPLE_SIZE:]
+            row.recent_seconds = json.dumps(window)
+            row.p95_seconds = percentile(window, 0.95)
+            row.last_flushed_at = now
+
+        db.commit()
+
+    def maybe_flush(self, db: Session) -> None:
+        """
+        Flush if the flush interval has elapsed since the last flush.
+
+        Called once a validation's results are committed, so a failed flush
+        is logged rather than failing the validation.
+        """
+        if time.monotonic() - self._last_flush >= settings.RULE_STATS_FLUSH_INTERVAL:
+            try:
+                self.flush(db)
+            except SQLAlchemyError:
+                logger.exception("Could not flush rule statistics")
+
+
+# Process-wide profiler used by the validation engine
+profiler = RuleProfiler()
+
+
+def rule_stats_report(db: Session, sort: str = "total_seconds", limit: int = 100) -> List[Dict[str, Any]]:
+    """Flush pending statistics and report the per-rule stats, hottest rules first."""
+    profiler.flush(db)
+
+    rows = db.query(ValidationRuleStats).all()
+    report = []
+    for row in rows:
+        evaluations = row.evaluation_count or 0
+        report.append({
+            "rule_id": row.rule_id,
+            "rule_name": row.rule.rule_name if row.rule else None,
+            "rule_type": row.rule.rule_type if row.rule else None,
+            "evaluation_count": evaluations,
+            "fire_count": row.fire_count,
+            "fire_rate": round(row.fire_count / evaluations, 6) if evaluations else 0.0,
+            "total_seconds": round(row.total_seconds, 6),
+            "mean_seconds": round(row.total_seconds / evaluations, 9) if evaluations else 0.0,
+            "p95_seconds": round(row.p95_seconds, 9),
+            "last_flushed_at": row.last_flushed_at,
+        })
+
+    report.sort(key=lambda entry: entry[sort], reverse=sort != "fire_rate")
+    return report[:limit]
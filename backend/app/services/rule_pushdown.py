@@ -0,0 +1,343 @@
+import ast
+import json
+import operator
+import sqlite3
+from typing import Any, Dict, Iterable, List, Tuple
+
+from sqlalchemy import Float, String, and_, cast, delete, event, exists, func, insert, literal, not_, or_, select, update
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, aliased
+
+from ..models.data_submission import DataSubmission
+from ..models.submitted_data import SubmittedData
+from ..models.validation_result import ValidationResult
+from ..models.validation_rule import ValidationRule
+from ..models.validation_summary import ValidationSummary
+from .mdrm_checks import METADATA_PREFIX
+from .messages import template_ids
+from .submission_data import parse_value
+from .report_cache import invalidate_reports
+from .validation_engine import CompiledRule, RuleCompilationError, _normalize_definition
+from .data_quality import refresh_quality_cube
+from .validation_summaries import refresh_summaries
+
+# Rule types whose single-item rules are evaluated in the database
+PUSHDOWN_RULE_TYPES = ("range", "format")
+
+# Reported values that parse_value() turns into numbers (commas are allowed)
+_NUMERIC_PATTERN = r"^\s*[-+]?[0-9,]*\.?[0-9]+([eE][-+]?[0-9]+)?\s*$"
+
+# SQL function rendering a reported value as the engine's messages do
+_VALUE_TEXT = "engine_value_text"
+
+_OPERATORS = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge,
+}
+
+
+def _value_text(value: Any) -> Any:
+    return str(parse_value(value))
+
+
+@event.listens_for(Engine, "connect")
+def _register_value_text(dbapi_connection, connection_record):
+    # Numbers are shown as Python floats ("-5.0", "1e+20"), which no SQL
+    # number format reproduces, so SQLite calls back into Python for them
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        dbapi_connection.create_function(_VALUE_TEXT, 1, _value_text, deterministic=True)
+
+
+class _NotPushable(Exception):
+    """Raised when a rule uses syntax that has no SQL translation here."""
+
+
+class _SQLTranslator:
+    """
+    Translate a single-item rule definition into a SQL predicate over submitted_data.
+
+    The item's value is read as a number, or as its raw text through LENGTH();
+    uses_value records whether the rule needs the value to be numeric.
+    """
+
+    def __init__(self, identifier: str):
+        self.identifier = identifier
+        self.uses_value = False
+        self.number = cast(func.replace(SubmittedData.reported_value, ",", ""), Float)
+
+    def predicate(self, node: ast.AST):
+        if isinstance(node, ast.BoolOp):
+            parts = [self.predicate(value) for value in node.values]
+            return and_(*parts) if isinstance(node.op, ast.And) else or_(*parts)
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.Not):
+            return not_(self.predicate(node.operand))
+        if isinstance(node, ast.Compare):
+            operands = [self.operand(node.left)] + [self.operand(comparator) for comparator in node.comparators]
+            comparisons = []
+            for op, left, right in zip(node.ops, operands, operands[1:]):
+                if type(op) not in _OPERATORS:
+                    raise _NotPushable()
+                comparisons.append(_OPERATORS[type(op)](left, right))
+            return and_(*comparisons)
+        raise _NotPushable()
+
+    def operand(self, node: ast.AST):
+        if isinstance(node, ast.Name) and node.id == self.identifier:
+            self.uses_value = True
+            return self.number
+        if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+            return literal(float(node.value))
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+            return -self.operand(node.operand)
+        if isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and len(node.args) == 1:
+            if node.func.id == "LENGTH" and isinstance(node.args[0], ast.Name):
+                return func.length(SubmittedData.reported_value)
+            if node.func.id == "ABS":
+                return func.abs(self.operand(node.args[0]))
+        raise _NotPushable()
+
+
+class PushdownRule:
+    """A single-item rule compiled into SQL that records its own findings."""
+
+    def __init__(self, spec: Dict[str, Any]):
+        self.spec = spec
+        rule = CompiledRule.from_spec(spec)
+        if (
+            rule.rule_type not in PUSHDOWN_RULE_TYPES
+            or len(rule.identifiers) != 1
+            or rule.is_historical
+            or rule.cross_references
+        ):
+            raise _NotPushable()
+
+        self.rule = rule
+        self.identifier = rule.identifiers[0]
+        translator = _SQLTranslator(self.identifier)
+        tree = ast.parse(_normalize_definition(rule.rule_definition), mode="eval")
+        self.predicate = translator.predicate(tree.body)
+        self.uses_value = translator.uses_value
+
+    @property
+    def templates(self) -> Tuple[str, str]:
+        """Message templates of this rule's findings: failed and could not be evaluated."""
+        return self.rule.failed_template + " ({values})", self.rule.error_template + " ({values})"
+
+    def _select(self, submission_ids: List[int], columns: List[Any], condition: Any):
+        waived = aliased(ValidationResult)
+        gate = aliased(ValidationResult)
+        gate_rule = aliased(ValidationRule)
+        rule = self.rule
+        query = select(*columns).join(
+            DataSubmission, DataSubmission.id == SubmittedData.submission_id
+        ).where(
+            SubmittedData.submission_id.in_(submission_ids),
+            SubmittedData.mdrm_identifier == self.identifier,
+            condition,
+            # Findings that were waived earlier are not reopened
+            ~exists().where(
+                waived.submission_id == SubmittedData.submission_id,
+                waived.rule_id == rule.rule_id,
+                waived.field_identifier == rule.field_identifier,
+                waived.status == "waived"
+            ),
+            # As in the engine, an item with an error from an MDRM check or a
+            # higher-priority rule is not checked again. Only open results
+            # count: they were all written by this run, whereas a waived one
+            # may be left from an earlier run whose finding no longer occurs
+            ~exists().where(
+                gate.submission_id == SubmittedData.submission_id,
+                gate.field_identifier == self.identifier,
+                gate.severity == "error",
+                gate.status == "open",
+                gate_rule.id == gate.rule_id,
+                or_(gate_rule.priority < rule.priority, gate_rule.rule_definition.like(f"{METADATA_PREFIX}%"))
+            )
+        )
+        if rule.effective_date:
+            query = query.where(DataSubmission.reporting_date >= rule.effective_date)
+        if rule.end_date:
+            query = query.where(DataSubmission.reporting_date < rule.end_date)
+        return query
+
+    def _finding_columns(self, template_id: int, params: Any) -> List[Any]:
+        return [
+            SubmittedData.submission_id,
+            literal(self.rule.rule_id),
+            literal(self.rule.field_identifier),
+            literal(template_id),
+            params,
+            literal(self.rule.severity),
+            literal("open"),
+            func.now(),
+            func.now()
+        ]
+
+    def statements(self, submission_ids: List[int], template_ids: Dict[str, int]) -> List[Any]:
+        """INSERT ... SELECT statements writing this rule's failed findings for the submissions."""
+        columns = [
+            ValidationResult.submission_id,
+            ValidationResult.rule_id,
+            ValidationResult.field_identifier,
+            ValidationResult.message_template_id,
+            ValidationResult.message_params,
+            ValidationResult.severity,
+            ValidationResult.status,
+            ValidationResult.created_at,
+            ValidationResult.updated_at,
+        ]
+        failed_template = self.templates[0]
+        # Message parameters are built as JSON inside the database, with the
+        # value shown as the engine shows it
+        reported = literal(f"{self.identifier}=", String) + getattr(func, _VALUE_TEXT)(SubmittedData.reported_value)
+        failed = func.json_object(literal("values", String), reported)
+        condition = not_(self.predicate)
+        if self.uses_value:
+            condition = and_(self._is_number, condition)
+
+        return [insert(ValidationResult).from_select(
+            columns, self._select(submission_ids, self._finding_columns(template_ids[failed_template], failed), condition)
+        )]
+
+    @property
+    def _is_number(self):
+        return SubmittedData.reported_value.regexp_match(_NUMERIC_PATTERN)
+
+    def non_numeric_findings(self, db: Session, submission_ids: List[int],
+                             template_ids: Dict[str, int]) -> List[Dict[str, Any]]:
+        """
+        Result rows of this rule for the submissions whose item is not numeric.
+
+        Such values are rare, and how a comparison fails on text depends on
+        the operator, so they are evaluated by the engine itself, giving the
+        same finding, message and parameters as a run through the engine.
+        """
+        if not self.uses_value:
+            return []
+
+        rows = db.execute(self._select(
+            submission_ids, [SubmittedData.submission_id, SubmittedData.reported_value], not_(self._is_number)
+        ))
+        results = []
+        for submission_id, reported_value in rows:
+            finding = self.rule.evaluate(
+                {self.identifier: parse_value(reported_value)}, {self.identifier: reported_value}
+            )
+            if finding:
+                results.append({
+                    "submission_id": submission_id,
+                    "rule_id": finding["rule_id"],
+                    "field_identifier": finding["field_identifier"],
+                    "message_template_id": template_ids[finding["message_template"]],
+                    "message_params": json.dumps(finding["message_params"]),
+                    "severity": finding["severity"],
+                    "status": "open",
+                })
+        return results
+
+
+def split_pushdown_rules(rule_specs: Iterable[Dict[str, Any]]) -> Tuple[List[PushdownRule], List[Dict[str, Any]]]:
+    """
+    Separate the rules that can be evaluated in SQL from those that need the engine.
+
+    Pushdown rules run after the engine, so they can see the errors that
+    gate their item but cannot gate the engine's rules in turn. An
+    error-severity rule whose item a lower-priority engine rule reads is
+    therefore kept in the engine.
+    """
+    rule_specs = list(rule_specs)
+    pushdown, remaining = [], []
+    for spec in rule_specs:
+        try:
+            pushdown.append(PushdownRule(spec))
+        except (_NotPushable, RuleCompilationError):
+            remaining.append(spec)
+
+    readers = []
+    for spec in remaining:
+        try:
+            readers.append(CompiledRule.from_spec(spec))
+        except RuleCompilationError:
+            continue
+
+    # Keeping a rule in the engine can make it a reader that gates others
+    moved = True
+    while moved:
+        moved = False
+        for rule in list(pushdown):
+            if rule.rule.severity == "error" and any(
+                reader.priority > rule.rule.priority and rule.identifier in reader.identifiers for reader in readers
+            ):
+                pushdown.remove(rule)
+                readers.append(rule.rule)
+                moved = True
+
+    # The engine keeps the load order for rules of equal priority
+    pushed = {id(rule.spec) for rule in pushdown}
+    return pushdown, [spec for spec in rule_specs if id(spec) not in pushed]
+
+
+def run_pushdown_rules(db: Session, rules: List[PushdownRule], submission_ids: List[int],
+                       replace_open: bool = False) -> int:
+    """
+    Evaluate pushdown rules for many submissions inside the database.
+
+    Each rule runs as an INSERT ... SELECT statement over submitted_data,
+    so no numeric values are loaded into Python. Message parameters are
+    built with the database's json_object() function. The rare values that
+    are not numeric are evaluated by the engine instead. replace_open
+    first removes the rules' open results for the submissions; batch
+    validation leaves it off because replace_results has already done so.
+    The submissions' summaries and validation statuses are then updated
+    from their open results, all in one transaction.
+
+    Returns the number of findings written.
+    """
+    if not rules or not submission_ids:
+        return 0
+
+    if replace_open:
+        db.execute(
+            delete(ValidationResult).where(
+                ValidationResult.submission_id.in_(submission_ids),
+                ValidationResult.rule_id.in_([rule.rule.rule_id for rule in rules]),
+                ValidationResult.status == "open"
+            ).execution_options(synchronize_session=False)
+        )
+
+    templates = template_ids(db, {template for rule in rules for template in rule.templates})
+
+    inserted = 0
+    # In priority order, so a rule's errors gate the lower-priority rules on its item
+    for rule in sorted(rules, key=lambda rule: rule.rule.priority):
+        for statement in rule.statements(submission_ids, templates):
+            inserted += db.execute(statement).rowcount
+        non_numeric = rule.non_numeric_findings(db, submission_ids, templates)
+        if non_numeric:
+            db.execute(insert(ValidationResult), non_numeric)
+            inserted += len(non_numeric)
+
+    refresh_summaries(db, submission_ids)
+    refresh_quality_cube(db, submission_ids)
+    invalidate_reports(db, submission_ids)
+
+    # Derive each submission's status from its open results, as replace_results does from findings
+    summaries = select(ValidationSummary.submission_id)
+    for validation_status, condition in (
+        ("failed", ValidationSummary.open_errors > 0),
+        ("warning", and_(ValidationSummary.open_errors == 0, ValidationSummary.open_warnings > 0)),
+        ("passed", and_(ValidationSummary.open_errors == 0, ValidationSummary.open_warnings == 0)),
+    ):
+        db.execute(
+            update(DataSubmission).where(
+                DataSubmission.id.in_(submission_ids),
+                DataSubmission.id.in_(summaries.where(condition))
+            ).values(validation_status=validation_status).execution_options(synchronize_session=False)
+        )
+
+    db.commit()
+    return inserted
@@ -0,0 +1,35 @@
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+from ..models.submitted_data import SubmittedData
+
+
+def parse_value(value: Optional[str]) -> Any:
+    """Convert a reported value to a number when possible."""
+    if value is None:
+        return None
+    try:
+        return float(str(value).replace(",", ""))
+    except ValueError:
+        return value
+
+
+def parse_values(raw_values: Dict[str, str]) -> Dict[str, Any]:
+    """Parse all reported values of a submission."""
+    return {identifier: parse_value(value) for identifier, value in raw_values.items()}
+
+
+def load_submission_values(db: Session, submission_ids: List[int]) -> Dict[int, Dict[str, str]]:
+    """Load the reported values for a set of submissions in a single query."""
+    values = {submission_id: {} for submission_id in submission_ids}
+    rows = db.query(
+        SubmittedData.submission_id,
+        SubmittedData.mdrm_identifier,
+        SubmittedData.reported_value
+    ).filter(SubmittedData.submission_id.in_(submission_ids))
+
+    for submission_id, mdrm_identifier, reported_value in rows:
+        values[submission_id][mdrm_identifier] = reported_value
+
+    return values
@@ -0,0 +1,680 @@
+import ast
+import hashlib
+import json
+import re
+import time
+from datetime import date
+from itertools import groupby
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional
+
+from sqlalchemy.orm import Session
+
+from ..models.data_submission import DataSubmission
+from ..models.validation_rule import ValidationRule
+from .messages import escape_template
+from .mdrm_checks import METADATA_PREFIX, MDRMCheckPlan, load_mdrm_check_plan
+from .cross_series import CounterpartLookup
+from .prior_period import PriorPeriodLookup
+from .range_checks import BoundsTable, Interval
+from .result_memo import MemoKey, ResultMemo, load_memo, save_memo
+from .rule_profiler import RuleProfiler, profiler
+from .submission_data import load_submission_values, parse_values
+from .validation_results import replace_results
+
+# Functions that may be used inside a rule definition
+RULE_FUNCTIONS = {
+    "ABS": abs,
+    "MIN": min,
+    "MAX": max,
+}
+
+# Functions that operate on the raw (unparsed) reported value
+RAW_FUNCTIONS = {
+    "LENGTH": len,
+}
+
+# Functions that take an MDRM identifier rather than a value
+VALUE_FUNCTIONS = set(RAW_FUNCTIONS) | {"PRIOR"}
+
+# AST nodes allowed in a compiled rule definition
+_ALLOWED_NODES = (
+    ast.Expression, ast.BoolOp, ast.And, ast.Or, ast.UnaryOp, ast.Not, ast.USub, ast.UAdd,
+    ast.BinOp, ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Mod, ast.Compare, ast.Eq, ast.NotEq,
+    ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.Call, ast.Name, ast.Load, ast.Constant,
+)
+
+# Called with (rules evaluated, rules total, errors found, warnings found)
+ProgressCallback = Callable[[int, int, int, int], None]
+
+_RAW_NAMESPACE = "__raw__"
+_PRIOR_NAMESPACE = "__prior__"
+_CROSS_NAMESPACE = "__cross__"
+
+# Reference to an item in another series' submission, e.g. FFIEC031:RCFD2170
+_CROSS_REFERENCE = re.compile(r"\b([A-Za-z][A-Za-z0-9]*):([A-Za-z][A-Za-z0-9_]*)\b")
+
+
+class RuleCompilationError(ValueError):
+    """Raised when a rule definition cannot be compiled."""
+
+
+def _normalize_definition(definition: str) -> str:
+    """Translate the rule definition syntax into a Python expression."""
+    expression = definition.strip()
+    expression = expression.replace("<>", "!=")
+    expression = re.sub(r"(?<![<>!=])=(?!=)", "==", expression)
+    expression = re.sub(r"\bAND\b", "and", expression)
+    expression = re.sub(r"\bOR\b", "or", expression)
+    expression = re.sub(r"\bNOT\b", "not", expression)
+    return expression
+
+
+class _ValueReferenceTransformer(ast.NodeTransformer):
+    """
+    Rewrite value-reference function calls into namespace lookups.
+
+    LENGTH(X) reads the unparsed value of X and PRIOR(X) reads the value of X
+    in the prior period's submission. Placeholders for cross-series
+    references read the value from the counterpart submission.
+    """
+
+    def __init__(self, cross_references: Optional[Dict[str, str]] = None):
+        self.raw_identifiers = []
+        self.prior_identifiers = []
+        self.cross_references = cross_references or {}
+
+    def visit_Name(self, node: ast.Name) -> ast.AST:
+        if node.id in self.cross_references:
+            return _lookup(_CROSS_NAMESPACE, self.cross_references[node.id])
+        return node
+
+    def visit_Call(self, node: ast.Call) -> ast.AST:
+        if isinstance(node.func, ast.Name) and node.func.id in VALUE_FUNCTIONS:
+            function = node.func.id
+            if len(node.args) != 1 or not isinstance(node.args[0], ast.Name):
+                raise RuleCompilationError(f"{function}() takes a single MDRM identifier")
+
+            identifier = node.args[0].id
+            if function == "PRIOR":
+                self.prior_identifiers.append(identifier)
+                return _lookup(_PRIOR_NAMESPACE, identifier)
+
+            self.raw_identifiers.append(identifier)
+            node.args[0] = _lookup(_RAW_NAMESPACE, identifier)
+            return node
+
+        self.generic_visit(node)
+        return node
+
+
+_COMPARISON_BOUNDS = {
+    ast.Gt: ("lower", False),
+    ast.GtE: ("lower", True),
+    ast.Lt: ("upper", False),
+    ast.LtE: ("upper", True),
+}
+_FLIPPED = {ast.Gt: ast.Lt, ast.GtE: ast.LtE, ast.Lt: ast.Gt, ast.LtE: ast.GtE, ast.Eq: ast.Eq}
+
+
+def _number(node: ast.AST) -> Optional[float]:
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+        value = _number(node.operand)
+        return None if value is None else (-value if isinstance(node.op, ast.USub) else value)
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        return float(node.value)
+    return None
+
+
+def _comparison_interval(left: ast.AST, op: ast.cmpop, right: ast.AST) -> Optional[Interval]:
+    """Interval for a single comparison between an identifier and a number."""
+    op_type = type(op)
+    if isinstance(right, ast.Name) and not isinstance(left, ast.Name):
+        left, right = right, left
+        op_type = _FLIPPED.get(op_type)
+
+    value = _number(right)
+    if not isinstance(left, ast.Name) or left.id.startswith("__") or value is None or op_type not in _FLIPPED:
+        # Placeholder names (cross-series references) are not items of the submission
+        return None
+
+    if op_type is ast.Eq:
+        return Interval(left.id, value, True, value, True)
+    side, inclusive = _COMPARISON_BOUNDS[op_type]
+    if side == "lower":
+        return Interval(left.id, lower=value, lower_inclusive=inclusive)
+    return Interval(left.id, upper=value, upper_inclusive=inclusive)
+
+
+def _interval(node: ast.AST) -> Optional[Interval]:
+    """
+    Reduce a definition to bounds on a single identifier, if it is one.
+
+    Handles comparisons against numbers (X > 0, 0 <= X <= 100) and
+    conjunctions of them on the same identifier.
+    """
+    if isinstance(node, ast.BoolOp) and isinstance(node.op, ast.And):
+        parts = [_interval(value) for value in node.values]
+    elif isinstance(node, ast.Compare):
+        operands = [node.left] + node.comparators
+        parts = [
+            _comparison_interval(left, op, right)
+            for op, left, right in zip(node.ops, operands, operands[1:])
+        ]
+    else:
+        return None
+
+    if any(part is None for part in parts) or len({part.identifier for part in parts}) != 1:
+        return None
+
+    interval = parts[0]
+    for part in parts[1:]:
+        interval = interval.intersect(part)
+    return interval
+
+
+def _lookup(namespace: str, identifier: str) -> ast.Subscript:
+    return ast.Subscript(
+        value=ast.Name(id=namespace, ctx=ast.Load()),
+        slice=ast.Constant(value=identifier),
+        ctx=ast.Load()
+    )
+
+
+def evaluation_namespace(values: Dict[str, Any], raw_values: Dict[str, str],
+                         prior_values: Optional[Dict[str, Any]] = None,
+                         cross_values: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """Build the lookup rule expressions are evaluated against."""
+    namespace = dict(values)
+    namespace[_RAW_NAMESPACE] = raw_values
+    namespace[_PRIOR_NAMESPACE] = prior_values or {}
+    namespace[_CROSS_NAMESPACE] = {
+        f"{series}:{identifier}": value
+        for series, series_values in (cross_values or {}).items()
+        for identifier, value in series_values.items()
+    }
+    namespace.update(RULE_FUNCTIONS)
+    namespace.update(RAW_FUNCTIONS)
+    return namespace
+
+
+class CompiledRule:
+    """A validation rule compiled into an executable expression."""
+
+    def __init__(self, rule_id: int, rule_name: str, rule_type: str, rule_definition: str,
+                 severity: str = "error", effective_date: Optional[date] = None,
+                 end_date: Optional[date] = None, version: int = 1,
+                 priority: int = 100):
+        self.rule_id = rule_id
+        self.version = version or 1
+        self.priority = 100 if priority is None else priority
+        self.rule_name = rule_name
+        self.rule_type = rule_type
+        self.rule_definition = rule_definition
+        self.severity = severity or "error"
+        self.effective_date = effective_date
+        self.end_date = end_date
+
+        # Message templates shared by every finding of this rule
+        self.failed_template = escape_template(f"{rule_name}: {rule_definition}")
+        self.error_template = escape_template(f"{rule_name}: rule could not be evaluated") + " ({error})"
+
+        # Cross-series references are not valid Python, so they are swapped
+        # for placeholder names before parsing
+        cross_references = {}
+
+        def placeholder(match: "re.Match") -> str:
+            name = f"__cross_{len(cross_references)}"
+            cross_references[name] = f"{match.group(1).upper()}:{match.group(2)}"
+            return name
+
+        expression = _CROSS_REFERENCE.sub(placeholder, _normalize_definition(rule_definition))
+
+        try:
+            tree = ast.parse(expression, mode="eval")
+        except SyntaxError as e:
+            raise RuleCompilationError(f"Invalid rule definition '{rule_definition}': {e.msg}")
+
+        functions = set(RULE_FUNCTIONS) | VALUE_FUNCTIONS
+        for node in ast.walk(tree):
+            if not isinstance(node, _ALLOWED_NODES):
+                raise RuleCompilationError(
+                    f"Unsupported syntax in rule definition '{rule_definition}': {type(node).__name__}"
+                )
+            if isinstance(node, ast.Call) and (
+                not isinstance(node.func, ast.Name) or node.func.id not in functions
+            ):
+                raise RuleCompilationError(f"Unknown function in rule definition '{rule_definition}'")
+
+        # Range rules that only bound one identifier are checked through a BoundsTable
+        self.interval = _interval(tree.body) if rule_type == "range" else None
+
+        transformer = _ValueReferenceTransformer(cross_references)
+        tree = ast.fix_missing_locations(transformer.visit(tree))
+
+        # Identifiers in order of appearance, excluding function and namespace names
+        identifiers = []
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Name) and node.id not in functions and not node.id.startswith("__"):
+                if node.id not in identifiers:
+                    identifiers.append(node.id)
+        for identifier in transformer.raw_identifiers:
+            if identifier not in identifiers:
+                identifiers.append(identifier)
+
+        self.identifiers = tuple(identifiers)
+        self.prior_identifiers = tuple(dict.fromkeys(transformer.prior_identifiers))
+        self.cross_references = tuple(dict.fromkeys(cross_references.values()))
+        self.field_identifier = (self.identifiers + self.prior_identifiers + self.cross_references + ("",))[0]
+        self._code = compile(tree, f"<rule {rule_id}>", "eval")
+
+    @classmethod
+    def from_spec(cls, spec: Dict[str, Any]) -> "CompiledRule":
+        return cls(**spec)
+
+    def is_effective(self, reporting_date: Optional[date]) -> bool:
+        """Check whether the rule applies to the given reporting date."""
+        if reporting_date is None:
+            return True
+        if self.effective_date and reporting_date < self.effective_date:
+            return False
+        if self.end_date and reporting_date >= self.end_date:
+            return False
+        return True
+
+    @property
+    def is_historical(self) -> bool:
+        return bool(self.prior_identifiers)
+
+    @property
+    def cross_series(self) -> set:
+        """Keys of the other series this rule reads values from."""
+        return {reference.split(":", 1)[0] for reference in self.cross_references}
+
+    def memo_key(self, raw_values: Dict[str, str], prior_values: Optional[Dict[str, Any]] = None,
+                 cross_values: Optional[Dict[str, Dict[str, Any]]] = None) -> MemoKey:
+        """Key of this rule's outcome: the rule version and a hash of every value it reads."""
+        inputs = [raw_values.get(identifier) for identifier in self.identifiers]
+        inputs += [(prior_values or {}).get(identifier) for identifier in self.prior_identifiers]
+        for reference in self.cross_references:
+            series, identifier = reference.split(":", 1)
+            inputs.append(((cross_values or {}).get(series) or {}).get(identifier))
+        digest = hashlib.sha256(json.dumps(inputs, default=str).encode()).hexdigest()
+        return (self.rule_id, self.version, digest)
+
+    def evaluate(self, values: Dict[str, Any], raw_values: Dict[str, str],
+                 prior_values: Optional[Dict[str, Any]] = None,
+                 cross_values: Optional[Dict[str, Dict[str, Any]]] = None,
+                 namespace: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Evaluate the rule against parsed and raw submission values.
+
+        cross_values holds the parsed values of counterpart submissions by
+        series key. namespace, if given, is a lookup built once with
+        evaluation_namespace() and shared by every rule evaluated against the
+        same submission. Returns a finding when the rule fails, or None when
+        it passes or does not apply.
+        """
+        if namespace is None:
+            namespace = evaluation_namespace(
+                {identifier: values[identifier] for identifier in self.identifiers if identifier in values},
+                raw_values, prior_values, cross_values
+            )
+
+        # Rule does not apply to submissions missing a referenced item
+        if any(identifier not in values for identifier in self.identifiers):
+            return None
+        # Historical rules do not apply without a prior-period value
+        if any(identifier not in namespace[_PRIOR_NAMESPACE] for identifier in self.prior_identifiers):
+            return None
+        # Cross-series rules do not apply until the counterpart reports the item
+        if any(reference not in namespace[_CROSS_NAMESPACE] for reference in self.cross_references):
+            return None
+
+        try:
+            passed = eval(self._code, {"__builtins__": {}}, namespace)
+        except (TypeError, ValueError, ZeroDivisionError) as e:
+            return self._finding(self.error_template, namespace, error=str(e))
+
+        if passed:
+            return None
+        return self._finding(self.failed_template, namespace)
+
+    def _finding(self, template: str, namespace: Dict[str, Any], **params: Any) -> Dict[str, Any]:
+        reported = [f"{identifier}={namespace[identifier]}" for identifier in self.identifiers]
+        reported += [
+            f"PRIOR({identifier})={namespace[_PRIOR_NAMESPACE][identifier]}"
+            for identifier in self.prior_identifiers
+        ]
+        reported += [
+            f"{reference}={namespace[_CROSS_NAMESPACE][reference]}"
+            for reference in self.cross_references
+        ]
+        if reported:
+            template += " ({values})"
+            params["values"] = ", ".join(reported)
+        return {
+            "rule_id": self.rule_id,
+            "field_identifier": self.field_identifier,
+            "message_template": template,
+            "message_params": params,
+            "severity": self.severity,
+        }
+
+
+class RunOptions:
+    """
+    Options that limit how much of a rule set a validation run evaluates.
+
+    - fail_fast stops at the first error-severity finding
+    - max_errors stops once that many findings have been recorded
+    - errors_only skips warning-severity rules
+    """
+
+    def __init__(self, fail_fast: bool = False, max_errors: Optional[int] = None, errors_only: bool = False):
+        self.fail_fast = fail_fast
+        self.max_errors = max_errors
+        self.errors_only = errors_only
+
+    def applies_to(self, rule: CompiledRule) -> bool:
+        return not self.errors_only or rule.severity == "error"
+
+    def should_stop(self, findings: List[Dict[str, Any]]) -> bool:
+        """Check whether a run with these findings has used up its error budget."""
+        if not findings:
+            return False
+        if self.fail_fast and findings[-1]["severity"] == "error":
+            return True
+        return bool(self.max_errors) and len(findings) >= self.max_errors
+
+    @property
+    def is_full_run(self) -> bool:
+        return not (self.fail_fast or self.max_errors or self.errors_only)
+
+
+class RuleBatch(NamedTuple):
+    """Rules of one priority, with the bounds of its range rules compiled for a vectorized pass."""
+    priority: int
+    rules: List[CompiledRule]
+    bounds: BoundsTable
+
+
+class ValidationEngine:
+    """
+    Evaluates a compiled rule set against submission values.
+
+    Rules run in batches of equal priority, lowest first. Within a batch the
+    range rules that bound a single item are compiled into one BoundsTable
+    and checked together in a vectorized pass, and the remaining rules are
+    evaluated against one lookup of the submission's values shared by the
+    whole run. metadata_checks, if given, runs the data type, valid values
+    and range checks derived from the MDRM dictionary ahead of every batch.
+
+    An error-severity finding gates its item: rules in later batches that
+    read the item are skipped, so historical and cross-series checks do not
+    run on values that already failed a basic check.
+    """
+
+    def __init__(self, rules: Iterable[CompiledRule], profiler: Optional[RuleProfiler] = None,
+                 metadata_checks: Optional[MDRMCheckPlan] = None):
+        # Sorting is stable, so rules of equal priority keep their order
+        self.rules = sorted(rules, key=lambda rule: rule.priority)
+        self.profiler = profiler
+        self.metadata_checks = metadata_checks
+        self.metadata_bounds = BoundsTable(metadata_checks.bound_rows()) if metadata_checks else None
+
+        self.batches = []
+        for priority, batch in groupby(self.rules, key=lambda rule: rule.priority):
+            batch = list(batch)
+            bounds = BoundsTable([
+                (rule.interval, rule, rule.severity, rule.effective_date, rule.end_date)
+                for rule in batch if rule.interval
+            ])
+            self.batches.append(RuleBatch(priority, batch, bounds))
+
+    @classmethod
+    def from_specs(cls, specs: Iterable[Dict[str, Any]], profiler: Optional[RuleProfiler] = None,
+                   metadata_checks: Optional[MDRMCheckPlan] = None) -> "ValidationEngine":
+        rules = []
+        for spec in specs:
+            try:
+                rules.append(CompiledRule.from_spec(spec))
+            except RuleCompilationError:
+                # Rules that cannot be compiled are rejected on create/update;
+                # skip any legacy definitions rather than failing the whole run
+                continue
+        return cls(rules, profiler, metadata_checks)
+
+    @property
+    def needs_prior_period(self) -> bool:
+        """Whether any rule compares against the prior period's submission."""
+        return any(rule.is_historical for rule in self.rules)
+
+    @property
+    def cross_series(self) -> set:
+        """Keys of the other series any rule reads values from."""
+        return set().union(*(rule.cross_series for rule in self.rules))
+
+    def memo_keys(self, raw_values: Dict[str, str], reporting_date: Optional[date] = None,
+                  prior_values: Optional[Dict[str, Any]] = None,
+                  cross_values: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[int, MemoKey]:
+        """Memo keys of the effective expression rules for a submission."""
+        return {
+            rule.rule_id: rule.memo_key(raw_values, prior_values, cross_values)
+            for rule in self.rules
+            if not rule.interval and rule.is_effective(reporting_date)
+        }
+
+    def _check_bounds(self, bounds: BoundsTable, values: Dict[str, Any], raw_values: Dict[str, str],
+                      reporting_date: Optional[date], options: RunOptions) -> List[Dict[str, Any]]:
+        """Check every bounded item at once and build findings for the rows that fail."""
+        violated, non_numeric = bounds.check(
+            values, reporting_date, {"error"} if options.errors_only else None
+        )
+        violated = set(violated.tolist())
+
+        findings = []
+        for row in sorted(violated | set(non_numeric.tolist())):
+            owner = bounds.owners[row]
+            if isinstance(owner, CompiledRule):
+                # Evaluating the rule itself keeps its messages, including
+                # the one for values that are not numeric
+                finding = owner.evaluate(values, raw_values)
+            elif row in violated:
+                interval = bounds.intervals[row]
+                finding = self.metadata_checks.range_finding(interval, raw_values[interval.identifier])
+            else:
+                # Non-numeric values are reported by the data type check
+                finding = None
+
+            if finding:
+                findings.append(finding)
+
+        return findings
+
+    def evaluate(self, raw_values: Dict[str, str], reporting_date: Optional[date] = None,
+                 prior_values: Optional[Dict[str, Any]] = None,
+                 progress: Optional[ProgressCallback] = None,
+                 options: Optional[RunOptions] = None,
+                 cross_values: Optional[Dict[str, Dict[str, Any]]] = None,
+                 memo: Optional[ResultMemo] = None) -> List[Dict[str, Any]]:
+        """
+        Evaluate all effective rules against a submission's values.
+
+        prior_values holds the parsed values of the prior period's submission and
+        is shared by every historical rule; cross_values holds the parsed values
+        of the counterpart submissions by series key. progress, if given, is called after
+        each rule with (rules evaluated, rules total, errors found, warnings found).
+        options can skip warning rules or stop the run early once its error
+        budget is used up. memo, if given, supplies the earlier outcome of
+        expression rules whose inputs are unchanged and records new outcomes.
+        """
+        options = options or RunOptions()
+        values = parse_values(raw_values)
+        namespace = evaluation_namespace(values, raw_values, prior_values, cross_values)
+        batches = [
+            (batch, [
+                rule for rule in batch.rules
+                if rule.is_effective(reporting_date) and options.applies_to(rule)
+            ])
+            for batch in self.batches
+        ]
+        rules_total = sum(len(rules) for _, rules in batches)
+
+        findings = []
+        timings = [] if self.profiler else None
+        # Items with an error-severity finding from an earlier batch
+        gated = set()
+
+        if self.metadata_checks:
+            def metadata_pass() -> List[Dict[str, Any]]:
+                return self.metadata_checks.evaluate(
+                    raw_values, reporting_date, {"error"} if options.errors_only else None
+                ) + self._check_bounds(self.metadata_bounds, values, raw_values, reporting_date, options)
+
+            if self._vector_pass(self.metadata_checks.rule_ids, metadata_pass, findings, timings, options):
+                return self._finish(findings, timings)
+            gated.update(finding["field_identifier"] for finding in findings if finding["severity"] == "error")
+
+        rules_evaluated = 0
+        errors_found = sum(finding["severity"] == "error" for finding in findings)
+        for batch, rules in batches:
+            batch_start = len(findings)
+            range_rules = [rule for rule in rules if rule.interval]
+            expression_rules = [rule for rule in rules if not rule.interval]
+
+            if range_rules:
+                bounded = values if not gated else {
+                    identifier: value for identifier, value in values.items() if identifier not in gated
+                }
+                stopped = self._vector_pass(
+                    [rule.rule_id for rule in range_rules],
+                    lambda: self._check_bounds(batch.bounds, bounded, raw_values, reporting_date, options),
+                    findings, timings, options
+                )
+                if stopped:
+                    return self._finish(findings, timings)
+
+                rules_evaluated += len(range_rules)
+                errors_found = sum(finding["severity"] == "error" for finding in findings)
+                if progress:
+                    progress(rules_evaluated, rules_total, errors_found, len(findings) - errors_found)
+
+            for rule in expression_rules:
+                rules_evaluated += 1
+                if gated.isdisjoint(rule.identifiers):
+                    memoized, finding = memo.lookup(rule.rule_id) if memo else (False, None)
+                    if not memoized:
+                        if timings is None:
+                            finding = rule.evaluate(values, raw_values, namespace=namespace)
+                        else:
+                            started = time.perf_counter()
+                            finding = rule.evaluate(values, raw_values, namespace=namespace)
+                            timings.append((rule.rule_id, time.perf_counter() - started, finding is not None))
+
+                        if memo:
+                            memo.record(rule.rule_id, finding)
+                else:
+                    # An item the rule reads already failed a higher-priority check
+                    finding = None
+
+                if finding:
+                    findings.append(finding)
+                    errors_found += finding["severity"] == "error"
+
+                if progress:
+                    progress(rules_evaluated, rules_total, errors_found, len(findings) - errors_found)
+
+                if finding and options.should_stop(findings):
+                    return self._finish(findings, timings)
+
+            gated.update(
+                finding["field_identifier"] for finding in findings[batch_start:] if finding["severity"] == "error"
+            )
+
+        return self._finish(findings, timings)
+
+    def _vector_pass(self, rule_ids: List[int], check: Callable[[], List[Dict[str, Any]]],
+                     findings: List[Dict[str, Any]], timings: Optional[list], options: RunOptions) -> bool:
+        """Run a vectorized check, adding its findings; returns whether the run should stop."""
+        started = time.perf_counter()
+        pass_findings = check()
+        if timings is not None and rule_ids:
+            # Each pass covers several rules, so its time is split between them
+            elapsed = (time.perf_counter() - started) / len(rule_ids)
+            fired = {finding["rule_id"] for finding in pass_findings}
+            timings.extend((rule_id, elapsed, rule_id in fired) for rule_id in rule_ids)
+
+        for finding in pass_findings:
+            findings.append(finding)
+            if options.should_stop(findings):
+                return True
+        return False
+
+    def _finish(self, findings: List[Dict[str, Any]], timings: Optional[list]) -> List[Dict[str, Any]]:
+        if timings:
+            # One locked update per submission rather than per rule
+            self.profiler.record(timings)
+        return findings
+
+
+def rule_spec(rule: ValidationRule) -> Dict[str, Any]:
+    """Convert a rule into a picklable spec that can be compiled in another process."""
+    return {
+        "rule_id": rule.id,
+        "rule_name": rule.rule_name,
+        "rule_type": rule.rule_type,
+        "rule_definition": rule.rule_definition,
+        "severity": rule.severity,
+        "effective_date": rule.effective_date,
+        "end_date": rule.end_date,
+        "version": rule.version,
+        "priority": rule.priority,
+    }
+
+
+def load_rule_specs(db: Session) -> List[Dict[str, Any]]:
+    """Load the specs of all expression rules, leaving out the MDRM metadata check rules."""
+    rules = db.query(ValidationRule).filter(
+        ValidationRule.rule_definition.notlike(f"{METADATA_PREFIX}%")
+    ).order_by(ValidationRule.priority, ValidationRule.id).all()
+    return [rule_spec(rule) for rule in rules]
+
+
+def validate_submission(db: Session, submission: DataSubmission,
+                        progress: Optional[ProgressCallback] = None,
+                        options: Optional[RunOptions] = None) -> List[Dict[str, Any]]:
+    """
+    Validate a single submission in-process.
+
+    A full run stores its findings as the submission's results. A limited
+    run (see RunOptions) only returns them as a preview, leaving the stored
+    results and the submission's validation status as they are.
+    """
+    options = options or RunOptions()
+    engine = ValidationEngine.from_specs(load_rule_specs(db), profiler, load_mdrm_check_plan(db))
+    values = load_submission_values(db, [submission.id])[submission.id]
+
+    prior_values = None
+    if engine.needs_prior_period:
+        prior_values = PriorPeriodLookup(db).values_for(submission)
+
+    cross_values = None
+    if engine.cross_series:
+        cross_values = CounterpartLookup(db, engine.cross_series).values_for(submission)
+
+    # Rules whose inputs are unchanged since an earlier run (e.g. of the filing
+    # an amendment replaces) reuse that run's outcome
+    memo = load_memo(db, engine.memo_keys(values, submission.reporting_date, prior_values, cross_values))
+    findings = engine.evaluate(
+        values, submission.reporting_date, prior_values, progress, options, cross_values, memo
+    )
+
+    save_memo(db, memo)
+    if options.is_full_run:
+        replace_results(db, {submission.id: findings})
+    else:
+        db.commit()
+    profiler.maybe_flush(db)
+    db.refresh(submission)
+
+    return findings
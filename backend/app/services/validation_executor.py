@@ -0,0 +1,300 @@
+import multiprocessing
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import date
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..models.data_submission import DataSubmission
+from .cross_series import CounterpartLookup
+from .mdrm_checks import MDRMCheckPlan, load_mdrm_check_plan
+from .prior_period import PriorPeriodLookup
+from .result_memo import MemoKey, ResultMemo, load_memos, prune_memo, save_outcomes
+from .rule_profiler import profiler
+from .rule_pushdown import run_pushdown_rules, split_pushdown_rules
+from .submission_data import load_submission_values
+from .validation_engine import RunOptions, ValidationEngine, load_rule_specs
+from .validation_results import replace_results
+
+# Engine compiled once per worker process by the pool initializer
+_worker_engine: Optional[ValidationEngine] = None
+_worker_options: Optional[RunOptions] = None
+
+# (submission id, reporting date, reported values, prior-period values, counterpart values, memo)
+Shard = List[Tuple[
+    int, Optional[date], Dict[str, str], Optional[Dict[str, Any]], Optional[Dict[str, Any]], Optional[ResultMemo]
+]]
+
+# Outcomes recorded by the memos of a shard, stored by the parent process
+MemoOutcomes = Dict[MemoKey, Optional[Dict[str, Any]]]
+
+
+def _init_worker(rule_specs: List[Dict[str, Any]], options: Optional[RunOptions], profile: bool,
+                 metadata_checks: Optional[MDRMCheckPlan] = None) -> None:
+    """Compile the rule set once when a worker process starts."""
+    global _worker_engine, _worker_options
+    _worker_engine = ValidationEngine.from_specs(rule_specs, profiler if profile else None, metadata_checks)
+    _worker_options = options
+
+
+def _validate_shard(shard: Shard) -> Tuple[Dict[int, List[Dict[str, Any]]], MemoOutcomes, Dict[int, Dict[str, Any]]]:
+    """
+    Validate a shard of submissions inside a worker process.
+
+    Returns the findings per submission along with the outcomes newly
+    recorded in the submissions' memos and the rule statistics collected in
+    the worker, which the parent stores and merges into its profiler.
+    """
+    results = {}
+    outcomes = {}
+    for submission_id, reporting_date, values, prior_values, cross_values, memo in shard:
+        results[submission_id] = _worker_engine.evaluate(
+            values, reporting_date, prior_values, options=_worker_options, cross_values=cross_values, memo=memo
+        )
+        if memo:
+            outcomes.update(memo.added)
+    return results, outcomes, profiler.drain()
+
+
+class ValidationExecutor:
+    """
+    Process pool for validating many submissions in parallel.
+
+    The rule set is shipped to each worker once through the pool initializer;
+    submissions are then sent in shards and results are yielded back as each
+    shard completes.
+    """
+
+    def __init__(self, rule_specs: List[Dict[str, Any]], max_workers: Optional[int] = None,
+                 options: Optional[RunOptions] = None, profile: bool = True,
+                 metadata_checks: Optional[MDRMCheckPlan] = None):
+        self.max_workers = max_workers or settings.VALIDATION_WORKERS
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(rule_specs, options, profile, metadata_checks)
+        )
+
+    def __enter__(self) -> "ValidationExecutor":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.shutdown()
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+    def map_shards(self, shards: Iterator[Shard]) -> Iterator[Tuple[Dict[int, List[Dict[str, Any]]], MemoOutcomes]]:
+        """
+        Validate shards and yield their results and new memo outcomes as they complete.
+
+        At most two shards per worker are in flight, so shards can be loaded
+        lazily without holding the whole backlog in memory.
+        """
+        max_in_flight = self.max_workers * 2
+        in_flight = set()
+
+        for shard in shards:
+            in_flight.add(self._pool.submit(_validate_shard, shard))
+            if len(in_flight) >= max_in_flight:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                yield from self._collect(done)
+
+        while in_flight:
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            yield from self._collect(done)
+
+    @staticmethod
+    def _collect(done) -> Iterator[Tuple[Dict[int, List[Dict[str, Any]]], MemoOutcomes]]:
+        for future in done:
+            results, outcomes, rule_stats = future.result()
+            profiler.merge(rule_stats)
+            yield results, outcomes
+
+
+def _load_shards(db: Session, submissions: List[Any], shard_size: int,
+                 prior_lookup: Optional[PriorPeriodLookup] = None,
+                 should_stop: Optional[Callable[[], bool]] = None,
+                 counterpart_lookup: Optional[CounterpartLookup] = None,
+                 memo_engine: Optional[ValidationEngine] = None) -> Iterator[Shard]:
+    """
+    Load submission values one shard at a time with a single query per shard.
+
+    When a prior-period lookup is given, each submission's prior values are
+    resolved through it so they are cached for the whole batch; counterparts
+    for cross-series rules are resolved for the whole shard at once. When
+    memo_engine is given, the memoized outcomes of its rules are loaded for
+    the whole shard with one more query. Loading stops early once
+    should_stop returns True.
+    """
+    for start in range(0, len(submissions), shard_size):
+        if should_stop and should_stop():
+            return
+
+        batch = submissions[start:start + shard_size]
+        values = load_submission_values(db, [submission.id for submission in batch])
+        if counterpart_lookup:
+            counterpart_lookup.prefetch(batch)
+
+        inputs = [
+            (
+                submission.id,
+                submission.reporting_date,
+                values[submission.id],
+                prior_lookup.values_for(submission) if prior_lookup else None,
+                counterpart_lookup.values_for(submission) if counterpart_lookup else None
+            )
+            for submission in batch
+        ]
+
+        memos = {}
+        if memo_engine:
+            memos = load_memos(db, {
+                submission_id: memo_engine.memo_keys(submission_values, reporting_date, prior_values, cross_values)
+                for submission_id, reporting_date, submission_values, prior_values, cross_values in inputs
+            })
+
+        yield [(*submission_inputs, memos.get(submission_inputs[0])) for submission_inputs in inputs]
+
+
+def load_submission_rows(db: Session, query) -> List[Any]:
+    """
+    Load the submission columns needed for batch validation.
+
+    Plain rows rather than ORM instances are used, since instances would
+    expire on each shard commit.
+    """
+    return query.with_entities(
+        DataSubmission.id,
+        DataSubmission.institution_id,
+        DataSubmission.report_series_id,
+        DataSubmission.reporting_date
+    ).order_by(DataSubmission.id).all()
+
+
+def iter_results(db: Session, submissions: List[Any], rule_specs: List[Dict[str, Any]],
+                 max_workers: Optional[int] = None, shard_size: Optional[int] = None,
+                 options: Optional[RunOptions] = None,
+                 should_stop: Optional[Callable[[], bool]] = None,
+                 profile: bool = True,
+                 metadata_checks: Optional[MDRMCheckPlan] = None,
+                 memoize: bool = False) -> Iterator[Dict[int, List[Dict[str, Any]]]]:
+    """
+    Evaluate a rule set against submissions across a process pool.
+
+    Yields {submission id: findings} per shard as shards complete.
+    profile=False keeps the rules out of the rule statistics, e.g. for
+    candidate rules. metadata_checks adds the MDRM data type and valid
+    values checks.
+
+    memoize reuses the memoized outcomes of rules whose inputs are
+    unchanged, as validate_submission does, and stores the new outcomes
+    without committing them; otherwise nothing is persisted. It applies to
+    stored rules only, since candidate rules have no settled version.
+    """
+    shard_size = shard_size or settings.VALIDATION_SHARD_SIZE
+
+    engine = ValidationEngine.from_specs(rule_specs)
+    prior_lookup = PriorPeriodLookup(db) if engine.needs_prior_period else None
+    counterpart_lookup = CounterpartLookup(db, engine.cross_series) if engine.cross_series else None
+
+    executor = ValidationExecutor(
+        rule_specs, max_workers=max_workers, options=options, profile=profile, metadata_checks=metadata_checks
+    )
+    with executor:
+        shards = _load_shards(
+            db, submissions, shard_size, prior_lookup, should_stop, counterpart_lookup, engine if memoize else None
+        )
+        for results, outcomes in executor.map_shards(shards):
+            save_outcomes(db, outcomes)
+            yield results
+
+
+def validate_submissions(db: Session, submission_ids: List[int], max_workers: Optional[int] = None,
+                         shard_size: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Validate many submissions across a process pool and bulk insert the results.
+
+    Single-item range and format rules are evaluated in SQL over all the
+    submissions at once, and only the remaining rules are sent to the pool.
+    Limited runs go through preview_submissions instead. Returns summary
+    statistics for the run; rows_per_second covers the rows written by
+    both paths over the time spent writing them.
+    """
+    started = time.perf_counter()
+    max_workers = max_workers or settings.VALIDATION_WORKERS
+
+    submissions = load_submission_rows(
+        db, db.query(DataSubmission).filter(DataSubmission.id.in_(submission_ids))
+    )
+
+    db.query(DataSubmission).filter(DataSubmission.id.in_(submission_ids)).update(
+        {DataSubmission.validation_status: "in_progress"}, synchronize_session=False
+    )
+    db.commit()
+
+    pushdown_rules, rule_specs = split_pushdown_rules(load_rule_specs(db))
+
+    findings_count = 0
+    write_seconds = 0.0
+    results_iter = iter_results(
+        db, submissions, rule_specs, max_workers=max_workers, shard_size=shard_size,
+        metadata_checks=load_mdrm_check_plan(db), memoize=True
+    )
+    for results in results_iter:
+        write_stats = replace_results(db, results)
+        findings_count += write_stats["inserted"]
+        write_seconds += write_stats["elapsed_seconds"]
+
+    # Runs after replace_results, which has already cleared the open results.
+    # Its INSERT ... SELECT statements both evaluate and write, so they are
+    # timed as writes of their own
+    pushdown_started = time.perf_counter()
+    pushdown_count = run_pushdown_rules(db, pushdown_rules, [submission.id for submission in submissions])
+    write_seconds += time.perf_counter() - pushdown_started
+
+    # Drop outcomes stored for rule versions that were superseded during the run
+    prune_memo(db, [spec["rule_id"] for spec in rule_specs])
+    db.commit()
+
+    profiler.maybe_flush(db)
+
+    return {
+        "submissions": len(submissions),
+        "findings": findings_count + pushdown_count,
+        "workers": max_workers,
+        "pushdown_rules": len(pushdown_rules),
+        "pushdown_findings": pushdown_count,
+        "elapsed_seconds": round(time.perf_counter() - started, 3),
+        "rows_per_second": round((findings_count + pushdown_count) / write_seconds) if write_seconds else None,
+    }
+
+
+def preview_submissions(db: Session, submission_ids: List[int], options: RunOptions,
+                        max_workers: Optional[int] = None,
+                        shard_size: Optional[int] = None) -> Dict[int, List[Dict[str, Any]]]:
+    """
+    Run a limited validation of many submissions across a process pool.
+
+    Limited runs stop per submission, so every rule stays in the engine.
+    Their findings are returned by submission ID rather than stored, so the
+    submissions' results and validation statuses are left as they are.
+    """
+    submissions = load_submission_rows(
+        db, db.query(DataSubmission).filter(DataSubmission.id.in_(submission_ids))
+    )
+
+    previews = {}
+    for results in iter_results(
+        db, submissions, load_rule_specs(db), max_workers=max_workers or settings.VALIDATION_WORKERS,
+        shard_size=shard_size, options=options, metadata_checks=load_mdrm_check_plan(db), memoize=True
+    ):
+        previews.update(results)
+    db.commit()
+
+    profiler.maybe_flush(db)
+
+    return previews
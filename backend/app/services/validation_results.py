@@ -0,0 +1,114 @@
+import json
+import logging
+import time
+from typing import Any, Dict, List
+
+from sqlalchemy import delete, insert, update
+from sqlalchemy.orm import Session
+
+from ..models.data_submission import DataSubmission
+from ..models.validation_result import ValidationResult
+from .messages import template_ids
+from .report_cache import invalidate_reports
+from .data_quality import refresh_quality_cube
+from .validation_summaries import refresh_summaries
+
+logger = logging.getLogger(__name__)
+
+
+def validation_status_for(findings: List[Dict[str, Any]]) -> str:
+    """Derive a submission's validation status from its findings."""
+    severities = {finding["severity"] for finding in findings}
+    if "error" in severities:
+        return "failed"
+    if "warning" in severities:
+        return "warning"
+    return "passed"
+
+
+def replace_results(db: Session, results: Dict[int, List[Dict[str, Any]]]) -> Dict[str, Any]:
+    """
+    Replace the open validation results of the given submissions.
+
+    Prior open results are removed with one set-based delete and the new
+    findings are written with one bulk insert, in a single transaction that
+    also refreshes the submissions' validation summaries. Each row stores a
+    shared message template ID and the finding's parameters rather than the
+    full message. Waived and resolved results are kept, and findings that
+    were waived earlier are not reopened.
+
+    Returns write statistics, including rows written per second.
+    """
+    started = time.perf_counter()
+    submission_ids = list(results)
+
+    waived = set(db.query(
+        ValidationResult.submission_id,
+        ValidationResult.rule_id,
+        ValidationResult.field_identifier
+    ).filter(
+        ValidationResult.submission_id.in_(submission_ids),
+        ValidationResult.status == "waived"
+    ))
+
+    deleted = db.execute(
+        delete(ValidationResult).where(
+            ValidationResult.submission_id.in_(submission_ids),
+            ValidationResult.status == "open"
+        ).execution_options(synchronize_session=False)
+    ).rowcount
+
+    templates = template_ids(db, {
+        finding["message_template"] for findings in results.values() for finding in findings
+    })
+
+    rows = []
+    by_status = {}
+    for submission_id, findings in results.items():
+        findings = [
+            finding for finding in findings
+            if (submission_id, finding["rule_id"], finding["field_identifier"]) not in waived
+        ]
+        rows.extend(
+            {
+                "submission_id": submission_id,
+                "rule_id": finding["rule_id"],
+                "field_identifier": finding["field_identifier"],
+                "message_template_id": templates[finding["message_template"]],
+                "message_params": json.dumps(finding["message_params"]),
+                "severity": finding["severity"],
+                "status": "open",
+            }
+            for finding in findings
+        )
+        by_status.setdefault(validation_status_for(findings), []).append(submission_id)
+
+    if rows:
+        db.execute(insert(ValidationResult), rows)
+
+    # One status update per outcome rather than per submission
+    for validation_status, ids in by_status.items():
+        db.execute(
+            update(DataSubmission).where(DataSubmission.id.in_(ids)).values(
+                validation_status=validation_status
+            ).execution_options(synchronize_session=False)
+        )
+
+    refresh_summaries(db, submission_ids)
+    refresh_quality_cube(db, submission_ids)
+    invalidate_reports(db, submission_ids)
+    db.commit()
+
+    elapsed = time.perf_counter() - started
+    rows_per_second = round(len(rows) / elapsed) if elapsed else None
+    logger.info(
+        "Replaced validation results for %d submissions: %d deleted, %d inserted (%s rows/s)",
+        len(submission_ids), deleted, len(rows), rows_per_second
+    )
+
+    return {
+        "deleted": deleted,
+        "inserted": len(rows),
+        "elapsed_seconds": elapsed,
+        "rows_per_second": rows_per_second,
+    }
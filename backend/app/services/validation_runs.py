@@ -0,0 +1,305 @@
+import json
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..core.database import SessionLocal
+from ..models.data_submission import DataSubmission
+from ..models.validation_result import ValidationResult
+from ..models.validation_run import ValidationRun
+from ..models.user import User
+from .jobs import JobQueue
+from .messages import finding_message
+from .validation_engine import RunOptions, load_rule_specs, validate_submission
+from .validation_executor import preview_submissions, validate_submissions
+
+# Worker pool for background validation runs
+validation_queue = JobQueue("validation", settings.VALIDATION_JOB_WORKERS)
+
+# Session factory used by background runs and event streams
+session_factory = SessionLocal
+
+_FINISHED_STATUSES = ("completed", "failed")
+
+
+def _preview(findings: List[Dict[str, Any]]) -> str:
+    """Serialize the findings of a limited run for its run record."""
+    return json.dumps([
+        {
+            "rule_id": finding["rule_id"],
+            "field_identifier": finding["field_identifier"],
+            "severity": finding["severity"],
+            "error_message": finding_message(finding),
+        }
+        for finding in findings
+    ])
+
+
+def start_validation_run(db: Session, submission: DataSubmission, user: Optional[User] = None,
+                         options: Optional[RunOptions] = None) -> ValidationRun:
+    """
+    Create a validation run record and queue it for background execution.
+
+    Only a full run marks the submission in progress, since a limited run
+    leaves its results and validation status as they are.
+
+    Returns the queued run immediately.
+    """
+    options = options or RunOptions()
+    run = ValidationRun(
+        submission_id=submission.id,
+        triggered_by=user.id if user else None,
+        status="queued",
+        fail_fast=options.fail_fast,
+        max_errors=options.max_errors,
+        errors_only=options.errors_only
+    )
+    if options.is_full_run:
+        submission.validation_status = "in_progress"
+    db.add(run)
+    db.commit()
+    db.refresh(run)
+
+    validation_queue.submit(execute_validation_run, run.id)
+
+    return run
+
+
+def execute_validation_run(run_id: int) -> None:
+    """Execute a queued validation run, recording progress on the run record."""
+    db = session_factory()
+    try:
+        run = db.query(ValidationRun).filter(ValidationRun.id == run_id).first()
+        if not run:
+            return
+
+        run.status = "running"
+        run.started_at = datetime.now()
+        db.commit()
+
+        last_flush = time.monotonic()
+
+        def record_progress(rules_evaluated: int, rules_total: int, errors_found: int, warnings_found: int) -> None:
+            nonlocal last_flush
+            run.rules_evaluated = rules_evaluated
+            run.rules_total = rules_total
+            run.errors_found = errors_found
+            run.warnings_found = warnings_found
+
+            # Throttle progress writes so they don't dominate the run
+            if time.monotonic() - last_flush >= settings.VALIDATION_PROGRESS_INTERVAL:
+                db.commit()
+                last_flush = time.monotonic()
+
+        options = RunOptions(
+            fail_fast=run.fail_fast,
+            max_errors=run.max_errors,
+            errors_only=run.errors_only
+        )
+
+        try:
+            findings = validate_submission(db, run.submission, progress=record_progress, options=options)
+        except Exception as e:
+            db.rollback()
+            run.status = "failed"
+            run.error_detail = str(e)
+            if options.is_full_run:
+                run.submission.validation_status = "pending"
+        else:
+            run.status = "completed"
+            run.stopped_early = run.rules_evaluated < run.rules_total
+            if not options.is_full_run:
+                run.preview = _preview(findings)
+
+        run.finished_at = datetime.now()
+        db.commit()
+    finally:
+        db.close()
+
+
+def start_batch_validation_run(db: Session, submissions: List[DataSubmission], user: Optional[User] = None,
+                               options: Optional[RunOptions] = None,
+                               max_workers: Optional[int] = None) -> List[ValidationRun]:
+    """
+    Create a validation run record for each submission and queue them as one
+    background batch, validated together across the process pool. As with
+    single runs, only a full batch marks the submissions in progress.
+
+    Returns the queued runs immediately.
+    """
+    options = options or RunOptions()
+    runs = []
+    for submission in submissions:
+        runs.append(ValidationRun(
+            submission_id=submission.id,
+            triggered_by=user.id if user else None,
+            status="queued",
+            fail_fast=options.fail_fast,
+            max_errors=options.max_errors,
+            errors_only=options.errors_only
+        ))
+        if options.is_full_run:
+            submission.validation_status = "in_progress"
+    db.add_all(runs)
+    db.commit()
+
+    validation_queue.submit(execute_batch_validation_run, [run.id for run in runs], max_workers)
+
+    return runs
+
+
+def execute_batch_validation_run(run_ids: List[int], max_workers: Optional[int] = None) -> None:
+    """
+    Execute queued validation runs as one batch, recording the outcome on each run record.
+
+    The runs finish together, since rules evaluated in SQL cover every
+    submission of the batch once the process pool is done.
+    """
+    db = session_factory()
+    try:
+        runs = db.query(ValidationRun).filter(ValidationRun.id.in_(run_ids)).all()
+        if not runs:
+            return
+
+        started_at = datetime.now()
+        for run in runs:
+            run.status = "running"
+            run.started_at = started_at
+        db.commit()
+
+        options = RunOptions(
+            fail_fast=runs[0].fail_fast,
+            max_errors=runs[0].max_errors,
+            errors_only=runs[0].errors_only
+        )
+        submission_ids = [run.submission_id for run in runs]
+
+        try:
+            if options.is_full_run:
+                validate_submissions(db, submission_ids, max_workers=max_workers)
+                previews = None
+            else:
+                previews = preview_submissions(db, submission_ids, options, max_workers=max_workers)
+        except Exception as e:
+            db.rollback()
+            if options.is_full_run:
+                db.query(DataSubmission).filter(DataSubmission.id.in_(submission_ids)).update(
+                    {DataSubmission.validation_status: "pending"}, synchronize_session=False
+                )
+            for run in runs:
+                run.status = "failed"
+                run.error_detail = str(e)
+        else:
+            rules_total = len(load_rule_specs(db))
+            if previews is None:
+                findings = db.query(
+                    ValidationResult.submission_id, ValidationResult.severity, func.count(ValidationResult.id)
+                ).filter(
+                    ValidationResult.submission_id.in_(submission_ids),
+                    ValidationResult.status == "open"
+                ).group_by(ValidationResult.submission_id, ValidationResult.severity)
+                counts = {(submission_id, severity): count for submission_id, severity, count in findings}
+            else:
+                counts = Counter(
+                    (submission_id, finding["severity"])
+                    for submission_id, findings in previews.items() for finding in findings
+                )
+
+            for run in runs:
+                run.status = "completed"
+                run.rules_total = run.rules_evaluated = rules_total
+                run.errors_found = counts.get((run.submission_id, "error"), 0)
+                run.warnings_found = counts.get((run.submission_id, "warning"), 0)
+                if previews is not None:
+                    findings = previews.get(run.submission_id, [])
+                    run.stopped_early = options.should_stop(findings)
+                    run.preview = _preview(findings)
+
+        finished_at = datetime.now()
+        for run in runs:
+            run.finished_at = finished_at
+        db.commit()
+    finally:
+        db.close()
+
+
+def fail_interrupted_runs(db: Session) -> int:
+    """
+    Fail the runs left queued or running by a server that stopped, e.g. on
+    startup, since their jobs went with the server's worker pool.
+
+    Submissions a full run had marked in progress go back to pending, so
+    they can be validated again. Returns the number of runs failed.
+    """
+    runs = db.query(ValidationRun).filter(ValidationRun.status.in_(("queued", "running"))).all()
+    if not runs:
+        return 0
+
+    finished_at = datetime.now()
+    for run in runs:
+        run.status = "failed"
+        run.error_detail = "Interrupted by a server restart"
+        run.finished_at = finished_at
+
+    db.query(DataSubmission).filter(
+        DataSubmission.id.in_({run.submission_id for run in runs}),
+        DataSubmission.validation_status == "in_progress"
+    ).update({DataSubmission.validation_status: "pending"}, synchronize_session=False)
+    db.commit()
+    return len(runs)
+
+
+def _run_event(run: ValidationRun) -> str:
+    """Format a run's progress as a Server-Sent Event."""
+    data = {
+        "run_id": run.id,
+        "submission_id": run.submission_id,
+        "status": run.status,
+        "rules_total": run.rules_total,
+        "rules_evaluated": run.rules_evaluated,
+        "errors_found": run.errors_found,
+        "warnings_found": run.warnings_found,
+        "elapsed_seconds": run.elapsed_seconds,
+        "stopped_early": run.stopped_early,
+        "validation_status": run.submission.validation_status,
+    }
+    event = "done" if run.status in _FINISHED_STATUSES else "progress"
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def stream_run_events(run_id: int) -> Iterator[str]:
+    """
+    Stream a run's progress as Server-Sent Events until it finishes.
+
+    Progress is read from the persistent run record, so the stream works
+    regardless of which worker executes the run.
+    """
+    last_event = None
+    while True:
+        db = session_factory()
+        try:
+            run = db.query(ValidationRun).filter(ValidationRun.id == run_id).first()
+            if not run:
+                return
+
+            event = _run_event(run)
+            finished = run.status in _FINISHED_STATUSES
+        finally:
+            db.close()
+
+        if event != last_event:
+            yield event
+            last_event = event
+        elif not finished:
+            # Keep the connection alive through proxies
+            yield ": keep-alive\n\n"
+
+        if finished:
+            return
+
+        time.sleep(settings.VALIDATION_PROGRESS_INTERVAL)
@@ -0,0 +1,69 @@
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import delete, func, insert
+from sqlalchemy.orm import Session
+
+from ..models.data_submission import DataSubmission
+from ..models.validation_result import ValidationResult
+from ..models.validation_summary import ValidationSummary
+
+# Summary column for each (result status, severity) pair
+SUMMARY_COLUMNS = {
+    ("open", "error"): "open_errors",
+    ("open", "warning"): "open_warnings",
+    ("resolved", "error"): "resolved_errors",
+    ("resolved", "warning"): "resolved_warnings",
+    ("waived", "error"): "waived_errors",
+    ("waived", "warning"): "waived_warnings",
+}
+
+
+def refresh_summaries(db: Session, submission_ids: Optional[Iterable[int]] = None) -> int:
+    """
+    Recompute the validation summaries of the given submissions, or of all
+    submissions when no IDs are given.
+
+    Counts come from one grouped query and the summaries are rewritten with
+    one delete and one bulk insert. Nothing is committed, so callers refresh
+    summaries inside the transaction that changed the results.
+
+    Returns the number of summaries written.
+    """
+    if submission_ids is None:
+        submission_ids = [row[0] for row in db.query(DataSubmission.id)]
+    submission_ids = list(set(submission_ids))
+    if not submission_ids:
+        return 0
+
+    # Write pending result changes so the counts include them
+    db.flush()
+
+    summaries: Dict[int, Dict[str, int]] = {
+        submission_id: {"submission_id": submission_id, **{column: 0 for column in SUMMARY_COLUMNS.values()}}
+        for submission_id in submission_ids
+    }
+    counts = db.query(
+        ValidationResult.submission_id,
+        ValidationResult.status,
+        ValidationResult.severity,
+        func.count(ValidationResult.id)
+    ).filter(
+        ValidationResult.submission_id.in_(submission_ids)
+    ).group_by(
+        ValidationResult.submission_id,
+        ValidationResult.status,
+        ValidationResult.severity
+    )
+    for submission_id, result_status, severity, count in counts:
+        column = SUMMARY_COLUMNS.get((result_status, severity or "error"))
+        if column:
+            summaries[submission_id][column] += count
+
+    db.execute(
+        delete(ValidationSummary).where(
+            ValidationSummary.submission_id.in_(submission_ids)
+        ).execution_options(synchronize_session=False)
+    )
+    db.execute(insert(ValidationSummary), list(summaries.values()))
+
+    return len(summaries)
@@ -0,0 +1,26 @@
+"""Baseline: the schema created by init_db before migrations were introduced
+
+Databases created before then have no alembic_version table; init_db
+stamps them with this revision before upgrading them.
+
+Revision ID: 0001
+Revises:
+Create Date: 2024-06-03 00:00:00
+
+"""
+from typing import Sequence, Union
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    pass
+
+
+def downgrade() -> None:
+    pass
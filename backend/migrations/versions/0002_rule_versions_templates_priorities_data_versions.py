@@ -0,0 +1,60 @@
+"""Add columns to tables that existed before migrations
+
+- validation_rules: version, priority, rule_group
+- validation_results: message_template_id, message_params
+- data_submissions: data_version, and the institution/series/date index
+
+New tables are created by init_db from the models.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2024-06-03 00:00:01
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("validation_rules") as batch_op:
+        batch_op.add_column(sa.Column("version", sa.Integer(), nullable=False, server_default="1"))
+        batch_op.add_column(sa.Column("priority", sa.Integer(), nullable=False, server_default="100"))
+        batch_op.add_column(sa.Column("rule_group", sa.String(50)))
+        batch_op.create_index("ix_validation_rules_rule_group", ["rule_group"])
+
+    with op.batch_alter_table("validation_results") as batch_op:
+        batch_op.add_column(sa.Column("message_template_id", sa.Integer()))
+        batch_op.add_column(sa.Column("message_params", sa.Text()))
+        batch_op.create_index("ix_validation_results_message_template_id", ["message_template_id"])
+
+    with op.batch_alter_table("data_submissions") as batch_op:
+        batch_op.add_column(sa.Column("data_version", sa.Integer(), nullable=False, server_default="1"))
+        batch_op.create_index(
+            "ix_data_submissions_institution_series_date", ["institution_id", "report_series_id", "reporting_date"]
+        )
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("data_submissions") as batch_op:
+        batch_op.drop_index("ix_data_submissions_institution_series_date")
+        batch_op.drop_column("data_version")
+
+    with op.batch_alter_table("validation_results") as batch_op:
+        batch_op.drop_index("ix_validation_results_message_template_id")
+        batch_op.drop_column("message_params")
+        batch_op.drop_column("message_template_id")
+
+    with op.batch_alter_table("validation_rules") as batch_op:
+        batch_op.drop_index("ix_validation_rules_rule_group")
+        batch_op.drop_column("rule_group")
+        batch_op.drop_column("priority")
+        batch_op.drop_column("version")
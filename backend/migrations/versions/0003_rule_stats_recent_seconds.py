@@ -0,0 +1,39 @@
+"""Keep each rule's recent evaluation timings with its statistics
+
+- validation_rule_stats: recent_seconds
+
+The table is skipped if it does not exist yet; init_db then creates it
+from the model.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2024-06-10 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _has_stats_table() -> bool:
+    return sa.inspect(op.get_bind()).has_table("validation_rule_stats")
+
+
+def upgrade() -> None:
+    if _has_stats_table():
+        with op.batch_alter_table("validation_rule_stats") as batch_op:
+            batch_op.add_column(sa.Column("recent_seconds", sa.Text()))
+
+
+def downgrade() -> None:
+    if _has_stats_table():
+        with op.batch_alter_table("validation_rule_stats") as batch_op:
+            batch_op.drop_column("recent_seconds")
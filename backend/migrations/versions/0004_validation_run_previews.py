@@ -0,0 +1,39 @@
+"""Keep the findings of limited validation runs on the run
+
+- validation_runs: preview
+
+The table is skipped if it does not exist yet; init_db then creates it
+from the model.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2024-06-17 00:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0004"
+down_revision: Union[str, None] = "0003"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _has_runs_table() -> bool:
+    return sa.inspect(op.get_bind()).has_table("validation_runs")
+
+
+def upgrade() -> None:
+    if _has_runs_table():
+        with op.batch_alter_table("validation_runs") as batch_op:
+            batch_op.add_column(sa.Column("preview", sa.Text()))
+
+
+def downgrade() -> None:
+    if _has_runs_table():
+        with op.batch_alter_table("validation_runs") as batch_op:
+            batch_op.drop_column("preview")
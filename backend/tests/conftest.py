@@ -0,0 +1,147 @@
+import pytest
+from datetime import date, datetime
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.main import app
+from app.core.config import settings
+from app.core.database import Base, get_db
+from app.core.security import get_password_hash
+from app.models.user import User
+from app.models.institution import Institution
+from app.models.report_series import ReportSeries
+from app.models.data_submission import DataSubmission
+from app.models.submitted_data import SubmittedData
+from app.models.validation_rule import ValidationRule
+from app.services import peer_analytics, report_cache, report_exports, reports, validation_runs
+
+# Create test database
+SQLALCHEMY_DATABASE_URL = "sqlite:///:memory:"
+engine = create_engine(
+    SQLALCHEMY_DATABASE_URL,
+    connect_args={"check_same_thread": False},
+    poolclass=StaticPool,
+)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def add_submission(db, institution_id, report_series_id, values, reporting_date=date(2024, 3, 31)):
+    submission = DataSubmission(
+        institution_id=institution_id,
+        report_series_id=report_series_id,
+        reporting_date=reporting_date,
+        submission_date=datetime(2024, 4, 15),
+        file_path="test.csv",
+        status="submitted",
+        validation_status="pending"
+    )
+    db.add(submission)
+    db.commit()
+
+    for mdrm_identifier, value in values.items():
+        db.add(SubmittedData(
+            submission_id=submission.id,
+            mdrm_identifier=mdrm_identifier,
+            reported_value=value
+        ))
+    db.commit()
+
+    return submission
+
+@pytest.fixture
+def test_db():
+    # Create tables
+    Base.metadata.create_all(bind=engine)
+
+    db = TestingSessionLocal()
+
+    institution = Institution(
+        rssd_id="1234567",
+        name="Test Bank",
+        institution_type="Commercial Bank",
+        status="active"
+    )
+    report_series = ReportSeries(
+        series_code="FR Y-9C",
+        series_name="Consolidated Financial Statements for Holding Companies",
+        filing_frequency="quarterly",
+        status="active"
+    )
+    db.add(institution)
+    db.add(report_series)
+
+    db.add_all([
+        ValidationRule(
+            rule_name="Assets Equal Liabilities Plus Equity",
+            rule_type="mathematical",
+            rule_definition="BHCK2170 = BHCK2948 + BHCK3210",
+            severity="error",
+            effective_date=date(2020, 1, 1)
+        ),
+        ValidationRule(
+            rule_name="Assets Must Be Positive",
+            rule_type="range",
+            rule_definition="BHCK2170 > 0",
+            severity="error",
+            effective_date=date(2020, 1, 1)
+        ),
+        ValidationRule(
+            rule_name="Equity Should Be Positive",
+            rule_type="range",
+            rule_definition="BHCK3210 > 0",
+            severity="warning",
+            effective_date=date(2020, 1, 1)
+        )
+    ])
+    db.commit()
+
+    yield db
+
+    # Clean up
+    db.close()
+    Base.metadata.drop_all(bind=engine)
+
+@pytest.fixture
+def client(test_db, tmp_path, monkeypatch):
+    """
+    Test client on the test database, with an admin and an external user of institution 1.
+
+    Background jobs run inline, in sessions of their own on the test database.
+    """
+    test_db.add_all([
+        User(
+            username="admin", password_hash=get_password_hash("adminpassword"),
+            email="admin@example.com", role="admin", status="active"
+        ),
+        User(
+            username="external", password_hash=get_password_hash("externalpassword"),
+            email="external@example.com", role="external", institution_id=1, status="active"
+        ),
+    ])
+    test_db.commit()
+
+    def override_get_db():
+        db = TestingSessionLocal()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    for service in (validation_runs, reports, report_exports, peer_analytics):
+        monkeypatch.setattr(service, "session_factory", TestingSessionLocal)
+    for queue in (validation_runs.validation_queue, report_exports.export_queue, peer_analytics.analytics_queue):
+        monkeypatch.setattr(queue, "submit", lambda fn, *args: fn(*args))
+    monkeypatch.setattr(report_cache.report_cache, "directory", str(tmp_path / "cache"))
+    monkeypatch.setattr(settings, "EXPORT_DIR", str(tmp_path / "exports"))
+    monkeypatch.setitem(app.dependency_overrides, get_db, override_get_db)
+
+    yield TestClient(app)
+
+def auth_headers(client, username, password):
+    response = client.post(
+        "/api/v1/auth/login",
+        data={"username": username, "password": password},
+        headers={"Content-Type": "application/x-www-form-urlencoded"}
+    )
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
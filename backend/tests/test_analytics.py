@@ -0,0 +1,223 @@
+import pytest
+from datetime import date
+
+from app.models.institution import Institution
+from app.models.data_submission import DataSubmission
+from app.models.validation_result import ValidationResult
+from app.models.period_rollup import PeriodRollup
+from app.models.peer_group_statistic import PeerGroupStatistic
+from app.models.data_quality_cell import DataQualityCell
+from app.services.validation_engine import validate_submission
+from app.services import peer_analytics
+from app.services.peer_analytics import get_peer_statistics, institution_values, refresh_peer_statistics
+from app.services.period_rollups import period_aggregates, rebuild_period_rollups, update_period_rollups
+from app.services.data_quality import quality_breakdown, refresh_quality_cube
+from .conftest import TestingSessionLocal, add_submission, auth_headers
+
+@pytest.fixture(autouse=True)
+def analytics_jobs(monkeypatch):
+    """Run background statistic refreshes inline on the test database."""
+    monkeypatch.setattr(peer_analytics, "session_factory", TestingSessionLocal)
+    monkeypatch.setattr(peer_analytics.analytics_queue, "submit", lambda fn, *args: fn(*args))
+
+def test_peer_statistics_precomputed_per_institution_type(test_db, monkeypatch):
+    test_db.add_all([
+        Institution(rssd_id="2", name="Second Bank", institution_type="Commercial Bank", status="active"),
+        Institution(rssd_id="3", name="Third Thrift", institution_type="Savings Institution", status="active"),
+    ])
+    test_db.commit()
+    for institution_id, assets in ((1, "100"), (2, "300"), (3, "1,000")):
+        submission = add_submission(test_db, institution_id, 1, {"BHCK2170": assets, "BHCK9999": "n/a"})
+        submission.status = "accepted"
+    # Only accepted filings are peers
+    add_submission(test_db, 2, 1, {"BHCK2170": "999999"})
+    test_db.commit()
+
+    # Reads never compute statistics; a period without any gets one background refresh queued
+    queued = []
+    monkeypatch.setattr(peer_analytics.analytics_queue, "submit", lambda fn, *args: queued.append((fn, args)))
+    assert get_peer_statistics(test_db, 1, date(2024, 3, 31)) == []
+    assert get_peer_statistics(test_db, 1, date(2024, 3, 31)) == []
+    assert len(queued) == 1
+    fn, args = queued[0]
+    fn(*args)
+
+    stats = get_peer_statistics(test_db, 1, date(2024, 3, 31), ["BHCK2170"], "Commercial Bank")
+    assert [(s.institution_count, s.mean, s.median, s.min_value, s.max_value) for s in stats] == [(2, 200, 200, 100, 300)]
+    assert stats[0].p10 == 120
+    stats = get_peer_statistics(test_db, 1, date(2024, 3, 31))
+    assert [(s.institution_type, s.mdrm_identifier, s.std) for s in stats] == [
+        ("Commercial Bank", "BHCK2170", pytest.approx(141.421, abs=1e-3)),
+        ("Savings Institution", "BHCK2170", None),
+    ]
+    assert institution_values(test_db, 3, 1, date(2024, 3, 31)) == {"BHCK2170": 1000}
+
+    # A filing leaving the accepted state drops out of the refreshed statistics
+    test_db.query(DataSubmission).filter(DataSubmission.institution_id == 2).update({"status": "rejected"})
+    assert refresh_peer_statistics(test_db, 1, date(2024, 3, 31)) == 2
+    test_db.commit()
+    stats = get_peer_statistics(test_db, 1, date(2024, 3, 31), institution_type="Commercial Bank")
+    assert [(s.institution_count, s.mean) for s in stats] == [(1, 100)]
+
+def test_peer_statistics_of_periods_without_numeric_values(test_db):
+    # No accepted filings at all
+    assert get_peer_statistics(test_db, 1, date(2024, 3, 31)) == []
+
+    # Accepting a filing with only text values, then withdrawing it
+    submission = add_submission(test_db, 1, 1, {"BHCK9999": "n/a"})
+    for previous_status, new_status in (("submitted", "accepted"), ("accepted", "rejected")):
+        submission.status = new_status
+        update_period_rollups(test_db, submission, previous_status)
+        test_db.commit()
+        assert refresh_peer_statistics(test_db, 1, date(2024, 3, 31)) == 0
+        assert get_peer_statistics(test_db, 1, date(2024, 3, 31)) == []
+        assert period_aggregates(test_db, 1, date(2024, 3, 31)) == []
+
+def test_period_rollups_updated_incrementally_on_accept(test_db):
+    test_db.add(Institution(rssd_id="2", name="Thrift", institution_type="Savings Institution", status="active"))
+    test_db.commit()
+
+    def accept(submission):
+        previous_status, submission.status = submission.status, "accepted"
+        update_period_rollups(test_db, submission, previous_status)
+        test_db.commit()
+
+    accept(add_submission(test_db, 1, 1, {"BHCK2170": "100", "BHCK3210": "x"}))
+    accept(add_submission(test_db, 2, 1, {"BHCK2170": "1,000"}))
+    assert test_db.query(PeriodRollup).count() == 2
+    assert period_aggregates(test_db, 1, date(2024, 3, 31)) == [{
+        "mdrm_identifier": "BHCK2170", "total": 1100, "value_count": 2,
+        "min_value": 100, "max_value": 1000, "mean": 550,
+    }]
+
+    # An accepted amendment replaces the institution's earlier filing
+    accept(add_submission(test_db, 1, 1, {"BHCK2170": "40"}))
+    rows = period_aggregates(test_db, 1, date(2024, 3, 31), ["BHCK2170"], by_institution_type=True)
+    assert [(row["institution_type"], row["total"], row["value_count"]) for row in rows] == [
+        ("Commercial Bank", 40, 1), ("Savings Institution", 1000, 1)
+    ]
+
+    test_db.query(PeriodRollup).delete()
+    test_db.commit()
+    assert rebuild_period_rollups(test_db) == {"periods": 1, "rollups": 2}
+    assert period_aggregates(test_db, 1, date(2024, 3, 31))[0]["total"] == 1040
+
+def test_data_quality_cube_maintained_with_results(test_db):
+    failing = add_submission(test_db, 1, 1, {"BHCK2170": "100", "BHCK2948": "70", "BHCK3210": "-10"})
+    passing = add_submission(test_db, 1, 1, {"BHCK2170": "100", "BHCK2948": "90", "BHCK3210": "10"},
+                             reporting_date=date(2024, 6, 30))
+    validate_submission(test_db, failing)
+    validate_submission(test_db, passing)
+    assert test_db.query(DataQualityCell).count() == 2
+
+    by_rule = quality_breakdown(test_db, "rule")
+    assert [(row["rule_id"], row["open_errors"], row["open_warnings"], row["error_rate"]) for row in by_rule] == [
+        (1, 1, 0, 0.5), (3, 0, 1, 0.0)
+    ]
+    assert by_rule[0]["validated_submissions"] == 2
+
+    # Drill down from a rule to the periods it fails in
+    by_period = quality_breakdown(test_db, "period", rule_id=1)
+    assert [(row["reporting_date"], row["validated_submissions"], row["error_rate"]) for row in by_period] == [
+        (date(2024, 3, 31), 1, 1.0)
+    ]
+
+    warning = test_db.query(ValidationResult).filter(ValidationResult.severity == "warning").one()
+    warning.status = "waived"
+    refresh_quality_cube(test_db, [failing.id])
+    test_db.commit()
+    cell = test_db.query(DataQualityCell).filter(DataQualityCell.rule_id == 3).one()
+    assert (cell.open_warnings, cell.waived_warnings) == (0, 1)
+
+    # Rebuilding the whole cube gives the same cells
+    assert refresh_quality_cube(test_db) == 2
+
+def accept_filings(client, test_db, headers):
+    """File and accept assets of 100 and 300 for two commercial banks."""
+    test_db.add(Institution(rssd_id="2", name="Second Bank", institution_type="Commercial Bank", status="active"))
+    test_db.commit()
+    for institution_id, assets in ((1, "100"), (2, "300")):
+        submission = add_submission(test_db, institution_id, 1, {"BHCK2170": assets})
+        response = client.put(f"/api/v1/submissions/{submission.id}/status", data={"status": "accepted"}, headers=headers)
+        assert response.status_code == 200
+
+def test_peer_analytics_endpoints(client, test_db, monkeypatch):
+    admin = auth_headers(client, "admin", "adminpassword")
+    external = auth_headers(client, "external", "externalpassword")
+
+    # Accepting filings queues the recompute of their period instead of running it on the request
+    queued = []
+    monkeypatch.setattr(peer_analytics.analytics_queue, "submit", lambda fn, *args: queued.append((fn, args)))
+    accept_filings(client, test_db, admin)
+    assert len(queued) == 1
+    assert test_db.query(PeerGroupStatistic).count() == 0
+    fn, args = queued[0]
+    fn(*args)
+
+    response = client.get("/api/v1/analytics/peers?report_series_id=1&reporting_date=2024-03-31", headers=admin)
+    assert response.status_code == 200
+    assert [(s["mdrm_identifier"], s["institution_count"], s["mean"]) for s in response.json()] == [("BHCK2170", 2, 200)]
+
+    # External users compare their own institution with its peers
+    response = client.get(
+        "/api/v1/analytics/peers?report_series_id=1&reporting_date=2024-03-31&institution_id=1", headers=external
+    )
+    assert response.status_code == 200
+    assert response.json()[0]["institution_value"] == 100
+    response = client.get("/api/v1/analytics/peers?report_series_id=1&reporting_date=2024-03-31", headers=external)
+    assert response.status_code == 403
+
+    response = client.post("/api/v1/analytics/peers/refresh", headers=admin)
+    assert response.status_code == 200
+    assert client.post("/api/v1/analytics/peers/refresh", headers=external).status_code == 403
+
+def test_period_aggregate_endpoints(client, test_db):
+    admin = auth_headers(client, "admin", "adminpassword")
+    accept_filings(client, test_db, admin)
+
+    response = client.get("/api/v1/analytics/aggregates?report_series_id=1&reporting_date=2024-03-31", headers=admin)
+    assert response.status_code == 200
+    assert response.json() == [{
+        "mdrm_identifier": "BHCK2170", "institution_type": None, "total": 400.0, "value_count": 2,
+        "min_value": 100.0, "max_value": 300.0, "mean": 200.0,
+    }]
+
+    response = client.get(
+        "/api/v1/analytics/aggregates?report_series_id=1&reporting_date=2024-03-31&by_institution_type=true",
+        headers=admin
+    )
+    assert response.json()[0]["institution_type"] == "Commercial Bank"
+
+    response = client.post("/api/v1/analytics/aggregates/refresh", headers=admin)
+    assert response.json() == {"periods": 1, "rollups": 1}
+
+    external = auth_headers(client, "external", "externalpassword")
+    response = client.get("/api/v1/analytics/aggregates?report_series_id=1&reporting_date=2024-03-31", headers=external)
+    assert response.status_code == 403
+
+def test_data_quality_endpoints(client, test_db):
+    admin = auth_headers(client, "admin", "adminpassword")
+    external = auth_headers(client, "external", "externalpassword")
+    test_db.add(Institution(rssd_id="2", name="Second Bank", institution_type="Commercial Bank", status="active"))
+    test_db.commit()
+    validate_submission(test_db, add_submission(test_db, 1, 1, {"BHCK2170": "-5", "BHCK2948": "0", "BHCK3210": "0"}))
+    validate_submission(test_db, add_submission(test_db, 2, 1, {"BHCK2170": "-5", "BHCK2948": "-5", "BHCK3210": "0"}))
+
+    response = client.get("/api/v1/data-quality/institution", headers=admin)
+    assert response.status_code == 200
+    assert [(row["institution_id"], row["total_errors"], row["error_rate"]) for row in response.json()] == [
+        (1, 2, 2.0), (2, 1, 1.0)
+    ]
+
+    # Drill down into one institution's rules
+    response = client.get("/api/v1/data-quality/rule?institution_id=2", headers=admin)
+    assert [(row["rule_id"], row["total_errors"]) for row in response.json()] == [(2, 1), (3, 0)]
+
+    # External users only see their own institution
+    response = client.get("/api/v1/data-quality/institution", headers=external)
+    assert [row["institution_id"] for row in response.json()] == [1]
+    assert client.get("/api/v1/data-quality/rule?institution_id=2", headers=external).status_code == 403
+
+    assert client.get("/api/v1/data-quality/bank", headers=admin).status_code == 400
+    assert client.post("/api/v1/data-quality/rebuild", headers=admin).json() == {"cells": 5}
+    assert client.post("/api/v1/data-quality/rebuild", headers=external).status_code == 403
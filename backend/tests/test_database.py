@@ -0,0 +1,65 @@
+import os
+import shutil
+
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import init_db
+from app.models.data_submission import DataSubmission
+from app.models.validation_rule import ValidationRule
+
+# Database committed with the repository, created before migrations were introduced
+SAMPLE_DATABASE = os.path.join(os.path.dirname(os.path.dirname(__file__)), "frb_data_collection.db")
+
+def columns(engine, table):
+    return {column["name"] for column in inspect(engine).get_columns(table)}
+
+def test_init_db_upgrades_existing_database(tmp_path):
+    path = tmp_path / "existing.db"
+    shutil.copy(SAMPLE_DATABASE, path)
+    engine = create_engine(f"sqlite:///{path}")
+    assert "version" not in columns(engine, "validation_rules")
+    # Statistics table as created before recent timings were kept
+    with engine.begin() as connection:
+        connection.exec_driver_sql(
+            "CREATE TABLE validation_rule_stats (id INTEGER PRIMARY KEY, rule_id INTEGER NOT NULL, "
+            "evaluation_count INTEGER NOT NULL, fire_count INTEGER NOT NULL, total_seconds FLOAT NOT NULL, "
+            "p95_seconds FLOAT NOT NULL, last_flushed_at DATETIME, created_at DATETIME, updated_at DATETIME)"
+        )
+        # Runs table as created before limited runs kept their findings
+        connection.exec_driver_sql(
+            "CREATE TABLE validation_runs (id INTEGER PRIMARY KEY, submission_id INTEGER NOT NULL, "
+            "status VARCHAR(9), created_at DATETIME, updated_at DATETIME)"
+        )
+
+    init_db(engine)
+    # Running it again leaves an up-to-date database as it is
+    init_db(engine)
+
+    assert {"version", "priority", "rule_group"} <= columns(engine, "validation_rules")
+    assert {"message_template_id", "message_params"} <= columns(engine, "validation_results")
+    assert "data_version" in columns(engine, "data_submissions")
+    assert "ix_data_submissions_institution_series_date" in {
+        index["name"] for index in inspect(engine).get_indexes("data_submissions")
+    }
+    assert "recent_seconds" in columns(engine, "validation_rule_stats")
+    assert "preview" in columns(engine, "validation_runs")
+
+    db = sessionmaker(bind=engine)()
+    try:
+        assert {(rule.version, rule.priority) for rule in db.query(ValidationRule)} <= {(1, 100)}
+        db.query(DataSubmission).all()
+    finally:
+        db.close()
+    engine.dispose()
+
+def test_init_db_creates_and_stamps_new_database(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'new.db'}")
+    init_db(engine)
+
+    assert "data_version" in columns(engine, "data_submissions")
+    assert "recent_seconds" in columns(engine, "validation_rule_stats")
+    assert "preview" in columns(engine, "validation_runs")
+    with engine.connect() as connection:
+        assert connection.exec_driver_sql("SELECT version_num FROM alembic_version").scalar() == "0004"
+    engine.dispose()
@@ -0,0 +1,335 @@
+import io
+import os
+import zipfile
+import pandas as pd
+import pyarrow.parquet as pq
+import pytest
+from datetime import date
+from sqlalchemy import event
+
+from app.core.config import settings
+from app.models.institution import Institution
+from app.models.report_export import ReportExport
+from app.services.validation_engine import validate_submission
+from app.services import parquet_writer, report_cache as report_cache_module, report_exports, reports
+from app.services.report_archive import stream_period_archive
+from app.services.report_cache import ReportCache
+from app.services.jobs import JobCancelled
+from .conftest import TestingSessionLocal, add_submission, auth_headers, engine
+
+def test_reports_stream_csv_in_chunks(test_db, monkeypatch):
+    monkeypatch.setattr(reports, "session_factory", TestingSessionLocal)
+    monkeypatch.setattr(settings, "REPORT_CHUNK_SIZE", 20)
+
+    submission = add_submission(test_db, 1, 1, {"BHCK2170": "-5", "BHCK2948": "0", "BHCK3210": "1,000"})
+    validate_submission(test_db, submission)
+
+    chunks = list(reports.stream_csv(reports.SUBMISSION_REPORT_COLUMNS, reports.submission_report_rows(submission.id)))
+    assert len(chunks) > 1
+    assert "".join(chunks).splitlines() == [
+        "mdrm_identifier,reported_value,calculated_value",
+        "BHCK2170,-5,",
+        "BHCK2948,0,",
+        "BHCK3210,\"1,000\",",
+    ]
+
+    lines = "".join(reports.stream_csv(
+        reports.VALIDATION_REPORT_COLUMNS, reports.validation_report_rows(submission.id)
+    )).splitlines()
+    assert lines[0] == "field_identifier,error_message,severity,status"
+    assert "BHCK2170,Assets Must Be Positive: BHCK2170 > 0 (BHCK2170=-5.0),error,open" in lines
+
+def test_historical_report_reads_one_query_and_streams_wide(test_db, monkeypatch):
+    monkeypatch.setattr(reports, "session_factory", TestingSessionLocal)
+    add_submission(test_db, 1, 1, {"BHCK2170": "100", "BHCK3210": "10"}, reporting_date=date(2023, 12, 31))
+    add_submission(test_db, 1, 1, {"BHCK2170": "120"})
+    # An amended filing for the same period replaces the earlier values in the wide layout
+    add_submission(test_db, 1, 1, {"BHCK2170": "125", "BHCK3210": "12"})
+
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        rows = list(reports.read_rows(
+            reports.historical_report_rows(1, 1, date(2023, 1, 1), date(2024, 12, 31))
+        ))
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+
+    assert len(statements) == 1
+    assert len(rows) == 5
+    assert rows[0] == (date(2023, 12, 31), "BHCK2170", "100")
+
+    reporting_dates = reports.historical_report_dates(test_db, 1, 1, date(2023, 1, 1), date(2024, 12, 31))
+    assert reports.wide_historical_columns(reporting_dates) == ["mdrm_identifier", "2023-12-31", "2024-03-31"]
+    assert list(reports.read_rows(
+        reports.historical_wide_rows(1, 1, date(2023, 1, 1), date(2024, 12, 31), reporting_dates)
+    )) == [("BHCK2170", "100", "125"), ("BHCK3210", "10", "12")]
+
+def test_report_cache_evicts_least_recently_used_and_invalidates(test_db, tmp_path, monkeypatch):
+    cache = ReportCache(str(tmp_path), max_bytes=25)
+    first = cache.key("submission", 1, "csv", 1)
+    second = cache.key("validation", 1, "csv", 1)
+    other = cache.key("submission", 2, "csv", 1)
+
+    assert "".join(cache.stream_through(first, iter(["a" * 5, "b" * 5]))) == "a" * 5 + "b" * 5
+    cache.store(second, b"c" * 10)
+    assert cache.get(first) and cache.get(second)
+    assert cache.etag(first) != cache.etag(cache.key("submission", 1, "csv", 2))
+
+    # Reading the first artifact makes the second the least recently used
+    os.utime(cache.path(second), (0, 0))
+    cache.get(first)
+    cache.store(other, b"d" * 10)
+    assert cache.get(second) is None
+    assert cache.get(first) and cache.get(other)
+
+    # An interrupted stream caches nothing
+    stream = cache.stream_through(cache.key("submission", 3, "csv", 1), iter(["partial", "rest"]))
+    next(stream)
+    stream.close()
+    assert sorted(os.listdir(tmp_path)) == sorted([first, other])
+
+    monkeypatch.setattr(report_cache_module, "report_cache", cache)
+    submission = add_submission(test_db, 1, 1, {"BHCK2170": "100"})
+    assert submission.data_version == 1
+    validate_submission(test_db, submission)
+    test_db.refresh(submission)
+    assert submission.data_version == 2
+    # Validation removed the artifacts of the submission's old data version
+    assert os.listdir(tmp_path) == [other]
+    assert cache.invalidate([2]) == 1
+
+def test_excel_reports_written_row_by_row(test_db, monkeypatch):
+    monkeypatch.setattr(reports, "session_factory", TestingSessionLocal)
+    submission = add_submission(test_db, 1, 1, {"BHCK2170": "100", "BHCK3210": "10"})
+
+    path = reports.spool_report(lambda output: reports.write_excel(
+        reports.SUBMISSION_REPORT_COLUMNS, reports.read_rows(reports.submission_report_rows(submission.id)), output
+    ), ".xlsx")
+    try:
+        assert pd.read_excel(path).fillna("").values.tolist() == [["BHCK2170", 100, ""], ["BHCK3210", 10, ""]]
+    finally:
+        os.remove(path)
+
+def test_exports_interrupted_by_a_restart_are_failed(test_db, tmp_path, monkeypatch):
+    monkeypatch.setattr(report_exports, "session_factory", TestingSessionLocal)
+    monkeypatch.setattr(report_exports.export_queue, "submit", lambda fn, *args: None)
+    monkeypatch.setattr(settings, "EXPORT_DIR", str(tmp_path))
+    submission = add_submission(test_db, 1, 1, {"BHCK2170": "-5"})
+
+    queued = report_exports.start_report_export(test_db, "submission", "csv", {"submission_id": submission.id})
+    running = report_exports.start_report_export(test_db, "submission", "csv", {"submission_id": submission.id})
+    running.status = "running"
+    test_db.commit()
+    with open(report_exports.export_path(running), "w") as f:
+        f.write("mdrm_identifier,")
+
+    assert report_exports.fail_interrupted_exports(test_db) == 2
+    assert [export.status for export in (queued, running)] == ["failed", "failed"]
+    assert not os.path.exists(report_exports.export_path(running))
+    events = list(report_exports.stream_export_events(running.id))
+    assert len(events) == 1 and events[0].startswith("event: done")
+
+def test_report_export_jobs_write_pdf_and_csv(test_db, tmp_path, monkeypatch):
+    monkeypatch.setattr(reports, "session_factory", TestingSessionLocal)
+    monkeypatch.setattr(report_exports, "session_factory", TestingSessionLocal)
+    monkeypatch.setattr(report_exports.export_queue, "submit", lambda fn, *args: None)
+    monkeypatch.setattr(settings, "EXPORT_DIR", str(tmp_path))
+    submission = add_submission(test_db, 1, 1, {"BHCK2170": "-5", "BHCK2948": "0", "BHCK3210": "(1)"})
+    validate_submission(test_db, submission)
+
+    def export(report_type, format, params):
+        export = report_exports.start_report_export(test_db, report_type, format, params)
+        assert export.status == "queued"
+        report_exports.execute_report_export(export.id)
+        test_db.refresh(export)
+        return export
+
+    export_record = export("validation", "pdf", {"submission_id": submission.id})
+    assert export_record.status == "completed"
+    assert export_record.filename == f"validation_{submission.id}_report.pdf"
+    assert export_record.rows_written == 3
+
+    with open(report_exports.export_path(export_record), "rb") as f:
+        pdf = f.read()
+    assert export_record.size_bytes == len(pdf)
+    assert pdf.startswith(b"%PDF-1.4") and pdf.endswith(b"%%EOF\n")
+    assert b"\\(1\\)" in pdf
+    # Every cross-reference entry points at its object
+    xref = int(pdf.rsplit(b"startxref\n", 1)[1].split(b"\n")[0])
+    assert pdf[xref:xref + 4] == b"xref"
+    entries = pdf[xref:].split(b"\n")[3:]
+    for object_id, entry in enumerate(entries[:4], 1):
+        offset = int(entry[:10])
+        assert pdf[offset:].startswith(b"%d 0 obj" % object_id)
+
+    # Dates survive the stored parameters; the wide layout streams one row per item
+    export_record = export("historical", "csv", {
+        "institution_id": 1, "report_series_id": 1,
+        "start_date": date(2024, 1, 1), "end_date": date(2024, 12, 31), "layout": "wide",
+    })
+    with open(report_exports.export_path(export_record)) as f:
+        assert f.read().splitlines() == [
+            "mdrm_identifier,2024-03-31", "BHCK2170,-5", "BHCK2948,0", "BHCK3210,(1)"
+        ]
+    events = list(report_exports.stream_export_events(export_record.id))
+    assert len(events) == 1 and events[0].startswith("event: done")
+
+    # A queued export is cancelled at once; a running one stops at its next progress update
+    export_record = report_exports.start_report_export(test_db, "submission", "csv", {"submission_id": submission.id})
+    assert report_exports.cancel_export(test_db, export_record).status == "cancelled"
+
+    monkeypatch.setattr(report_exports, "_PROGRESS_ROWS", 1)
+    monkeypatch.setattr(settings, "EXPORT_PROGRESS_INTERVAL", 0)
+    export_record = report_exports.start_report_export(test_db, "submission", "excel", {"submission_id": submission.id})
+    export_record.cancel_requested = True
+    export_record.status = "running"
+    test_db.commit()
+    db = TestingSessionLocal()
+    with pytest.raises(JobCancelled):
+        report_exports.run_report_export(db, db.get(ReportExport, export_record.id))
+    db.close()
+    # A cancelled export leaves no file behind
+    assert not os.path.exists(report_exports.export_path(export_record))
+
+def test_parquet_reports_written_in_typed_row_groups(test_db, tmp_path, monkeypatch):
+    assert [(name, kind) for name, kind, _, _ in parquet_writer.typed_columns(reports.HISTORICAL_REPORT_COLUMNS)] == [
+        ("reporting_date", "date"), ("mdrm_identifier", "string"), ("reported_value", "number"), ("reported_text", "string")
+    ]
+
+    monkeypatch.setattr(reports, "session_factory", TestingSessionLocal)
+    add_submission(test_db, 1, 1, {"BHCK2170": "1,000", "BHCK3210": "(1)"})
+    add_submission(test_db, 1, 1, {"BHCK2170": "1,200"}, reporting_date=date(2024, 6, 30))
+    rows = reports.historical_report_rows(1, 1, date(2024, 1, 1), date(2024, 12, 31))
+
+    path = str(tmp_path / "historical.parquet")
+    with open(path, "wb") as output:
+        assert parquet_writer.write_parquet(reports.HISTORICAL_REPORT_COLUMNS, reports.read_rows(rows), output,
+                                            row_group_size=2) == 2
+    assert pq.ParquetFile(path).metadata.num_row_groups == 2
+    df = pd.read_parquet(path)
+    assert df["reported_value"].fillna(-1).tolist() == [1000.0, -1, 1200.0]
+    assert df["reported_text"].tolist() == ["1,000", "(1)", "1,200"]
+    assert df["reporting_date"].tolist() == [date(2024, 3, 31), date(2024, 3, 31), date(2024, 6, 30)]
+
+def test_period_archive_streams_one_file_per_institution(test_db, monkeypatch):
+    monkeypatch.setattr(reports, "session_factory", TestingSessionLocal)
+    monkeypatch.setattr(settings, "REPORT_CHUNK_SIZE", 16)
+    test_db.add(Institution(rssd_id="7654321", name="Other Bank", institution_type="Commercial Bank", status="active"))
+    test_db.commit()
+    for institution_id, values in ((1, {"BHCK2170": "100"}), (1, {"BHCK2170": "110"}), (2, {"BHCK2170": "1,000"})):
+        add_submission(test_db, institution_id, 1, values).status = "accepted"
+    # Neither unaccepted filings nor other periods are included
+    add_submission(test_db, 2, 1, {"BHCK2170": "5"})
+    add_submission(test_db, 2, 1, {"BHCK2170": "6"}, reporting_date=date(2024, 6, 30)).status = "accepted"
+    test_db.commit()
+
+    chunks = list(stream_period_archive(1, date(2024, 3, 31)))
+    assert len(chunks) > 2
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(chunks)))
+    assert archive.namelist() == ["institutions/1234567.csv", "institutions/7654321.csv", "all_institutions.csv"]
+    # The latest accepted filing replaces earlier ones
+    assert archive.read("institutions/1234567.csv").decode().splitlines() == [
+        "mdrm_identifier,reported_value,calculated_value", "BHCK2170,110,"
+    ]
+    assert archive.read("all_institutions.csv").decode().splitlines() == [
+        "rssd_id,institution_name,submission_id,mdrm_identifier,reported_value,calculated_value",
+        "1234567,Test Bank,2,BHCK2170,110,",
+        '7654321,Other Bank,3,BHCK2170,"1,000",',
+    ]
+
+def test_report_endpoints_answer_unchanged_reports_with_304(client, test_db):
+    headers = auth_headers(client, "admin", "adminpassword")
+    submission = add_submission(test_db, 1, 1, {"BHCK2170": "100", "BHCK3210": "10"})
+
+    response = client.get(f"/api/v1/reports/submissions/{submission.id}", headers=headers)
+    assert response.status_code == 200
+    assert response.text.splitlines()[1] == "BHCK2170,100,"
+    etag = response.headers["ETag"]
+
+    response = client.get(f"/api/v1/reports/submissions/{submission.id}", headers=dict(headers, **{"If-None-Match": etag}))
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+
+    # Validating the submission changes its data version, and so the ETag
+    validate_submission(test_db, submission)
+    response = client.get(f"/api/v1/reports/submissions/{submission.id}", headers=dict(headers, **{"If-None-Match": etag}))
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+def test_report_endpoints_send_pdf_requests_to_export_jobs(client, test_db):
+    headers = auth_headers(client, "admin", "adminpassword")
+    submission = add_submission(test_db, 1, 1, {"BHCK2170": "100"})
+
+    for url in (
+        f"/api/v1/reports/submissions/{submission.id}?format=pdf",
+        f"/api/v1/reports/validation/{submission.id}?format=pdf",
+        "/api/v1/reports/historical/1?report_series_id=1&start_date=2024-01-01&end_date=2024-12-31&format=pdf",
+    ):
+        response = client.get(url, headers=headers)
+        assert response.status_code == 400
+        assert "POST /reports/exports" in response.json()["detail"]
+
+def test_report_export_endpoints(client, test_db):
+    admin = auth_headers(client, "admin", "adminpassword")
+    external = auth_headers(client, "external", "externalpassword")
+    submission = add_submission(test_db, 1, 1, {"BHCK2170": "100", "BHCK3210": "10"})
+
+    response = client.post("/api/v1/reports/exports", json={"report_type": "submission"}, headers=admin)
+    assert response.status_code == 400
+
+    response = client.post(
+        "/api/v1/reports/exports", json={"report_type": "submission", "submission_id": submission.id}, headers=admin
+    )
+    assert response.status_code == 202
+    export_id = response.json()["id"]
+
+    response = client.get(f"/api/v1/reports/exports/{export_id}", headers=admin)
+    assert response.status_code == 200
+    assert response.json()["status"] == "completed"
+    assert response.json()["rows_written"] == 2
+
+    response = client.get(f"/api/v1/reports/exports/{export_id}/events", headers=admin)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.text.startswith("event: done\n")
+    assert '"rows_written": 2' in response.text
+
+    response = client.get(f"/api/v1/reports/exports/{export_id}/download", headers=admin)
+    assert response.status_code == 200
+    assert response.headers["content-disposition"] == f"attachment; filename=submission_{submission.id}_report.csv"
+    assert response.text.splitlines() == ["mdrm_identifier,reported_value,calculated_value", "BHCK2170,100,", "BHCK3210,10,"]
+
+    # Exports are private to the user who requested them
+    assert client.get(f"/api/v1/reports/exports/{export_id}", headers=external).status_code == 403
+    assert client.get("/api/v1/reports/exports/999", headers=admin).status_code == 404
+
+    # A finished export is not cancelled
+    response = client.delete(f"/api/v1/reports/exports/{export_id}", headers=admin)
+    assert response.json()["status"] == "completed"
+
+def test_period_archive_endpoint(client, test_db):
+    submission = add_submission(test_db, 1, 1, {"BHCK2170": "100"})
+    submission.status = "accepted"
+    test_db.commit()
+
+    response = client.get(
+        "/api/v1/reports/periods/1?reporting_date=2024-03-31", headers=auth_headers(client, "admin", "adminpassword")
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/zip"
+    archive = zipfile.ZipFile(io.BytesIO(response.content))
+    assert archive.namelist() == ["institutions/1234567.csv", "all_institutions.csv"]
+
+    response = client.get(
+        "/api/v1/reports/periods/1?reporting_date=2024-03-31", headers=auth_headers(client, "external", "externalpassword")
+    )
+    assert response.status_code == 403
+    response = client.get(
+        "/api/v1/reports/periods/9?reporting_date=2024-03-31", headers=auth_headers(client, "admin", "adminpassword")
+    )
+    assert response.status_code == 404
@@ -0,0 +1,781 @@
+import json
+import pytest
+from datetime import date
+from sqlalchemy.exc import IntegrityError
+
+from app.models.report_series import ReportSeries
+from app.models.validation_rule import ValidationRule
+from app.models.validation_result import ValidationResult
+from app.models.validation_rule_stats import ValidationRuleStats
+from app.models.mdrm import MDRMItem
+from app.models.validation_summary import ValidationSummary
+from app.models.data_quality_cell import DataQualityCell
+from app.models.validation_result_memo import ValidationResultMemo
+from app.schemas.validation_result import ValidationBatchRequest
+from app.models.validation_message_template import ValidationMessageTemplate
+from app.services.validation_engine import (
+    CompiledRule,
+    RuleCompilationError,
+    RunOptions,
+    ValidationEngine,
+    rule_spec,
+    validate_submission,
+)
+from app.services.validation_executor import validate_submissions
+from app.services.prior_period import PriorPeriodLookup
+from app.services.cross_series import CounterpartLookup
+from app.services.validation_summaries import refresh_summaries
+from app.services.rule_pushdown import run_pushdown_rules, split_pushdown_rules
+from app.services.result_memo import load_memo
+from app.services.messages import finding_message
+from app.services import rule_impact, validation_runs
+from app.services.jobs import Job, JobCancelled
+from app.services.rule_profiler import RuleProfiler
+from app.services.mdrm_checks import load_mdrm_check_plan
+from app.core.config import settings
+from .conftest import TestingSessionLocal, add_submission, auth_headers
+
+def test_compiled_rule_evaluation():
+    rule = CompiledRule(1, "Balance", "mathematical", "BHCK2170 = BHCK2948 + BHCK3210")
+
+    assert rule.identifiers == ("BHCK2170", "BHCK2948", "BHCK3210")
+    assert rule.evaluate({"BHCK2170": 100.0, "BHCK2948": 60.0, "BHCK3210": 40.0}, {}) is None
+
+    finding = rule.evaluate({"BHCK2170": 100.0, "BHCK2948": 60.0, "BHCK3210": 30.0}, {})
+    assert finding["rule_id"] == 1
+    assert finding["field_identifier"] == "BHCK2170"
+
+    # Rules referencing items that were not reported do not apply
+    assert rule.evaluate({"BHCK2170": 100.0}, {}) is None
+
+def test_compiled_rule_length_and_logic():
+    rule = CompiledRule(1, "RSSD Format", "format", "LENGTH(RSSD9001) = 7 AND RSSD9001 > 0")
+
+    assert rule.evaluate({"RSSD9001": 1234567.0}, {"RSSD9001": "1234567"}) is None
+    assert rule.evaluate({"RSSD9001": 123.0}, {"RSSD9001": "123"}) is not None
+
+def test_compiled_rule_rejects_unsafe_definitions():
+    with pytest.raises(RuleCompilationError):
+        CompiledRule(1, "Bad", "range", "__import__('os').system('ls')")
+
+    with pytest.raises(RuleCompilationError):
+        CompiledRule(1, "Bad", "range", "BHCK2170 >")
+
+def test_engine_respects_effective_dates():
+    engine = ValidationEngine([
+        CompiledRule(1, "Old", "range", "BHCK2170 > 0", end_date=date(2023, 1, 1)),
+        CompiledRule(2, "Current", "range", "BHCK2170 > 10", effective_date=date(2023, 1, 1))
+    ])
+
+    findings = engine.evaluate({"BHCK2170": "-5"}, date(2024, 3, 31))
+
+    assert [finding["rule_id"] for finding in findings] == [2]
+
+def test_validate_submission(test_db):
+    submission = add_submission(test_db, 1, 1, {
+        "BHCK2170": "100",
+        "BHCK2948": "70",
+        "BHCK3210": "-10"
+    })
+
+    findings = validate_submission(test_db, submission)
+
+    assert len(findings) == 2
+    assert submission.validation_status == "failed"
+    assert test_db.query(ValidationResult).filter(
+        ValidationResult.submission_id == submission.id
+    ).count() == 2
+
+def test_validate_submissions_process_pool(test_db):
+    passing = add_submission(test_db, 1, 1, {"BHCK2170": "100", "BHCK2948": "60", "BHCK3210": "40"})
+    warning = add_submission(test_db, 1, 1, {"BHCK2170": "100", "BHCK2948": "110", "BHCK3210": "-10"})
+    failing = add_submission(test_db, 1, 1, {"BHCK2170": "-5", "BHCK2948": "5", "BHCK3210": "-10"})
+
+    summary = validate_submissions(
+        test_db, [passing.id, warning.id, failing.id], max_workers=2, shard_size=1
+    )
+
+    assert summary["submissions"] == 3
+    assert summary["findings"] == 3
+    # Every finding here comes from single-item rules evaluated in SQL
+    assert summary["pushdown_findings"] == 3
+
+    test_db.expire_all()
+    assert passing.validation_status == "passed"
+    assert warning.validation_status == "warning"
+    assert failing.validation_status == "failed"
+
+def test_historical_rules_use_prior_accepted_submission(test_db):
+    test_db.add(ValidationRule(
+        rule_name="Assets Within 50% Of Prior Period",
+        rule_type="historical",
+        rule_definition="ABS(BHCK2170 - PRIOR(BHCK2170)) <= 0.5 * PRIOR(BHCK2170)",
+        severity="warning",
+        effective_date=date(2020, 1, 1)
+    ))
+    test_db.commit()
+
+    prior = add_submission(
+        test_db, 1, 1, {"BHCK2170": "100", "BHCK2948": "60", "BHCK3210": "40"},
+        reporting_date=date(2023, 12, 31)
+    )
+    current = add_submission(test_db, 1, 1, {"BHCK2170": "300", "BHCK2948": "260", "BHCK3210": "40"})
+
+    # Prior submission is not accepted yet, so the historical rule does not apply
+    assert validate_submission(test_db, current) == []
+
+    prior.status = "accepted"
+    test_db.commit()
+
+    findings = validate_submission(test_db, current)
+    assert len(findings) == 1
+    assert findings[0]["field_identifier"] == "BHCK2170"
+    assert "PRIOR(BHCK2170)=100.0" in finding_message(findings[0])
+
+def test_prior_period_lookup_caches_values(test_db):
+    prior = add_submission(
+        test_db, 1, 1, {"BHCK2170": "100"}, reporting_date=date(2023, 12, 31)
+    )
+    prior.status = "accepted"
+    test_db.commit()
+    current = add_submission(test_db, 1, 1, {"BHCK2170": "120"})
+
+    lookup = PriorPeriodLookup(test_db)
+    values = lookup.values_for(current)
+
+    assert values == {"BHCK2170": 100.0}
+    assert lookup.values_for(current) is values
+
+def test_revalidation_replaces_only_open_results(test_db):
+    submission = add_submission(test_db, 1, 1, {
+        "BHCK2170": "100",
+        "BHCK2948": "70",
+        "BHCK3210": "-10"
+    })
+    validate_submission(test_db, submission)
+
+    # Waive the equity warning and resolve the balance error
+    results = {
+        result.rule_id: result
+        for result in test_db.query(ValidationResult).filter(ValidationResult.submission_id == submission.id)
+    }
+    results[3].status = "waived"
+    results[1].status = "resolved"
+    test_db.commit()
+
+    findings = validate_submission(test_db, submission)
+
+    statuses = sorted(
+        (result.rule_id, result.status)
+        for result in test_db.query(ValidationResult).filter(ValidationResult.submission_id == submission.id)
+    )
+    # Resolved result is kept and the still-failing rule is reopened; the waived finding is not
+    assert statuses == [(1, "open"), (1, "resolved"), (3, "waived")]
+    assert sorted(finding["rule_id"] for finding in findings) == [1, 3]
+    assert submission.validation_status == "failed"
+
+def test_validation_run_records_progress_and_streams_events(test_db, monkeypatch):
+    monkeypatch.setattr(validation_runs, "session_factory", TestingSessionLocal)
+    monkeypatch.setattr(validation_runs.validation_queue, "submit", lambda fn, *args: None)
+
+    submission = add_submission(test_db, 1, 1, {
+        "BHCK2170": "100",
+        "BHCK2948": "70",
+        "BHCK3210": "-10"
+    })
+
+    run = validation_runs.start_validation_run(test_db, submission)
+    assert run.status == "queued"
+    assert submission.validation_status == "in_progress"
+
+    validation_runs.execute_validation_run(run.id)
+
+    test_db.expire_all()
+    assert run.status == "completed"
+    assert run.rules_total == 3
+    assert run.rules_evaluated == 3
+    assert run.errors_found == 1
+    assert run.warnings_found == 1
+    assert submission.validation_status == "failed"
+
+    events = list(validation_runs.stream_run_events(run.id))
+    assert len(events) == 1
+    assert events[0].startswith("event: done\n")
+    assert '"validation_status": "failed"' in events[0]
+
+def test_limited_runs_leave_stored_results_untouched(test_db, monkeypatch):
+    monkeypatch.setattr(validation_runs, "session_factory", TestingSessionLocal)
+    monkeypatch.setattr(validation_runs.validation_queue, "submit", lambda fn, *args: fn(*args))
+
+    # Balanced, but with negative equity: one warning and no errors
+    submission = add_submission(test_db, 1, 1, {"BHCK2170": "100", "BHCK2948": "110", "BHCK3210": "-10"})
+    validation_runs.start_validation_run(test_db, submission)
+    test_db.expire_all()
+    assert submission.validation_status == "warning"
+
+    run = validation_runs.start_validation_run(test_db, submission, options=RunOptions(errors_only=True))
+    test_db.expire_all()
+    assert run.status == "completed"
+    assert run.preview_findings == []
+    assert submission.validation_status == "warning"
+    assert [(result.rule_id, result.status) for result in test_db.query(ValidationResult)] == [(3, "open")]
+    assert test_db.query(ValidationSummary).one().open_warnings == 1
+    assert test_db.query(DataQualityCell).one().open_warnings == 1
+
+    # A limited batch also keeps its findings on the runs
+    runs = validation_runs.start_batch_validation_run(
+        test_db, [submission], options=RunOptions(max_errors=1), max_workers=1
+    )
+    test_db.expire_all()
+    assert [finding["rule_id"] for finding in runs[0].preview_findings] == [3]
+    assert runs[0].warnings_found == 1
+    assert submission.validation_status == "warning"
+    assert test_db.query(ValidationResult).count() == 1
+
+def test_runs_interrupted_by_a_restart_are_failed(test_db, monkeypatch):
+    monkeypatch.setattr(validation_runs.validation_queue, "submit", lambda fn, *args: None)
+
+    submission = add_submission(test_db, 1, 1, {"BHCK2170": "100", "BHCK2948": "70", "BHCK3210": "30"})
+    queued = validation_runs.start_validation_run(test_db, submission)
+    preview = validation_runs.start_validation_run(test_db, submission, options=RunOptions(errors_only=True))
+    assert submission.validation_status == "in_progress"
+
+    assert validation_runs.fail_interrupted_runs(test_db) == 2
+    test_db.expire_all()
+    assert [run.status for run in (queued, preview)] == ["failed", "failed"]
+    assert submission.validation_status == "pending"
+    assert validation_runs.fail_interrupted_runs(test_db) == 0
+
+    # Their event streams end instead of waiting for a run that will never finish
+    monkeypatch.setattr(validation_runs, "session_factory", TestingSessionLocal)
+    events = list(validation_runs.stream_run_events(queued.id))
+    assert len(events) == 1 and events[0].startswith("event: done\n")
+
+def test_batch_validation_runs_in_the_background(test_db, monkeypatch):
+    monkeypatch.setattr(validation_runs, "session_factory", TestingSessionLocal)
+    monkeypatch.setattr(validation_runs.validation_queue, "submit", lambda fn, *args: None)
+
+    failing = add_submission(test_db, 1, 1, {"BHCK2170": "100", "BHCK2948": "70", "BHCK3210": "-10"})
+    passing = add_submission(test_db, 1, 1, {"BHCK2170": "100", "BHCK2948": "70", "BHCK3210": "30"})
+
+    runs = validation_runs.start_batch_validation_run(test_db, [failing, passing])
+    assert [run.status for run in runs] == ["queued", "queued"]
+    assert failing.validation_status == passing.validation_status == "in_progress"
+
+    validation_runs.execute_batch_validation_run([run.id for run in runs], max_workers=1)
+
+    test_db.expire_all()
+    assert [run.status for run in runs] == ["completed", "completed"]
+    assert [(run.errors_found, run.warnings_found) for run in runs] == [(1, 1), (0, 0)]
+    assert (failing.validation_status, passing.validation_status) == ("failed", "passed")
+
+    # The number of workers a batch may request is capped by the server
+    with pytest.raises(ValueError):
+        ValidationBatchRequest(submission_ids=[failing.id], max_workers=settings.VALIDATION_MAX_WORKERS + 1)
+
+def test_validation_run_endpoints(client, test_db):
+    admin = auth_headers(client, "admin", "adminpassword")
+    external = auth_headers(client, "external", "externalpassword")
+    failing = add_submission(test_db, 1, 1, {"BHCK2170": "100", "BHCK2948": "70", "BHCK3210": "-10"})
+    passing = add_submission(test_db, 1, 1, {"BHCK2170": "100", "BHCK2948": "70", "BHCK3210": "30"})
+
+    response = client.post(f"/api/v1/validation/execute/{failing.id}", headers=external)
+    assert response.status_code == 202
+    run_id = response.json()["run_id"]
+
+    response = client.get(f"/api/v1/validation/runs/{run_id}", headers=external)
+    assert response.status_code == 200
+    assert response.json()["status"] == "completed"
+    assert response.json()["errors_found"] == 1
+
+    response = client.get(f"/api/v1/validation/runs/{run_id}/events", headers=external)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.text.startswith("event: done\n")
+    assert '"validation_status": "failed"' in response.text
+
+    assert client.get("/api/v1/validation/runs/999", headers=admin).status_code == 404
+
+    # Batches are for analysts and admins, with a server-side cap on workers
+    batch = {"submission_ids": [failing.id, passing.id, passing.id], "max_workers": 1}
+    assert client.post("/api/v1/validation/execute-batch", json=batch, headers=external).status_code == 403
+    response = client.post(
+        "/api/v1/validation/execute-batch",
+        json={**batch, "max_workers": settings.VALIDATION_MAX_WORKERS + 1},
+        headers=admin
+    )
+    assert response.status_code == 422
+    response = client.post(
+        "/api/v1/validation/execute-batch", json={"submission_ids": [failing.id, 999]}, headers=admin
+    )
+    assert response.status_code == 404
+
+    response = client.post("/api/v1/validation/execute-batch", json=batch, headers=admin)
+    assert response.status_code == 202
+    run_ids = response.json()["run_ids"]
+    assert len(run_ids) == 2
+    statuses = [client.get(f"/api/v1/validation/runs/{run_id}", headers=admin).json() for run_id in run_ids]
+    assert [(run["status"], run["errors_found"]) for run in statuses] == [("completed", 1), ("completed", 0)]
+
+def test_run_options_limit_evaluation():
+    engine = ValidationEngine([
+        CompiledRule(1, "Warning", "range", "BHCK3210 > 0", severity="warning"),
+        CompiledRule(2, "First Error", "range", "BHCK2170 > 0"),
+        CompiledRule(3, "Second Error", "range", "BHCK2948 > 0")
+    ])
+    values = {"BHCK2170": "-1", "BHCK2948": "-1", "BHCK3210": "-1"}
+
+    def rule_ids(options):
+        return [finding["rule_id"] for finding in engine.evaluate(values, options=options)]
+
+    assert rule_ids(RunOptions()) == [1, 2, 3]
+    assert rule_ids(RunOptions(fail_fast=True)) == [1, 2]
+    assert rule_ids(RunOptions(max_errors=1)) == [1]
+    assert rule_ids(RunOptions(errors_only=True)) == [2, 3]
+    assert rule_ids(RunOptions(errors_only=True, fail_fast=True)) == [2]
+
+def test_rule_impact_analysis_counts_hits_without_persisting(test_db, monkeypatch):
+    monkeypatch.setattr(validation_runs, "session_factory", TestingSessionLocal)
+
+    add_submission(test_db, 1, 1, {"BHCK2170": "100"}, reporting_date=date(2023, 12, 31))
+    add_submission(test_db, 1, 1, {"BHCK2170": "900"}, reporting_date=date(2024, 3, 31))
+    add_submission(test_db, 1, 1, {"BHCK2170": "800"}, reporting_date=date(2024, 3, 31))
+    add_submission(test_db, 1, 1, {"BHCK2170": "999"}, reporting_date=date(2025, 3, 31))
+
+    job = Job("rule_impact")
+    result = rule_impact.run_rule_impact_analysis(
+        job,
+        {"rule_id": 0, "rule_name": "Candidate", "rule_type": "range", "rule_definition": "BHCK2170 < 500"},
+        {"start_date": date(2023, 1, 1), "end_date": date(2024, 12, 31), "report_series_id": 1, "institution_id": None}
+    )
+
+    assert result["submissions_evaluated"] == 3
+    assert result["submissions_flagged"] == 2
+    assert [(hit["reporting_date"], hit["submissions"], hit["submissions_flagged"]) for hit in result["hits"]] == [
+        (date(2023, 12, 31), 1, 0),
+        (date(2024, 3, 31), 2, 2),
+    ]
+    assert result["hits"][0]["institution_name"] == "Test Bank"
+    assert job.progress["submissions_evaluated"] == 3
+    assert test_db.query(ValidationResult).count() == 0
+
+    cancelled = Job("rule_impact")
+    cancelled.cancel()
+    with pytest.raises(JobCancelled):
+        rule_impact.run_rule_impact_analysis(
+            cancelled,
+            {"rule_id": 0, "rule_name": "Candidate", "rule_type": "range", "rule_definition": "BHCK2170 < 500"},
+            {"start_date": date(2023, 1, 1), "end_date": date(2024, 12, 31), "report_series_id": None, "institution_id": None}
+        )
+
+def test_rule_profiler_records_and_flushes_stats(test_db):
+    profiler = RuleProfiler()
+    engine = ValidationEngine([
+        CompiledRule(1, "Positive", "range", "BHCK2170 > 0"),
+        CompiledRule(2, "Balance", "mathematical", "BHCK2170 = BHCK2948 + BHCK3210")
+    ], profiler)
+
+    engine.evaluate({"BHCK2170": "-5", "BHCK2948": "-5", "BHCK3210": "0"})
+    engine.evaluate({"BHCK2170": "10", "BHCK2948": "5", "BHCK3210": "5"})
+
+    assert profiler.flush(test_db) == 2
+
+    stats = {row.rule_id: row for row in test_db.query(ValidationRuleStats)}
+    assert stats[1].evaluation_count == 2
+    assert stats[1].fire_count == 1
+    assert stats[2].fire_count == 0
+    assert stats[1].total_seconds > 0
+    assert stats[1].p95_seconds > 0
+
+    # Later flushes accumulate counts
+    engine.evaluate({"BHCK2170": "-1", "BHCK2948": "-1", "BHCK3210": "0"})
+    profiler.flush(test_db)
+    test_db.expire_all()
+    assert stats[1].evaluation_count == 3
+    assert stats[1].fire_count == 2
+    # p95 covers the timings of earlier flushes too
+    assert len(json.loads(stats[1].recent_seconds)) == 3
+    assert stats[1].p95_seconds == max(json.loads(stats[1].recent_seconds))
+
+def test_failed_rule_stats_flush_keeps_stats_and_does_not_raise(test_db, monkeypatch):
+    profiler = RuleProfiler()
+    profiler.record([(1, 0.5, True)])
+    monkeypatch.setattr(settings, "RULE_STATS_FLUSH_INTERVAL", 0)
+
+    def fail(db, pending):
+        raise IntegrityError("INSERT INTO validation_rule_stats", {}, Exception("UNIQUE constraint failed"))
+
+    monkeypatch.setattr(profiler, "_write", fail)
+    profiler.maybe_flush(test_db)
+    monkeypatch.undo()
+
+    # The statistics are flushed next time instead of being lost
+    assert profiler.flush(test_db) == 1
+    assert test_db.query(ValidationRuleStats).one().evaluation_count == 1
+
+def test_mdrm_metadata_checks(test_db):
+    for identifier, data_type, valid_values in [
+        ("BHCK2170", "numeric", "Positive number"),
+        ("BHCK9999", "date", None),
+        ("BHCKRSSD", "text", "regex:[0-9]{6,10}"),
+        ("BHCKFLAG", "text", "Y, N"),
+    ]:
+        test_db.add(MDRMItem(
+            mdrm_identifier=identifier, item_name=identifier, data_type=data_type,
+            valid_values=valid_values, effective_date=date(2000, 1, 1)
+        ))
+    test_db.commit()
+
+    plan = load_mdrm_check_plan(test_db)
+    assert load_mdrm_check_plan(test_db) is plan
+
+    findings = plan.evaluate({
+        "BHCK2170": "1,000",
+        "BHCK9999": "not a date",
+        "BHCKRSSD": "12AB",
+        "BHCKFLAG": "Y",
+        "BHCK2948": "abc"
+    }, date(2024, 3, 31))
+    assert sorted(finding["field_identifier"] for finding in findings) == ["BHCK9999", "BHCKRSSD"]
+
+    submission = add_submission(test_db, 1, 1, {
+        "BHCK2170": "abc",
+        "BHCK2948": "70",
+        "BHCK3210": "30",
+        "BHCKFLAG": "X"
+    })
+    findings = validate_submission(test_db, submission)
+
+    metadata_rules = {
+        rule.id: rule.rule_name
+        for rule in test_db.query(ValidationRule).filter(ValidationRule.rule_name.like("MDRM%"))
+    }
+    assert sorted(
+        (metadata_rules[finding["rule_id"]], finding["field_identifier"])
+        for finding in findings if finding["rule_id"] in metadata_rules
+    ) == [("MDRM Data Type Check", "BHCK2170"), ("MDRM Valid Values Check", "BHCKFLAG")]
+
+def test_range_rules_checked_through_bounds_table():
+    rules = [
+        CompiledRule(1, "Positive", "range", "BHCK2170 > 0"),
+        CompiledRule(2, "Percent", "range", "0 <= BHCK7204 <= 100", severity="warning"),
+        CompiledRule(3, "Balance", "mathematical", "BHCK2170 = BHCK2948 + BHCK3210"),
+    ]
+    engine = ValidationEngine(rules)
+
+    assert len(engine.batches[0].bounds) == 2
+    assert rules[2].interval is None
+
+    findings = engine.evaluate({"BHCK2170": "0", "BHCK7204": "100", "BHCK2948": "0", "BHCK3210": "0"})
+    assert [finding["rule_id"] for finding in findings] == [1]
+    assert finding_message(findings[0]) == finding_message(rules[0].evaluate({"BHCK2170": 0.0}, {}))
+
+    findings = engine.evaluate({"BHCK2170": "abc", "BHCK7204": "100.5"})
+    assert [finding["rule_id"] for finding in findings] == [1, 2]
+    assert "could not be evaluated" in finding_message(findings[0])
+
+    assert engine.evaluate({"BHCK7204": "150"}, options=RunOptions(errors_only=True)) == []
+
+def test_cross_series_rules_use_counterpart_submission(test_db):
+    test_db.add(ReportSeries(
+        series_code="FFIEC 031",
+        series_name="Consolidated Reports of Condition and Income",
+        filing_frequency="quarterly",
+        status="active"
+    ))
+    test_db.add(ValidationRule(
+        rule_name="Assets Agree With Call Report",
+        rule_type="cross_field",
+        rule_definition="BHCK2170 >= FFIEC031:RCFD2170",
+        severity="error",
+        effective_date=date(2020, 1, 1)
+    ))
+    test_db.commit()
+
+    rule = CompiledRule(9, "Cross", "cross_field", "BHCK2170 >= ffiec031:RCFD2170")
+    assert rule.identifiers == ("BHCK2170",)
+    assert rule.cross_references == ("FFIEC031:RCFD2170",)
+    assert rule.interval is None
+
+    current = add_submission(test_db, 1, 1, {"BHCK2170": "100", "BHCK2948": "60", "BHCK3210": "40"})
+
+    # No counterpart has been filed yet, so the cross-series rule does not apply
+    assert validate_submission(test_db, current) == []
+
+    counterpart = add_submission(test_db, 1, 2, {"RCFD2170": "150"})
+    add_submission(test_db, 1, 2, {"RCFD2170": "90"}, reporting_date=date(2023, 12, 31))
+
+    findings = validate_submission(test_db, current)
+    assert len(findings) == 1
+    assert "FFIEC031:RCFD2170=150.0" in finding_message(findings[0])
+
+    lookup = CounterpartLookup(test_db, {"FFIEC031", "UNKNOWN"})
+    values = lookup.values_for(current)
+    assert values == {"FFIEC031": {"RCFD2170": 150.0}}
+    assert lookup.values_for(current)["FFIEC031"] is values["FFIEC031"]
+    assert lookup.values_for(counterpart) is None
+
+    summary = validate_submissions(test_db, [current.id], max_workers=1)
+    assert summary["findings"] == 1
+
+def test_validation_summary_tracks_result_writes_and_status_changes(test_db):
+    submission = add_submission(test_db, 1, 1, {
+        "BHCK2170": "100",
+        "BHCK2948": "70",
+        "BHCK3210": "-10"
+    })
+    validate_submission(test_db, submission)
+
+    summary = submission.validation_summary
+    assert (summary.open_errors, summary.open_warnings) == (1, 1)
+
+    warning = test_db.query(ValidationResult).filter(
+        ValidationResult.submission_id == submission.id,
+        ValidationResult.severity == "warning"
+    ).one()
+    warning.status = "waived"
+    refresh_summaries(test_db, [submission.id])
+    test_db.commit()
+
+    summary = test_db.query(ValidationSummary).filter(ValidationSummary.submission_id == submission.id).one()
+    assert (summary.open_warnings, summary.waived_warnings, summary.total_warnings) == (0, 1, 1)
+
+    # Rebuilding every summary gives the same counts
+    assert refresh_summaries(test_db) == 1
+    test_db.commit()
+    summary = test_db.query(ValidationSummary).one()
+    assert (summary.open_errors, summary.waived_warnings) == (1, 1)
+
+def test_pushdown_rules_evaluated_in_sql(test_db):
+    test_db.add(ValidationRule(
+        rule_name="RSSD Has Nine Digits",
+        rule_type="format",
+        rule_definition="LENGTH(BHCKRSSD) = 9",
+        severity="error",
+        effective_date=date(2020, 1, 1)
+    ))
+    test_db.commit()
+
+    specs = [rule_spec(rule) for rule in test_db.query(ValidationRule).order_by(ValidationRule.id)]
+    pushdown, remaining = split_pushdown_rules(specs)
+    assert [rule.rule.rule_id for rule in pushdown] == [2, 3, 4]
+    assert [spec["rule_id"] for spec in remaining] == [1]
+
+    passing = add_submission(test_db, 1, 1, {"BHCK2170": "1,000", "BHCK3210": "5", "BHCKRSSD": "123456789"})
+    failing = add_submission(test_db, 1, 1, {"BHCK2170": "abc", "BHCK3210": "-5", "BHCKRSSD": "1234"})
+
+    assert run_pushdown_rules(test_db, pushdown, [passing.id, failing.id], replace_open=True) == 3
+    # Rerunning replaces the open results rather than duplicating them
+    assert run_pushdown_rules(test_db, pushdown, [passing.id, failing.id], replace_open=True) == 3
+
+    results = test_db.query(ValidationResult).filter(ValidationResult.submission_id == failing.id).all()
+    assert sorted(result.rule_id for result in results) == [2, 3, 4]
+    messages = {result.rule_id: result.error_message for result in results}
+    assert "could not be evaluated" in messages[2]
+    # Values are shown as the engine shows them
+    assert messages[4] == "RSSD Has Nine Digits: LENGTH(BHCKRSSD) = 9 (BHCKRSSD=1234.0)"
+
+    test_db.expire_all()
+    assert passing.validation_status == "passed"
+    assert failing.validation_status == "failed"
+    assert failing.validation_summary.open_errors == 2
+
+def test_batch_and_single_validation_gate_items_alike(test_db):
+    test_db.add(MDRMItem(
+        mdrm_identifier="BHCK2170", item_name="Total Assets", data_type="numeric", effective_date=date(2000, 1, 1)
+    ))
+    test_db.add_all([
+        ValidationRule(
+            rule_name="Equity Below Assets", rule_type="mathematical", rule_definition="BHCK3210 < BHCK2170",
+            severity="warning", effective_date=date(2020, 1, 1), priority=200
+        ),
+        ValidationRule(
+            rule_name="Assets Above Minimum", rule_type="range", rule_definition="BHCK2170 > 500",
+            severity="error", effective_date=date(2020, 1, 1), priority=300
+        ),
+    ])
+    test_db.commit()
+
+    # An error-severity pushdown candidate that a later engine rule reads stays in the engine
+    pushdown, remaining = split_pushdown_rules(
+        [rule_spec(rule) for rule in test_db.query(ValidationRule).filter(~ValidationRule.rule_name.like("MDRM%"))]
+    )
+    assert sorted(rule.rule.rule_id for rule in pushdown) == [3, 5]
+    assert [spec["rule_id"] for spec in remaining] == [1, 2, 4]
+
+    values = [
+        # Fails the MDRM data type check, which gates every rule on BHCK2170
+        {"BHCK2170": "abc", "BHCK2948": "5", "BHCK3210": "-5"},
+        # Fails the balance rule, which gates the lower-priority minimum check
+        {"BHCK2170": "100", "BHCK2948": "70", "BHCK3210": "-10"},
+    ]
+    batch = [add_submission(test_db, 1, 1, submission_values) for submission_values in values]
+    single = [add_submission(test_db, 1, 1, submission_values) for submission_values in values]
+
+    validate_submissions(test_db, [submission.id for submission in batch], max_workers=1)
+    for submission in single:
+        validate_submission(test_db, submission)
+
+    def results(submission):
+        return sorted(
+            (result.rule_id, result.field_identifier, result.severity, result.error_message)
+            for result in test_db.query(ValidationResult).filter(ValidationResult.submission_id == submission.id)
+        )
+
+    for batch_submission, single_submission in zip(batch, single):
+        assert results(batch_submission) == results(single_submission)
+    assert [rule_id for rule_id, _, _, _ in results(batch[0])] == [3, 6]
+
+def test_waived_results_of_earlier_runs_do_not_gate_pushdown_rules(test_db):
+    test_db.add(ValidationRule(
+        rule_name="Assets Above Minimum", rule_type="range", rule_definition="BHCK2170 > 500",
+        severity="error", effective_date=date(2020, 1, 1), priority=300
+    ))
+    test_db.commit()
+
+    batch = add_submission(test_db, 1, 1, {"BHCK2170": "100"})
+    single = add_submission(test_db, 1, 1, {"BHCK2170": "100"})
+    # An error on the item that was waived in an earlier run and no longer occurs
+    for submission in (batch, single):
+        test_db.add(ValidationResult(
+            submission_id=submission.id, rule_id=2, field_identifier="BHCK2170",
+            severity="error", status="waived"
+        ))
+    test_db.commit()
+
+    validate_submissions(test_db, [batch.id], max_workers=1)
+    validate_submission(test_db, single)
+
+    def open_rules(submission):
+        return [result.rule_id for result in test_db.query(ValidationResult).filter(
+            ValidationResult.submission_id == submission.id, ValidationResult.status == "open"
+        )]
+
+    assert open_rules(batch) == open_rules(single) == [4]
+
+def test_pushdown_and_engine_findings_have_identical_messages(test_db):
+    values = [
+        {"BHCK2170": "-5", "BHCK3210": "abc"},
+        {"BHCK2170": "-1e20", "BHCK3210": "-1,000.50"},
+        {"BHCK2170": "-0.00001", "BHCK3210": "n/a"},
+    ]
+    batch = [add_submission(test_db, 1, 1, submission_values) for submission_values in values]
+    single = [add_submission(test_db, 1, 1, submission_values) for submission_values in values]
+
+    # Rules 2 and 3 are evaluated in SQL by batch validation and by the engine otherwise
+    summary = validate_submissions(test_db, [submission.id for submission in batch], max_workers=1)
+    assert summary["pushdown_rules"] == 2
+    for submission in single:
+        validate_submission(test_db, submission)
+
+    def messages(submission):
+        return sorted(
+            (result.rule_id, result.error_message)
+            for result in test_db.query(ValidationResult).filter(ValidationResult.submission_id == submission.id)
+        )
+
+    for batch_submission, single_submission in zip(batch, single):
+        assert messages(batch_submission) == messages(single_submission)
+    assert messages(batch[0]) == [
+        (2, "Assets Must Be Positive: BHCK2170 > 0 (BHCK2170=-5.0)"),
+        (3, "Equity Should Be Positive: rule could not be evaluated "
+            "('>' not supported between instances of 'str' and 'int') (BHCK3210=abc)"),
+    ]
+    assert messages(batch[1])[0] == (2, "Assets Must Be Positive: BHCK2170 > 0 (BHCK2170=-1e+20)")
+
+def test_unchanged_rule_inputs_reuse_memoized_outcomes(test_db):
+    original = add_submission(test_db, 1, 1, {"BHCK2170": "100", "BHCK2948": "70", "BHCK3210": "-10"})
+    validate_submission(test_db, original)
+
+    # Only the expression rule is memoized; range rules run through the bounds table
+    assert test_db.query(ValidationResultMemo).count() == 1
+
+    engine = ValidationEngine.from_specs([rule_spec(rule) for rule in test_db.query(ValidationRule)])
+    amended_values = {"BHCK2170": "100", "BHCK2948": "70", "BHCK3210": "-10", "BHCK0081": "5"}
+    memo = load_memo(test_db, engine.memo_keys(amended_values))
+    findings = engine.evaluate(amended_values, memo=memo)
+
+    assert memo.hits == 1
+    assert not memo.added
+    assert sorted(finding["rule_id"] for finding in findings) == [1, 3]
+
+    # A changed input or a new rule version misses the memo
+    changed = dict(amended_values, BHCK2948="110")
+    memo = load_memo(test_db, engine.memo_keys(changed))
+    engine.evaluate(changed, memo=memo)
+    assert memo.hits == 0
+    assert len(memo.added) == 1
+
+    engine.rules[0].version += 1
+    memo = load_memo(test_db, engine.memo_keys(amended_values))
+    engine.evaluate(amended_values, memo=memo)
+    assert memo.hits == 0
+
+def test_batch_validation_uses_and_prunes_memoized_outcomes(test_db):
+    values = {"BHCK2170": "100", "BHCK2948": "70", "BHCK3210": "-10"}
+    original = add_submission(test_db, 1, 1, values)
+    validate_submissions(test_db, [original.id], max_workers=1)
+
+    memo = test_db.query(ValidationResultMemo).one()
+    assert (memo.rule_id, memo.rule_version) == (1, 1)
+
+    # Workers reuse the stored outcome instead of evaluating the rule again
+    memo.finding = None
+    test_db.commit()
+    amended = add_submission(test_db, 1, 1, values)
+    validate_submissions(test_db, [amended.id], max_workers=1)
+    assert not test_db.query(ValidationResult).filter(
+        ValidationResult.submission_id == amended.id, ValidationResult.rule_id == 1
+    ).count()
+
+    # Outcomes of a superseded version are removed once the rule is updated
+    test_db.query(ValidationRule).filter(ValidationRule.id == 1).update({ValidationRule.version: 2})
+    test_db.commit()
+    validate_submissions(test_db, [amended.id], max_workers=1)
+    assert [(row.rule_id, row.rule_version) for row in test_db.query(ValidationResultMemo)] == [(1, 2)]
+
+def test_results_store_shared_message_templates(test_db):
+    first = add_submission(test_db, 1, 1, {"BHCK2170": "-5", "BHCK2948": "0", "BHCK3210": "-10"})
+    second = add_submission(test_db, 1, 1, {"BHCK2170": "-7", "BHCK2948": "0", "BHCK3210": "-12"})
+    validate_submission(test_db, first)
+    validate_submission(test_db, second)
+
+    # Three failing rules across two submissions share three templates
+    assert test_db.query(ValidationResult).count() == 6
+    assert test_db.query(ValidationMessageTemplate).count() == 3
+
+    result = test_db.query(ValidationResult).filter(
+        ValidationResult.submission_id == second.id,
+        ValidationResult.rule_id == 2
+    ).one()
+    assert result.stored_message == ""
+    assert result.error_message == "Assets Must Be Positive: BHCK2170 > 0 (BHCK2170=-7.0)"
+
+    # Results written before templates keep their full message
+    legacy = ValidationResult(
+        submission_id=first.id, rule_id=1, field_identifier="BHCK2170",
+        stored_message="Legacy message", severity="error", status="resolved"
+    )
+    test_db.add(legacy)
+    test_db.commit()
+    assert legacy.error_message == "Legacy message"
+
+def test_rules_run_in_priority_batches_and_errors_gate_later_batches():
+    rules = [
+        CompiledRule(1, "Growth", "historical", "BHCK2170 <= PRIOR(BHCK2170) * 2", priority=200),
+        CompiledRule(2, "Positive", "range", "BHCK2170 > 0", priority=10),
+        CompiledRule(3, "Equity", "range", "BHCK3210 > 0", severity="warning", priority=10),
+        CompiledRule(4, "Equity growth", "historical", "BHCK3210 <= PRIOR(BHCK3210) * 2", priority=200),
+    ]
+    engine = ValidationEngine(rules)
+    assert [(batch.priority, [rule.rule_id for rule in batch.rules]) for batch in engine.batches] == [
+        (10, [2, 3]), (200, [1, 4])
+    ]
+
+    prior = {"BHCK2170": 1.0, "BHCK3210": 1.0}
+    findings = engine.evaluate({"BHCK2170": "5", "BHCK3210": "5"}, prior_values=prior)
+    assert [finding["rule_id"] for finding in findings] == [1, 4]
+
+    # The error on BHCK2170 skips its historical rule; the warning on BHCK3210 does not
+    findings = engine.evaluate({"BHCK2170": "-5", "BHCK3210": "-5"}, prior_values={"BHCK2170": -9.0, "BHCK3210": -9.0})
+    assert [finding["rule_id"] for finding in findings] == [2, 3, 4]
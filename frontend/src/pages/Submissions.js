@@ -4,10 +4,75 @@ import React, { useState, useEffect } from 'react';
 import { Table, Button, Card, Row, Col, Spinner, Alert, Badge } from 'react-bootstrap';
 import axios from 'axios';
 
+// Read a Server-Sent Events stream, calling onEvent for each event.
+// fetch is used instead of EventSource so the auth header can be sent.
+const streamEvents = async (url, onEvent) => {
+  const response = await fetch(`${axios.defaults.baseURL}${url}`, {
+    headers: { Authorization: `Bearer ${localStorage.getItem('token')}` }
+  });
+  if (!response.ok) {
+    throw new Error(`Event stream failed with status ${response.status}`);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) {
+      break;
+    }
+
+    buffer += decoder.decode(value, { stream: true });
+    const chunks = buffer.split('\n\n');
+    buffer = chunks.pop();
+
+    for (const chunk of chunks) {
+      let event = 'message';
+      let data = null;
+      for (const line of chunk.split('\n')) {
+        if (line.startsWith('event: ')) {
+          event = line.slice(7);
+        } else if (line.startsWith('data: ')) {
+          data = JSON.parse(line.slice(6));
+        }
+      }
+      if (data) {
+        onEvent(event, data);
+      }
+    }
+  }
+};
+
 const Submissions = () => {
   const [submissions, setSubmissions] = useState([]);
   const [loading, setLoading] = useState(true);
   const [error, setError] = useState(null);
+  const [runs, setRuns] = useState({});
+
+  const handleValidate = async (submissionId) => {
+    try {
+      const response = await axios.post(`/submissions/${submissionId}/validate`);
+      const runId = response.data.run_id;
+
+      setRuns((prev) => ({ ...prev, [submissionId]: { status: 'queued', rules_evaluated: 0, rules_total: 0 } }));
+
+      await streamEvents(`/validation/runs/${runId}/events`, (event, progress) => {
+        setRuns((prev) => ({ ...prev, [submissionId]: progress }));
+        if (event === 'done') {
+          setSubmissions((prev) => prev.map((submission) => (
+            submission.id === submissionId
+              ? { ...submission, validation_status: progress.validation_status }
+              : submission
+          )));
+        }
+      });
+    } catch (err) {
+      console.error('Error validating submission:', err);
+      setError('Failed to validate submission. Please try again later.');
+    }
+  };
 
   useEffect(() => {
     const fetchSubmissions = async () => {
@@ -93,6 +158,19 @@ const Submissions = () => {
                     }>
                       {submission.validation_status}
                     </Badge>
+                    {submission.validation_summary && !runs[submission.id] && (
+                      <div className="small text-muted mt-1">
+                        {submission.validation_summary.open_errors} errors,{' '}
+                        {submission.validation_summary.open_warnings} warnings open
+                      </div>
+                    )}
+                    {runs[submission.id] && runs[submission.id].status !== 'completed' && (
+                      <div className="small text-muted mt-1">
+                        {runs[submission.id].rules_evaluated}/{runs[submission.id].rules_total} rules,{' '}
+                        {runs[submission.id].errors_found || 0} errors
+                        {runs[submission.id].elapsed_seconds !== undefined && ` (${runs[submission.id].elapsed_seconds}s)`}
+                      </div>
+                    )}
                   </td>
                   <td>
                     <Button 
@@ -103,7 +181,15 @@ const Submissions = () => {
                     >
                       View
                     </Button>
-                    <Button variant="warning" size="sm" className="me-2">Validate</Button>
+                    <Button
+                      variant="warning"
+                      size="sm"
+                      className="me-2"
+                      disabled={runs[submission.id] && ['queued', 'running'].includes(runs[submission.id].status)}
+                      onClick={() => handleValidate(submission.id)}
+                    >
+                      Validate
+                    </Button>
                     <Button variant="danger" size="sm">Delete</Button>
                   </td>
                 </tr>